@@ -60,12 +60,17 @@ from xmodule.exceptions import SerializationError
 from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import DuplicateCourseError, InvalidProctoringProvider, ItemNotFoundError
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
+from xmodule.modulestore.xml_exporter import (
+    export_course_to_tarball,
+    export_course_to_xml,
+    export_library_to_tarball,
+    export_library_to_xml
+)
 from xmodule.modulestore.xml_importer import CourseImportException, import_course_from_xml, import_library_from_xml
 
 from .outlines import update_outline_from_modulestore
 from .outlines_regenerate import CourseOutlineRegenerate
-from .toggles import bypass_olx_failure_enabled
+from .toggles import bypass_olx_failure_enabled, pipelined_olx_import_enabled, streaming_olx_export_enabled
 from .utils import course_import_olx_validation_is_enabled
 
 User = get_user_model()
@@ -337,6 +342,8 @@ def create_export_tarball(course_module, course_key, context, status=None):
     """
     name = course_module.url_name
     export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")  # lint-amnesty, pylint: disable=consider-using-with
+    if streaming_olx_export_enabled():
+        return _create_streamed_export_tarball(course_module, course_key, context, export_file, status)
     root_dir = path(mkdtemp())
 
     try:
@@ -352,8 +359,50 @@ def create_export_tarball(course_module, course_key, context, status=None):
         with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
             tar_file.add(root_dir / name, arcname=name)
 
-    except SerializationError as exc:
-        LOGGER.exception('There was an error exporting %s', course_key, exc_info=True)
+    except Exception as exc:
+        _handle_export_error(exc, course_key, context, status)
+        raise
+    finally:
+        if os.path.exists(root_dir / name):
+            shutil.rmtree(root_dir / name)
+
+    return export_file
+
+
+def _create_streamed_export_tarball(course_module, course_key, context, export_file, status):
+    """
+    Generates the export tarball in `export_file`, streaming the exported OLX and static
+    assets into it rather than writing them to a directory first.
+
+    Updates the context with any error information if applicable.
+    """
+    name = course_module.url_name
+    try:
+        LOGGER.debug('tar file being streamed to %s', export_file.name)
+        with tarfile.open(fileobj=export_file, mode='w|gz') as tar_file:
+            if isinstance(course_key, LibraryLocator):
+                export_library_to_tarball(modulestore(), contentstore(), course_key, tar_file, name)
+            else:
+                export_course_to_tarball(modulestore(), contentstore(), course_module.id, tar_file, name)
+        export_file.seek(0)
+
+        # The export is compressed as it is written, so the compressing step is already done.
+        if status:
+            status.increment_completed_steps()
+
+    except Exception as exc:
+        _handle_export_error(exc, course_key, context, status)
+        raise
+
+    return export_file
+
+
+def _handle_export_error(exc, course_key, context, status):
+    """
+    Updates the context, and fails the status if any, with the information of the given export error.
+    """
+    LOGGER.exception('There was an error exporting %s', course_key, exc_info=True)
+    if isinstance(exc, SerializationError):
         parent = None
         try:
             failed_item = modulestore().get_item(exc.location)
@@ -373,21 +422,13 @@ def create_export_tarball(course_module, course_key, context, status=None):
         if status:
             status.fail(json.dumps({'raw_error_msg': context['raw_err_msg'],
                                     'edit_unit_url': context['edit_unit_url']}))
-        raise
-    except Exception as exc:
-        LOGGER.exception('There was an error exporting %s', course_key, exc_info=True)
+    else:
         context.update({
             'in_err': True,
             'edit_unit_url': None,
             'raw_err_msg': str(exc)})
         if status:
             status.fail(json.dumps({'raw_error_msg': context['raw_err_msg']}))
-        raise
-    finally:
-        if os.path.exists(root_dir / name):
-            shutil.rmtree(root_dir / name)
-
-    return export_file
 
 
 class CourseImportTask(UserTask):  # pylint: disable=abstract-method
@@ -626,6 +667,13 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
         self.status.increment_completed_steps()
         LOGGER.info(f'{log_prefix}: Extracted file verified. Updating course started')
 
+        def report_import_stage(stage, duration):
+            """
+            Show the completed stages of the import, and their durations, in the task status.
+            """
+            self.status.set_state(f'{current_step}: {stage} completed in {duration:.1f}s')
+
+        pipelined = pipelined_olx_import_enabled()
         courselike_items = import_func(
             modulestore(), user.id,
             settings.GITHUB_REPO_ROOT, [dirpath],
@@ -633,7 +681,10 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             static_content_store=contentstore(),
             target_id=courselike_key,
             verbose=True,
+            pipelined=pipelined,
+            progress_callback=report_import_stage if pipelined else None,
         )
+        self.status.set_state(current_step)
 
         new_location = courselike_items[0].location
         LOGGER.debug('new course at %s', new_location)
@@ -6,7 +6,16 @@ Tests core caching facilities.
 from django.test import TestCase
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 
-from openedx.core.djangoapps.contentserver.caching import del_cached_content, get_cached_content, set_cached_content
+from openedx.core.djangoapps.contentserver.caching import (
+    ASSET_NOT_FOUND,
+    del_cached_content,
+    get_cached_content,
+    get_cached_content_metadata,
+    set_cached_content,
+    set_cached_content_metadata,
+    set_cached_content_not_found
+)
+from xmodule.contentstore.content import StaticContent, StaticContentMetadata
 
 
 class Content:
@@ -44,3 +53,26 @@ class CachingTestCase(TestCase):
                          'should not be stored in cache with unicodeLocation')
         self.assertEqual(None, get_cached_content(self.nonUnicodeLocation),
                          'should not be stored in cache with nonUnicodeLocation')
+
+    def test_metadata(self):
+        content = StaticContent(self.unicodeLocation, 'monsters.jpg', 'image/jpeg', b'my content', length=10,
+                                locked=True, content_digest='ffffffffffffffffffffffffffffffff')
+        set_cached_content_metadata(content)
+        metadata = get_cached_content_metadata(self.nonUnicodeLocation)
+        self.assertIsInstance(metadata, StaticContentMetadata)
+        self.assertEqual(
+            (content.content_type, content.length, content.locked, content.content_digest),
+            (metadata.content_type, metadata.length, metadata.locked, metadata.content_digest),
+        )
+        self.assertIsNone(metadata.data, 'should not store the content itself')
+
+        del_cached_content(self.nonUnicodeLocation)
+        self.assertIsNone(get_cached_content_metadata(self.unicodeLocation),
+                          'should delete the metadata along with the content')
+
+    def test_not_found(self):
+        set_cached_content_not_found(self.unicodeLocation)
+        self.assertEqual(ASSET_NOT_FOUND, get_cached_content_metadata(self.nonUnicodeLocation))
+
+        del_cached_content(self.nonUnicodeLocation)
+        self.assertIsNone(get_cached_content_metadata(self.unicodeLocation))
@@ -196,6 +196,29 @@ class ContentStoreImportTest(ModuleStoreTestCase):
             __, __, course = self.load_test_import_course(create_if_not_present=True)
             self.load_test_import_course(target_id=course.id)
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_pipelined_import(self, default_ms_type):
+        content_store = contentstore()
+        with modulestore().default_store(default_ms_type):
+            course = import_course_from_xml(
+                modulestore(), self.user.id, TEST_DATA_DIR, ['toy'],
+                static_content_store=content_store, create_if_not_present=True,
+            )[0]
+            __, num_assets = content_store.get_all_content_for_course(course.id)
+            num_items = len(modulestore().get_items(course.id))
+
+            # reimport into the existing course, so that the static content is imported while parsing the OLX
+            stages = []
+            course = import_course_from_xml(
+                modulestore(), self.user.id, TEST_DATA_DIR, ['toy'],
+                static_content_store=content_store, target_id=course.id,
+                pipelined=True, progress_callback=lambda stage, duration: stages.append(stage),
+            )[0]
+
+            self.assertEqual(content_store.get_all_content_for_course(course.id)[1], num_assets)
+            self.assertEqual(len(modulestore().get_items(course.id)), num_items)
+        self.assertEqual(stages, ['Parsing', 'Importing blocks', 'Importing static content', 'Importing drafts'])
+
     def test_rewrite_reference_list(self):
         # This test fails with split modulestore (the HTML component is not in "different_course_id" namespace).
         # More investigation needs to be done.
@@ -5,12 +5,14 @@ Unit tests for course import and export Celery tasks
 
 import copy
 import json
+import tarfile
 from unittest import mock
 from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
 from django.test.utils import override_settings
+from edx_toggles.toggles.testutils import override_waffle_flag
 from opaque_keys.edx.locator import CourseLocator
 from organizations.models import OrganizationCourse
 from organizations.tests.factories import OrganizationFactory
@@ -19,6 +21,7 @@ from user_tasks.models import UserTaskArtifact, UserTaskStatus
 from cms.djangoapps.contentstore.tasks import export_olx, rerun_course
 from cms.djangoapps.contentstore.tests.test_libraries import LibraryTestCase
 from cms.djangoapps.contentstore.tests.utils import CourseTestCase
+from cms.djangoapps.contentstore.toggles import STREAMING_OLX_EXPORT
 from common.djangoapps.course_action_state.models import CourseRerunState
 from common.djangoapps.student.tests.factories import UserFactory
 from openedx.core.djangoapps.embargo.models import Country, CountryAccessRule, RestrictedCourse
@@ -54,6 +57,25 @@ class ExportCourseTestCase(CourseTestCase):
         output = artifacts[0]
         self.assertEqual(output.name, 'Output')
 
+    def test_streaming_success(self):
+        """
+        Verify that the streaming export produces the same tarball files as the export to disk
+        """
+        key = str(self.course.location.course_key)
+        exported_files = []
+        for streaming in (False, True):
+            with override_waffle_flag(STREAMING_OLX_EXPORT, active=streaming):
+                result = export_olx.delay(self.user.id, key, 'en')
+            status = UserTaskStatus.objects.get(task_id=result.id)
+            self.assertEqual(status.state, UserTaskStatus.SUCCEEDED)
+            output = UserTaskArtifact.objects.get(status=status)
+            with output.file.open('rb') as output_file, tarfile.open(fileobj=output_file) as tar_file:
+                exported_files.append({
+                    member.name: tar_file.extractfile(member).read() for member in tar_file if member.isfile()
+                })
+        self.assertIn(f'{self.course.url_name}/course.xml', exported_files[1])
+        self.assertEqual(exported_files[0], exported_files[1])
+
     @mock.patch('cms.djangoapps.contentstore.tasks.export_course_to_xml', side_effect=side_effect_exception)
     def test_exception(self, mock_export):  # pylint: disable=unused-argument
         """
@@ -49,6 +49,36 @@ BYPASS_OLX_FAILURE = LegacyWaffleFlag(
     module_name=__name__
 )
 
+# .. toggle_name: pipelined_olx_import
+# .. toggle_implementation: WaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Enables the pipelined import of OLX archives, which uploads the static files of the course
+#   concurrently in the background while the OLX is parsed and the blocks are imported, and writes the imported
+#   blocks in batches.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-01-18
+PIPELINED_OLX_IMPORT = LegacyWaffleFlag(
+    waffle_namespace=LegacyWaffleFlagNamespace(name=WAFFLE_NAMESPACE),
+    flag_name='pipelined_olx_import',
+    module_name=__name__
+)
+
+# .. toggle_name: streaming_olx_export
+# .. toggle_implementation: WaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Enables the streaming export of OLX archives, which adds the exported OLX and static files
+#   of the course directly to the compressed archive, instead of writing them to a directory to archive afterwards.
+#   The static files are read concurrently, with a bounded amount of them held in memory.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-01-18
+STREAMING_OLX_EXPORT = LegacyWaffleFlag(
+    waffle_namespace=LegacyWaffleFlagNamespace(name=WAFFLE_NAMESPACE),
+    flag_name='streaming_olx_export',
+    module_name=__name__
+)
+
 
 def split_library_view_on_dashboard():
     """
@@ -64,6 +94,20 @@ def bypass_olx_failure_enabled():
     return BYPASS_OLX_FAILURE.is_enabled()
 
 
+def pipelined_olx_import_enabled():
+    """
+    Check if OLX archives are imported with the pipelined import.
+    """
+    return PIPELINED_OLX_IMPORT.is_enabled()
+
+
+def streaming_olx_export_enabled():
+    """
+    Check if OLX archives are exported with the streaming export.
+    """
+    return STREAMING_OLX_EXPORT.is_enabled()
+
+
 # .. toggle_name: FEATURES['ENABLE_EXAM_SETTINGS_HTML_VIEW']
 # .. toggle_use_cases: open_edx
 # .. toggle_implementation: SettingDictToggle
@@ -19,6 +19,7 @@ from opaque_keys.edx.keys import AssetKey, CourseKey
 from pymongo import ASCENDING, DESCENDING
 
 from common.djangoapps.edxmako.shortcuts import render_to_response
+from common.djangoapps.static_replace import invalidate_static_urls
 from common.djangoapps.student.auth import has_course_author_access
 from common.djangoapps.util.date_utils import get_default_time_display
 from common.djangoapps.util.json_request import JsonResponse
@@ -391,6 +392,7 @@ def update_course_run_asset(course_key, upload_file):
 
     contentstore().save(content)
     del_cached_content(content.location)
+    invalidate_static_urls(course_key)
 
     return content
 
@@ -545,6 +547,8 @@ def _update_asset(request, course_key, asset_key):
         contentstore().set_attr(asset_key, 'locked', modified_asset['locked'])
         # delete the asset from the cache so we check the lock status the next time it is requested.
         del_cached_content(asset_key)
+        # the url of an unlocked asset may be served from the CDN.
+        invalidate_static_urls(course_key)
         return JsonResponse(modified_asset, status=201)
 
 
@@ -562,6 +566,7 @@ def delete_asset(course_key, asset_key):
     _delete_thumbnail(content.thumbnail_location, course_key, asset_key)
     contentstore().delete(content.get_id())
     del_cached_content(content.location)
+    invalidate_static_urls(course_key)
 
 
 def _check_existence_and_get_asset_content(asset_key):  # lint-amnesty, pylint: disable=missing-function-docstring
@@ -895,6 +895,13 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# .. setting_name: COURSE_ASSETS_CACHE_MAX_ASSET_SIZE
+# .. setting_default: 262144
+# .. setting_description: Size in bytes under which the contentserver keeps course assets in the
+#   course_assets cache (or the default cache, if there is none). Larger assets are streamed from the
+#   contentstore on every request, instead of being held in memory and pickled whole into the cache.
+COURSE_ASSETS_CACHE_MAX_ASSET_SIZE = 256 * 1024
+
 MODULESTORE_BRANCH = 'draft-preferred'
 
 MODULESTORE = {
@@ -1033,6 +1040,19 @@ CODE_JAIL_REST_SERVICE_CONNECT_TIMEOUT = 0.5  # time in seconds
 #   codejail remote service endpoint.
 CODE_JAIL_REST_SERVICE_READ_TIMEOUT = 3.5  # time in seconds
 
+# Codejail worker pool
+ENABLE_CODEJAIL_WORKER_POOL = False
+# .. setting_name: CODE_JAIL_WORKER_POOL_SIZE
+# .. setting_default: 4
+# .. setting_description: Number of pre-warmed codejail worker processes started by each
+#   process executing sandboxed code, when ENABLE_CODEJAIL_WORKER_POOL is True.
+CODE_JAIL_WORKER_POOL_SIZE = 4
+# .. setting_name: CODE_JAIL_WORKER_POOL_WAIT_TIMEOUT
+# .. setting_default: 1
+# .. setting_description: Number of seconds to wait for an idle codejail worker process,
+#   after which the code is executed by codejail instead.
+CODE_JAIL_WORKER_POOL_WAIT_TIMEOUT = 1
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1,11 +1,15 @@
 # lint-amnesty, pylint: disable=missing-module-docstring
 
+import hashlib
 import logging
 import re
+from functools import lru_cache
+from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.staticfiles import finders
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
 from opaque_keys.edx.locator import AssetLocator
 
 from xmodule.contentstore.content import StaticContent
@@ -13,6 +17,11 @@ from xmodule.contentstore.content import StaticContent
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# How long the urls resolved for the static urls of a course are cached.  They
+# are invalidated when the course is published or its assets change, or when
+# the static files are collected again, and otherwise expire after this timeout.
+STATIC_URLS_CACHE_TIMEOUT = 60 * 60
+
 
 def _url_replace_regex(prefix):
     """
@@ -29,6 +38,14 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+@lru_cache(maxsize=256)
+def _url_replace_pattern(prefix):
+    """
+    Returns the compiled _url_replace_regex of the given prefix.
+    """
+    return re.compile(_url_replace_regex(prefix))
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -70,7 +87,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):  # lint-amnes
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _url_replace_pattern('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -90,7 +107,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _url_replace_pattern('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -120,14 +137,10 @@ def process_static_urls(text, replacement_function, data_dir=None):
 
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex('(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _url_replace_pattern('(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -147,82 +160,224 @@ def make_static_urls_absolute(request, html):
     )
 
 
-def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path='', static_paths_out=None):
+@lru_cache(maxsize=None)
+def _static_files_version():
     """
-    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
-    (/static/$md5_hashed_stuff) or by the course-specific content static url
-    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
-    correct url in the contentstore (/c4x/.. or /asset-loc:..)
+    Returns a digest identifying the static files of this deployment: the
+    platform revision and, if staticfiles_storage has one, the manifest of the
+    collected static files, which maps them to their hashed urls.
+    """
+    md5 = hashlib.md5(str(getattr(settings, 'EDX_PLATFORM_REVISION', '')).encode('utf-8'))
+    read_manifest = getattr(staticfiles_storage, 'read_manifest', None)
+    manifest = read_manifest() if read_manifest is not None else None
+    if isinstance(manifest, str):
+        md5.update(manifest.encode('utf-8'))
+    return md5.hexdigest()
 
-    text: The source text to do the substitution in
-    data_directory: The directory in which course data is stored
-    course_id: The course identifier used to distinguish static content for this course in studio
-    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
-    static_paths_out: (optional) pass an array to collect tuples for each static URI found:
-      * the original unmodified static URI
-      * the updated static URI (will match the original if unchanged)
+
+def _static_urls_generation_cache_key(course_id):
+    """
+    Returns the cache key of the generation of the urls resolved for the
+    static urls of the given course.
+    """
+    return f'static_replace.static_urls.generation.{course_id}'
+
+
+def _static_urls_generation(course_id):
+    """
+    Returns the current generation of the urls resolved for the static urls of
+    the given course, which changes whenever they are invalidated.
+    """
+    generation_key = _static_urls_generation_cache_key(course_id)
+    generation = cache.get(generation_key)
+    if generation is None:
+        generation = uuid4().hex
+        if not cache.add(generation_key, generation, None):
+            generation = cache.get(generation_key) or generation
+    return generation
+
+
+def _static_urls_cache_key(course_id=None, directory=None):
+    """
+    Returns the cache key of the urls resolved for the static urls of the given
+    course, or of the given static asset directory.
+
+    The key of a course includes its current generation, so that urls resolved
+    before an invalidation, and stored after it, are never read.  Both keys
+    include the version of the static files, so that the hashed urls of the
+    static files of a previous deployment are never read either.
+    """
+    if course_id is not None:
+        return 'static_replace.static_urls.course.{}.{}.{}'.format(
+            course_id, _static_urls_generation(course_id), _static_files_version()
+        )
+    return f'static_replace.static_urls.directory.{directory}.{_static_files_version()}'
+
+
+def invalidate_static_urls(course_id):
+    """
+    Invalidates the urls resolved for the static urls of the given course, for
+    instance because its assets have changed, by starting a new generation of
+    them.
     """
+    cache.set(_static_urls_generation_cache_key(course_id), uuid4().hex, None)
 
-    if static_paths_out is None:
-        static_paths_out = []
 
-    def replace_static_url(original, prefix, quote, rest):
+class StaticUrlRewriter:
+    """
+    Rewrites the static urls of the fragments of a course, as
+    replace_static_urls does.
+
+    Resolving a static url looks it up in staticfiles_storage and, for course
+    assets, in the contentstore.  The urls resolved for a course are therefore
+    cached, and shared by every fragment of the course, until the course is
+    published or its assets change, or the static files are collected again.
+    """
+    # Beyond this number of urls, the urls of a course are resolved but not
+    # cached, to bound the size of the cached value.
+    MAX_CACHED_URLS = 2000
+
+    def __init__(self, data_directory=None, course_id=None, static_asset_path=''):
+        self.data_directory = data_directory
+        self.course_id = course_id
+        self.static_asset_path = static_asset_path
+        # With a MongoBacked store, course_id is not None, and static urls are
+        # served as studio style urls.
+        self.uses_course_assets = bool((not static_asset_path) and course_id)
+
+    def rewrite(self, text, static_paths_out=None):
         """
-        Replace a single matched url.
+        Returns the given text with its static urls replaced, in a single scan
+        of the text, reading and writing the cached urls of the course at most
+        once.
+
+        static_paths_out: (optional) list to which a tuple of the original and
+          the updated static url is appended for each static url found.
         """
-        original_uri = "".join([prefix, rest])
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
-            static_paths_out.append((original_uri, original_uri))
-            return original
+        if static_paths_out is None:
+            static_paths_out = []
+
+        # The cached urls, and the asset configuration they were resolved with,
+        # are only loaded once the text is known to contain a static url.  They
+        # are stored back under the key they were loaded from, so that urls
+        # invalidated meanwhile are stored under a generation no longer read.
+        cache_key = None
+        config = None
+        urls = None
+        changed = False
+
+        def replace_static_url(original, prefix, quote, rest):
+            """
+            Replace a single matched url.
+            """
+            nonlocal cache_key, config, urls, changed
+            original_uri = "".join([prefix, rest])
+            # Don't mess with things that end in '?raw'
+            if rest.endswith('?raw'):
+                static_paths_out.append((original_uri, original_uri))
+                return original
+
+            # In debug mode, if we can find the url as is,
+            if settings.DEBUG and finders.find(rest, True):
+                static_paths_out.append((original_uri, original_uri))
+                return original
+
+            if urls is None:
+                cache_key, config, urls = self._load_urls()
+            url = urls.get(original_uri)
+            if url is None:
+                url, cacheable = self._resolve_url(prefix, rest, config)
+                if cacheable and len(urls) < self.MAX_CACHED_URLS:
+                    urls[original_uri] = url
+                    changed = True
+
+            static_paths_out.append((original_uri, url))
+            return "".join([quote, url, quote])
+
+        text = process_static_urls(
+            text, replace_static_url, data_dir=self.static_asset_path or self.data_directory
+        )
+        if changed:
+            cache.set(cache_key, {'config': config, 'urls': urls}, STATIC_URLS_CACHE_TIMEOUT)
+        return text
+
+    def _load_urls(self):
+        """
+        Returns the current cache key of the urls of the course, its asset
+        configuration, and the urls cached for its static urls, unless they
+        were resolved with another configuration.
+        """
+        config = None
+        if self.uses_course_assets:
+            # Import is placed here to avoid model import at project startup.
+            from common.djangoapps.static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
+            config = (AssetBaseUrlConfig.get_base_url(), AssetExcludedExtensionsConfig.get_excluded_extensions())
+            cache_key = _static_urls_cache_key(course_id=self.course_id)
+        else:
+            cache_key = _static_urls_cache_key(directory=self.static_asset_path or self.data_directory)
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            static_paths_out.append((original_uri, original_uri))
-            return original
+        cached = cache.get(cache_key)
+        if cached is None or cached['config'] != config:
+            return cache_key, config, {}
+        return cache_key, config, cached['urls']
 
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id:
+    def _resolve_url(self, prefix, rest, config):
+        """
+        Returns the url of the given static url, and whether it can be cached,
+        which it cannot if it was resolved despite an error.
+        """
+        if self.uses_course_assets:
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
+            cacheable = True
             exists_in_staticfiles_storage = False
             try:
                 exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
             except Exception as err:  # lint-amnesty, pylint: disable=broad-except
                 log.warning("staticfiles_storage couldn't find path {}: {}".format(
                     rest, str(err)))
+                cacheable = False
 
             if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                # Import is placed here to avoid model import at project startup.
-                from common.djangoapps.static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
-
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
+                return staticfiles_storage.url(rest), cacheable
+
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            base_url, excluded_exts = config
+            url = StaticContent.get_canonicalized_asset_path(self.course_id, rest, base_url, excluded_exts)
+
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+            return url, cacheable
 
         # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
+        course_path = "/".join((self.static_asset_path or self.data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
+                return staticfiles_storage.url(rest), True
+            return staticfiles_storage.url(course_path), True
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:  # lint-amnesty, pylint: disable=broad-except
+            log.warning("staticfiles_storage couldn't find path {}: {}".format(
+                rest, str(err)))
+            return "".join([prefix, course_path]), False
 
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:  # lint-amnesty, pylint: disable=broad-except
-                log.warning("staticfiles_storage couldn't find path {}: {}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
 
-        static_paths_out.append((original_uri, url))
-        return "".join([quote, url, quote])
+def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path='', static_paths_out=None):
+    """
+    Replace /static/$stuff urls either with their correct url as generated by collectstatic,
+    (/static/$md5_hashed_stuff) or by the course-specific content static url
+    /static/$course_data_dir/$stuff, or, if course_namespace is not None, by the
+    correct url in the contentstore (/c4x/.. or /asset-loc:..)
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    text: The source text to do the substitution in
+    data_directory: The directory in which course data is stored
+    course_id: The course identifier used to distinguish static content for this course in studio
+    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+    static_paths_out: (optional) pass an array to collect tuples for each static URI found:
+      * the original unmodified static URI
+      * the updated static URI (will match the original if unchanged)
+    """
+    rewriter = StaticUrlRewriter(data_directory, course_id, static_asset_path)
+    return rewriter.rewrite(text, static_paths_out)
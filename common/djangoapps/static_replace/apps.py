@@ -0,0 +1,17 @@
+"""
+Django App config for static_replace
+"""
+
+
+from django.apps import AppConfig
+
+
+class StaticReplaceConfig(AppConfig):
+    """
+    Configuration class for the static_replace Django app.
+    """
+    name = 'common.djangoapps.static_replace'
+    verbose_name = "Static Replace"
+
+    def ready(self):
+        from . import signals  # pylint: disable=unused-import
@@ -0,0 +1,28 @@
+"""
+Signal handlers invalidating the cached urls of the static urls of courses.
+"""
+
+
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+from . import invalidate_static_urls
+
+
+@receiver(SignalHandler.course_published)
+def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Catches the signal that a course has been published in Studio and
+    invalidates the urls cached for its static urls.
+    """
+    invalidate_static_urls(course_key)
+
+
+@receiver(SignalHandler.course_deleted)
+def _listen_for_course_delete(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Catches the signal that a course has been deleted and invalidates the
+    urls cached for its static urls.
+    """
+    invalidate_static_urls(course_key)
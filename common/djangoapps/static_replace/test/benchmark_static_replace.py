@@ -0,0 +1,71 @@
+"""
+Benchmark of replace_static_urls on a large HTML fragment of a course, such
+as a unit page with hundreds of assets. Reports the number of
+staticfiles_storage and contentstore lookups and the wall time of rewriting
+the fragment with empty caches, and with the urls of the course cached.
+
+Lookups are made slower than they are in tests, as they are in production,
+where they go to the storage backend and to MongoDB.
+
+Usage:
+    pytest common/djangoapps/static_replace/test/benchmark_static_replace.py -s
+"""
+
+
+import time
+import timeit
+from unittest.mock import patch
+
+from opaque_keys.edx.keys import CourseKey
+
+from common.djangoapps.static_replace import invalidate_static_urls, replace_static_urls
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+
+COURSE_KEY = CourseKey.from_string('course-v1:OpenEdX+StaticReplace+Benchmark')
+NUM_ASSETS = 300
+LOOKUP_LATENCY = 0.0005
+
+
+def _slow(value):
+    """
+    Returns a function returning the given value after the lookup latency.
+    """
+    def lookup(*args, **kwargs):  # pylint: disable=unused-argument
+        time.sleep(LOOKUP_LATENCY)
+        return value(*args) if callable(value) else value
+    return lookup
+
+
+class StaticReplaceBenchmark(CacheIsolationTestCase):
+    """
+    Benchmarks rewriting the static urls of a large fragment.
+    """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super().setUp()
+        # Every asset is referenced twice, as thumbnails and links usually are.
+        self.text = ''.join(
+            '<p>Figure {index}</p><a href="/static/figure_{index}.pdf"><img src="/static/figure_{index}.png"/></a>'
+            '<img src="/static/figure_{index}.png"/>'.format(index=index)
+            for index in range(NUM_ASSETS)
+        )
+
+    @patch('common.djangoapps.static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions')
+    @patch('common.djangoapps.static_replace.models.AssetBaseUrlConfig.get_base_url')
+    @patch('common.djangoapps.static_replace.StaticContent.get_canonicalized_asset_path')
+    @patch('common.djangoapps.static_replace.staticfiles_storage')
+    def test_benchmark(self, mock_storage, mock_asset_path, mock_base_url, mock_excluded_exts):
+        mock_storage.exists.side_effect = _slow(False)
+        mock_asset_path.side_effect = _slow(lambda course_key, path, *args: f'/asset-v1:{course_key}/{path}')
+        mock_base_url.return_value = ''
+        mock_excluded_exts.return_value = ['.html']
+
+        invalidate_static_urls(COURSE_KEY)
+        for name in ('cold', 'warm'):
+            mock_storage.exists.reset_mock()
+            mock_asset_path.reset_mock()
+            wall_time = timeit.timeit(lambda: replace_static_urls(self.text, course_id=COURSE_KEY), number=1)
+            print('{:<4}: {:>4} storage lookups, {:>4} asset lookups, {:.3f}s'.format(
+                name, mock_storage.exists.call_count, mock_asset_path.call_count, wall_time,
+            ))
@@ -14,6 +14,7 @@ from PIL import Image
 
 from common.djangoapps.static_replace import (
     _url_replace_regex,
+    invalidate_static_urls,
     make_static_urls_absolute,
     process_static_urls,
     replace_course_urls,
@@ -23,7 +24,9 @@ from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent
 from xmodule.contentstore.django import contentstore
 from xmodule.exceptions import NotFoundError
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.mongo import MongoModuleStore
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
@@ -250,6 +253,103 @@ def test_static_url_with_xblock_resource_on_cdn(mock_modulestore, mock_storage):
     assert replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY) == post_text
 
 
+@patch('common.djangoapps.static_replace.staticfiles_storage', autospec=True)
+class CachedStaticUrlsTest(CacheIsolationTestCase):
+    """
+    Tests the caching of the urls resolved for static urls.
+    """
+    ENABLED_CACHES = ['default']
+
+    TEXT = '<img src="/static/file.png"/><img src="/static/file.png"/><a href="/static/other.pdf">'
+
+    def test_data_directory_urls_cached(self, mock_storage):
+        mock_storage.exists.return_value = False
+        mock_storage.url.side_effect = lambda path: '/hashed/' + path
+        expected = '<img src="/hashed/data_dir/file.png"/><img src="/hashed/data_dir/file.png"/>' \
+                   '<a href="/hashed/data_dir/other.pdf">'
+
+        assert replace_static_urls(self.TEXT, DATA_DIRECTORY) == expected
+        assert mock_storage.exists.call_count == 2
+
+        static_paths = []
+        assert replace_static_urls(self.TEXT, DATA_DIRECTORY, static_paths_out=static_paths) == expected
+        assert mock_storage.exists.call_count == 2
+        assert static_paths == [
+            ('/static/file.png', '/hashed/data_dir/file.png'),
+            ('/static/file.png', '/hashed/data_dir/file.png'),
+            ('/static/other.pdf', '/hashed/data_dir/other.pdf'),
+        ]
+
+    def test_failed_lookups_not_cached(self, mock_storage):
+        mock_storage.exists.side_effect = Exception
+
+        for _ in range(2):
+            assert replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY) == '"/static/data_dir/file.png"'
+        assert mock_storage.exists.call_count == 2
+
+    @patch('common.djangoapps.static_replace.StaticContent', autospec=True)
+    @patch('common.djangoapps.static_replace.models.AssetBaseUrlConfig.get_base_url')
+    @patch('common.djangoapps.static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions')
+    def test_course_urls_cached(self, mock_get_excluded_extensions, mock_get_base_url, mock_static_content, mock_storage):
+        mock_storage.exists.return_value = False
+        mock_static_content.get_canonicalized_asset_path.side_effect = lambda course_key, path, *args: '/c4x/' + path
+        mock_get_base_url.return_value = ''
+        mock_get_excluded_extensions.return_value = ['foobar']
+        expected = '<img src="/c4x/file.png"/><img src="/c4x/file.png"/><a href="/c4x/other.pdf">'
+
+        assert replace_static_urls(self.TEXT, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+        assert mock_static_content.get_canonicalized_asset_path.call_count == 2
+        # The asset configuration is read once per text, not once per url.
+        assert mock_get_base_url.call_count == 1
+
+        assert replace_static_urls(self.TEXT, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+        assert mock_static_content.get_canonicalized_asset_path.call_count == 2
+
+        # Urls resolved with another asset configuration are not used.
+        mock_get_base_url.return_value = 'cdn'
+        assert replace_static_urls(self.TEXT, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+        assert mock_static_content.get_canonicalized_asset_path.call_count == 4
+
+        invalidate_static_urls(COURSE_KEY)
+        assert replace_static_urls(self.TEXT, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+        assert mock_static_content.get_canonicalized_asset_path.call_count == 6
+
+        SignalHandler.course_published.send(sender=None, course_key=COURSE_KEY)
+        assert replace_static_urls(self.TEXT, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+        assert mock_static_content.get_canonicalized_asset_path.call_count == 8
+
+    @patch('common.djangoapps.static_replace.StaticContent', autospec=True)
+    @patch('common.djangoapps.static_replace.models.AssetBaseUrlConfig.get_base_url', return_value='')
+    @patch('common.djangoapps.static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions')
+    def test_course_urls_invalidated_while_resolved(
+        self, _mock_excluded, _mock_base_url, mock_static_content, mock_storage
+    ):
+        mock_storage.exists.return_value = False
+
+        def get_canonicalized_asset_path(course_key, path, *args):
+            # The assets of the course change while its urls are resolved.
+            invalidate_static_urls(course_key)
+            return '/c4x/' + path
+
+        mock_static_content.get_canonicalized_asset_path.side_effect = get_canonicalized_asset_path
+        replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, course_id=COURSE_KEY)
+        replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, course_id=COURSE_KEY)
+        assert mock_static_content.get_canonicalized_asset_path.call_count == 2
+
+    def test_urls_of_other_static_files_not_used(self, mock_storage):
+        mock_storage.exists.return_value = False
+        mock_storage.url.side_effect = lambda path: '/hashed/' + path
+
+        replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY)
+        replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY)
+        assert mock_storage.exists.call_count == 1
+
+        # The static files are collected again by a new deployment.
+        with patch('common.djangoapps.static_replace._static_files_version', return_value='new'):
+            replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY)
+        assert mock_storage.exists.call_count == 2
+
+
 @ddt.ddt
 class CanonicalContentTest(SharedModuleStoreTestCase):
     """
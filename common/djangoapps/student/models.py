@@ -2305,6 +2305,12 @@ class CourseEnrollment(models.Model):
             enrollment_state = CourseEnrollmentState(record.mode, record.is_active)
             cls._update_enrollment(cache, record.user.id, course_key, enrollment_state)
 
+        # Also remember that the other users are not enrolled, so that looking
+        # up their enrollment state does not query for it again.
+        for user in users:
+            if (user.id, course_key) not in cache:
+                cls._update_enrollment(cache, user.id, course_key, CourseEnrollmentState(None, None))
+
     @classmethod
     def _get_mode_active_request_cache(cls):
         """
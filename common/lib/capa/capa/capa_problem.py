@@ -14,9 +14,11 @@ This is used by capa_module.
 """
 
 
+import hashlib
 import logging
 import os.path
 import re
+import threading
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
@@ -32,7 +34,7 @@ import capa.inputtypes as inputtypes
 import capa.responsetypes as responsetypes
 import capa.xqueue_interface as xqueue_interface
 from capa.correctmap import CorrectMap
-from capa.safe_exec import safe_exec
+from capa.safe_exec import safe_exec, safe_exec_batch
 from capa.util import contextualize_text, convert_files_to_filenames, get_course_id_from_capa_module
 from openedx.core.djangolib.markup import HTML, Text
 from openedx.core.lib.edx_six import get_gettext
@@ -76,6 +78,69 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# maximum number of parsed problem trees kept by each process
+PARSED_PROBLEM_CACHE_SIZE = 256
+
+
+class ParsedProblemCache(object):
+    """
+    Process-local, size-bounded LRU cache of parsed problem XML trees.
+
+    Parsing a problem, adjusting its XML for compatibility and inserting its
+    <include> files only depends on the problem text and the course filestore,
+    which are the same for every learner of a version of the problem.  The
+    cached trees are keyed by a digest of both, and are never handed out:
+    callers get a copy of them, which they are free to modify in-place.
+    """
+    def __init__(self, max_size=PARSED_PROBLEM_CACHE_SIZE):
+        self.max_size = max_size
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(problem_text, filestore_root=None):
+        """
+        Returns the cache key of the given (utf-8 encoded) problem text, read
+        from the filestore at the given root.
+        """
+        digest = hashlib.sha1(problem_text)
+        if filestore_root is not None:
+            digest.update(b'\0' + filestore_root.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Returns a copy of the tree cached for the given key, or None.
+        """
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is None:
+                return None
+            self._trees.move_to_end(key)
+        return deepcopy(tree)
+
+    def set(self, key, tree):
+        """
+        Caches the given tree for the given key, evicting the least recently
+        used trees beyond the size of the cache.  The tree is not copied, so
+        callers must not modify it afterwards.
+        """
+        with self._lock:
+            self._trees[key] = tree
+            self._trees.move_to_end(key)
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self._lock:
+            self._trees.clear()
+
+
+PARSED_PROBLEM_CACHE = ParsedProblemCache()
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -183,26 +248,9 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        if isinstance(problem_text, six.text_type):
-            # etree chokes on Unicode XML with an encoding declaration
-            problem_text = problem_text.encode('utf-8')
-        self.tree = etree.XML(problem_text)
-
-        try:
-            self.make_xml_compatible(self.tree)
-        except Exception:
-            capa_module = self.capa_module
-            log.exception(
-                "CAPAProblemError: %s, id:%s, data: %s",
-                capa_module.display_name,
-                self.problem_id,
-                capa_module.data
-            )
-            raise
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, handling any
+        # <include file="foo"> tags
+        self.tree = self._parse_problem_text(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -235,6 +283,45 @@ class LoncapaProblem(object):
             if extract_tree:
                 self.extracted_tree = self._extract_html(self.tree)
 
+    def _parse_problem_text(self, problem_text):
+        """
+        Returns the element tree of the given problem text, adjusted for
+        compatibility by make_xml_compatible, with its <include> files inserted.
+
+        The tree only depends on the problem text and the course filestore, so
+        it is built once per process, problem text and filestore, and copied
+        out of PARSED_PROBLEM_CACHE for every other instance.  Trees whose
+        includes could not all be inserted, or read from a filestore without a
+        root path, are not cached.
+        """
+        if isinstance(problem_text, six.text_type):
+            # etree chokes on Unicode XML with an encoding declaration
+            problem_text = problem_text.encode('utf-8')
+
+        filestore_root = getattr(self.capa_system.filestore, 'root_path', None)
+        cache_key = PARSED_PROBLEM_CACHE.key(problem_text, filestore_root)
+        tree = PARSED_PROBLEM_CACHE.get(cache_key)
+        if tree is not None:
+            return tree
+
+        tree = etree.XML(problem_text)
+        try:
+            self.make_xml_compatible(tree)
+        except Exception:
+            capa_module = self.capa_module
+            log.exception(
+                "CAPAProblemError: %s, id:%s, data: %s",
+                capa_module.display_name,
+                self.problem_id,
+                capa_module.data
+            )
+            raise
+
+        has_includes = tree.find('.//include') is not None
+        if self._process_includes(tree) and (filestore_root is not None or not has_includes):
+            PARSED_PROBLEM_CACHE.set(cache_key, deepcopy(tree))
+        return tree
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -320,6 +407,35 @@ class LoncapaProblem(object):
     def __str__(self):
         return "LoncapaProblem ({0})".format(self.problem_id)
 
+    def prime_context_cache(self, seeds_and_anonymous_student_ids):
+        """
+        Executes the script code of this problem for each of the given
+        (seed, anonymous_student_id) pairs, in as few sandboxes as possible,
+        and caches the resulting contexts.
+
+        Constructing the problem of one of those learners then reads its
+        context from the cache instead of executing the script code in a
+        sandbox of its own.  Does nothing if the problem has no script code,
+        or if there is no cache to store the contexts in.
+        """
+        all_code = self.context.get('script_code')
+        if not all_code or not self.capa_system.cache:
+            return
+
+        jobs = [
+            (all_code, {'seed': seed, 'anonymous_student_id': anonymous_student_id}, seed)
+            for seed, anonymous_student_id in seeds_and_anonymous_student_ids
+        ]
+        safe_exec_batch(
+            jobs,
+            python_path=self.context['python_path'],
+            extra_files=self.context['extra_files'],
+            cache=self.capa_system.cache,
+            limit_overrides_context=get_course_id_from_capa_module(self.capa_module),
+            slug=self.problem_id,
+            unsafely=self.capa_system.can_execute_unsafe_code(),
+        )
+
     def get_state(self):
         """
         Stored per-user session data neeeded to:
@@ -804,12 +920,15 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
-    def _process_includes(self):
+    def _process_includes(self, tree):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
-        into our XML tree.  Fail gracefully if debugging.
+        into the given XML tree.  Fail gracefully if debugging.
+
+        Returns whether every include was inserted.
         """
-        includes = self.tree.findall('.//include')
+        included_all = True
+        includes = tree.findall('.//include')
         for inc in includes:
             filename = inc.get('file') if six.PY3 else inc.get('file').decode('utf-8')
             if filename is not None:
@@ -830,6 +949,7 @@ class LoncapaProblem(object):
                     if not self.capa_system.DEBUG:  # lint-amnesty, pylint: disable=no-else-raise
                         raise
                     else:
+                        included_all = False
                         continue
                 try:
                     # read in and convert to XML
@@ -846,6 +966,7 @@ class LoncapaProblem(object):
                     if not self.capa_system.DEBUG:  # lint-amnesty, pylint: disable=no-else-raise
                         raise
                     else:
+                        included_all = False
                         continue
 
                 # insert new XML into tree in place of include
@@ -853,6 +974,7 @@ class LoncapaProblem(object):
                 parent.insert(parent.index(inc), incxml)
                 parent.remove(inc)
                 log.debug('Included %s into %s', filename, self.problem_id)
+        return included_all
 
     def _extract_system_path(self, script):
         """
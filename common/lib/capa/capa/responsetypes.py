@@ -61,6 +61,7 @@ from .util import (
     get_inner_html_from_xpath,
     is_list_of_files
 )
+from .vectorized_calc import evaluate_samples
 
 log = logging.getLogger(__name__)
 
@@ -3094,6 +3095,12 @@ class FormulaResponse(LoncapaResponse):
         """
         _ = edx_six.get_gettext(self.capa_system.i18n)
 
+        # Evaluate the answer over all the samples at once if possible, or else
+        # one sample at a time, which also reports any error in the answer.
+        out = evaluate_samples(answer, var_dict_list, case_sensitive=self.case_sensitive)
+        if out is not None:
+            return out
+
         out = []
         for var_dict in var_dict_list:
             try:
@@ -2,6 +2,7 @@
 
 
 import hashlib
+import logging
 
 from codejail.safe_exec import SafeExecException, json_safe
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
@@ -12,6 +13,9 @@ from six import text_type
 
 from . import lazymod
 from .remote_exec import is_codejail_rest_service_enabled, get_remote_exec
+from .worker_pool import CLEAN_GLOBALS_CODE, NoIdleWorkerError, get_worker_pool, is_worker_pool_enabled
+
+log = logging.getLogger(__name__)
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -57,6 +61,57 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# Maximum number of executions run by safe_exec_batch in a single sandbox.
+# The sandbox limits apply to the whole batch, so this must stay small
+# enough for a batch to fit in them.
+SAFE_EXEC_BATCH_SIZE = 20
+
+# Code run in the sandbox by safe_exec_batch.  It executes each job of
+# `safe_exec_jobs` in a forked child process, with its own globals, so that
+# the modules it imports or patches, like `random`, do not leak into the
+# following jobs.  It stores in `safe_exec_results` the error message of each
+# job, or the globals it produced, cleaned the same way codejail cleans the
+# globals it sends back.
+BATCH_CODE = CLEAN_GLOBALS_CODE + """\
+import os as _os
+import traceback as _traceback
+
+def _run_job(code, globals_dict):
+    try:
+        exec(compile(code, "jailed_code", "exec"), globals_dict)
+    except Exception:  # pylint: disable=broad-except
+        return "Couldn't execute jailed code: " + _traceback.format_exc(), None
+    return None, _clean_globals(globals_dict)
+
+def _run_job_in_child(code, globals_dict):
+    read_fd, write_fd = _os.pipe()
+    try:
+        pid = _os.fork()
+    except OSError:
+        _os.close(read_fd)
+        _os.close(write_fd)
+        return "Couldn't fork to execute jailed code: " + _traceback.format_exc(), None
+    if pid == 0:
+        _os.close(read_fd)
+        try:
+            with _os.fdopen(write_fd, "wb") as _pipe:
+                _pipe.write(_json.dumps(_run_job(code, globals_dict)).encode("utf-8"))
+        finally:
+            _os._exit(0)
+    _os.close(write_fd)
+    with _os.fdopen(read_fd, "rb") as _pipe:
+        output = _pipe.read()
+    _os.waitpid(pid, 0)
+    if not output:
+        return "Jailed code exited without results", None
+    return tuple(_json.loads(output.decode("utf-8")))
+
+safe_exec_results = [
+    _run_job_in_child(_code, _globals_dict) for _code, _globals_dict in safe_exec_jobs
+]
+del safe_exec_jobs
+"""
+
 
 def update_hash(hasher, obj):
     """
@@ -126,11 +181,7 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code).encode('utf-8'))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        key = _cache_key(code, globals_dict, random_seed)
         cached = cache.get(key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
@@ -141,52 +192,194 @@ def safe_exec(
                 raise SafeExecException(emsg)
             return
 
-    # Create the complete code we'll run.
-    code_prolog = CODE_PROLOG % random_seed
+    # Run the code!  Results are side effects in globals_dict.
+    emsg, exception = _exec(
+        _full_code(code, random_seed),
+        globals_dict,
+        python_path=python_path,
+        extra_files=extra_files,
+        limit_overrides_context=limit_overrides_context,
+        slug=slug,
+        unsafely=unsafely,
+    )
 
-    if is_codejail_rest_service_enabled():
-        data = {
-            "code": code_prolog + LAZY_IMPORTS + code,
-            "globals_dict": globals_dict,
-            "python_path": python_path,
-            "limit_overrides_context": limit_overrides_context,
-            "slug": slug,
-            "unsafely": unsafely,
-            "extra_files": extra_files,
-        }
+    # Put the result back in the cache.  This is complicated by the fact that
+    # the globals dict might not be entirely serializable.
+    if cache:
+        cleaned_results = json_safe(globals_dict)
+        cache.set(key, (emsg, cleaned_results))
 
-        emsg, exception = get_remote_exec(data)
+    # If an exception happened, raise it now.
+    if emsg:
+        raise exception
 
-    else:
-        # Decide which code executor to use.
-        if unsafely:
-            exec_fn = codejail_not_safe_exec
+
+@function_trace('safe_exec_batch')
+def safe_exec_batch(
+    jobs,
+    python_path=None,
+    extra_files=None,
+    cache=None,
+    limit_overrides_context=None,
+    slug=None,
+    unsafely=False,
+):
+    """
+    Execute many pieces of python code safely, in as few sandboxes as possible.
+
+    `jobs` is a list of (code, globals_dict, random_seed) tuples, each of which
+    is executed as `safe_exec(code, globals_dict, random_seed=random_seed, ...)`
+    would, sharing the other arguments, which have the same meaning as for
+    `safe_exec`.  Results are side effects in each globals_dict.
+
+    Jobs are run SAFE_EXEC_BATCH_SIZE at a time in a single sandbox, instead of
+    one sandbox each, so that the sandbox startup is paid once per batch.  Each
+    job runs in a process of its own, forked in the sandbox, so that it cannot
+    affect the other jobs of its batch.  Results are read from and stored in
+    `cache` under the same keys as `safe_exec`, so that a later `safe_exec` of
+    one of the jobs is served from the cache.  Jobs which fail in a batch, and
+    the jobs of a batch which fails as a whole, for instance because it
+    exceeds the sandbox limits, are run again one by one with `safe_exec`.
+
+    Returns a list with, for each job, the exception its code raised, or None.
+    Unlike `safe_exec`, the exceptions are not raised.
+    """
+    errors = [None] * len(jobs)
+    pending = []
+    for index, (code, globals_dict, random_seed) in enumerate(jobs):
+        key = _cache_key(code, globals_dict, random_seed) if cache else None
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            emsg, cleaned_results = cached
+            globals_dict.update(cleaned_results)
+            if emsg:
+                errors[index] = SafeExecException(emsg)
         else:
-            exec_fn = codejail_safe_exec
+            pending.append((index, key))
+
+    failed = []
+    for start in range(0, len(pending), SAFE_EXEC_BATCH_SIZE):
+        batch = pending[start:start + SAFE_EXEC_BATCH_SIZE]
+        batch_globals = {
+            'safe_exec_jobs': [
+                (_full_code(jobs[index][0], jobs[index][2]), json_safe(jobs[index][1]))
+                for index, _ in batch
+            ],
+        }
+        batch_emsg, _ = _exec(
+            BATCH_CODE,
+            batch_globals,
+            python_path=python_path,
+            extra_files=extra_files,
+            limit_overrides_context=limit_overrides_context,
+            slug=slug,
+            unsafely=unsafely,
+        )
+        results = batch_globals.get('safe_exec_results')
+        if batch_emsg or results is None or len(results) != len(batch):
+            log.warning(
+                "Batched safe_exec of %d jobs failed for %s, running them one by one: %s",
+                len(batch), slug, batch_emsg,
+            )
+            failed.extend(index for index, _ in batch)
+            continue
 
-        # Run the code!  Results are side effects in globals_dict.
+        for (index, key), (emsg, cleaned_results) in zip(batch, results):
+            if emsg:
+                failed.append(index)
+                continue
+            globals_dict = jobs[index][1]
+            globals_dict.update(cleaned_results)
+            if cache:
+                cache.set(key, (None, json_safe(globals_dict)))
+
+    for index in failed:
+        code, globals_dict, random_seed = jobs[index]
         try:
-            exec_fn(
-                code_prolog + LAZY_IMPORTS + code,
+            safe_exec(
+                code,
                 globals_dict,
+                random_seed=random_seed,
                 python_path=python_path,
                 extra_files=extra_files,
+                cache=cache,
                 limit_overrides_context=limit_overrides_context,
                 slug=slug,
+                unsafely=unsafely,
             )
         except SafeExecException as e:
-            # Saving SafeExecException e in exception to be used later.
-            exception = e
-            emsg = text_type(e)
-        else:
-            emsg = None
+            errors[index] = e
 
-    # Put the result back in the cache.  This is complicated by the fact that
-    # the globals dict might not be entirely serializable.
-    if cache:
-        cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+    return errors
 
-    # If an exception happened, raise it now.
-    if emsg:
-        raise exception
+
+def _cache_key(code, globals_dict, random_seed):
+    """
+    Returns the key caching the execution of the given code with the given
+    globals and random seed.
+    """
+    safe_globals = json_safe(globals_dict)
+    md5er = hashlib.md5()
+    md5er.update(repr(code).encode('utf-8'))
+    update_hash(md5er, safe_globals)
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+def _full_code(code, random_seed):
+    """
+    Returns the complete code to run for the given code and random seed.
+    """
+    return CODE_PROLOG % random_seed + LAZY_IMPORTS + code
+
+
+def _exec(code, globals_dict, python_path, extra_files, limit_overrides_context, slug, unsafely):
+    """
+    Executes the given complete code, either with the codejail service, the
+    codejail worker pool or codejail, and returns the error message and the
+    exception of the execution, or (None, None) if it succeeded.
+    """
+    if is_codejail_rest_service_enabled():
+        data = {
+            "code": code,
+            "globals_dict": globals_dict,
+            "python_path": python_path,
+            "limit_overrides_context": limit_overrides_context,
+            "slug": slug,
+            "unsafely": unsafely,
+            "extra_files": extra_files,
+        }
+        return get_remote_exec(data)
+
+    if not unsafely and is_worker_pool_enabled():
+        pool = get_worker_pool()
+        if pool is not None:
+            try:
+                return pool.execute(
+                    code,
+                    globals_dict,
+                    python_path=python_path,
+                    extra_files=extra_files,
+                    limit_overrides_context=limit_overrides_context,
+                    slug=slug,
+                )
+            except NoIdleWorkerError as err:
+                log.info("Executing %s with codejail: %s", slug, err)
+
+    # Decide which code executor to use.
+    if unsafely:
+        exec_fn = codejail_not_safe_exec
+    else:
+        exec_fn = codejail_safe_exec
+
+    try:
+        exec_fn(
+            code,
+            globals_dict,
+            python_path=python_path,
+            extra_files=extra_files,
+            limit_overrides_context=limit_overrides_context,
+            slug=slug,
+        )
+    except SafeExecException as e:
+        return text_type(e), e
+    return None, None
@@ -19,7 +19,7 @@ from django.test import override_settings
 from six import text_type, unichr
 from six.moves import range
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, safe_exec_batch, update_hash
 
 
 class TestSafeExec(unittest.TestCase):  # lint-amnesty, pylint: disable=missing-class-docstring
@@ -260,6 +260,59 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecBatch(unittest.TestCase):
+    """Tests of safe_exec_batch."""
+
+    code = "a = random.randint(0, 1000000) + seed"
+
+    def test_same_results_as_safe_exec(self):
+        jobs = [(self.code, {'seed': seed}, seed) for seed in range(25)]
+        assert safe_exec_batch(jobs) == [None] * 25
+
+        for code, globals_dict, seed in jobs:
+            g = {'seed': seed}
+            safe_exec(code, g, random_seed=seed)
+            assert globals_dict == g
+
+    def test_exceptions(self):
+        jobs = [("a = 1/0", {}, 1), ("a = 17", {}, 1)]
+        errors = safe_exec_batch(jobs)
+        assert isinstance(errors[0], SafeExecException)
+        assert 'ZeroDivisionError' in text_type(errors[0])
+        assert errors[1] is None
+        assert jobs[0][1] == {}
+        assert jobs[1][1] == {'a': 17}
+
+    def test_jobs_isolated(self):
+        jobs = [
+            ("import math\nmath.pi = 3", {}, 1),
+            ("import math\na = math.pi", {}, 1),
+        ]
+        assert safe_exec_batch(jobs) == [None, None]
+        assert jobs[1][1]['a'] == pytest.approx(3.14159, rel=1e-5)
+
+    def test_shares_cache_with_safe_exec(self):
+        cache = {}
+        jobs = [(self.code, {'seed': seed}, seed) for seed in range(3)] + [("1/0", {}, 1)]
+        safe_exec_batch(jobs, cache=DictCache(cache))
+        assert len(cache) == 4
+
+        # safe_exec reads the results cached by the batch.
+        g = {'seed': 2}
+        safe_exec(self.code, g, random_seed=2, cache=DictCache(cache))
+        assert g == jobs[2][1]
+        with pytest.raises(SafeExecException):
+            safe_exec("1/0", {}, random_seed=1, cache=DictCache(cache))
+        assert len(cache) == 4
+
+        # The batch reads the results cached by safe_exec.
+        for key in cache:
+            cache[key] = (None, {'a': 17})
+        jobs = [(self.code, {'seed': 1}, 1)]
+        safe_exec_batch(jobs, cache=DictCache(cache))
+        assert jobs[0][1] == {'seed': 1, 'a': 17}
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,107 @@
+"""
+Test the pool of codejail workers.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import pytest
+
+from capa.safe_exec.worker_pool import WORKER_CODE, CodejailWorkerPool, NoIdleWorkerError
+
+
+class TestCodejailWorkerPool(unittest.TestCase):
+    """
+    Tests of CodejailWorkerPool, with workers running the current Python
+    interpreter instead of a sandboxed one.
+    """
+    cmd = [sys.executable, '-c', WORKER_CODE, 'math']
+
+    def make_pool(self, size=1, wait_timeout=None, cmd=None):
+        """
+        Returns a new pool, stopped at the end of the test.
+        """
+        pool = CodejailWorkerPool(cmd or self.cmd, size=size, wait_timeout=wait_timeout)
+        self.addCleanup(pool.stop)
+        return pool
+
+    def test_execute(self):
+        pool = self.make_pool()
+        g = {'a': 2}
+        assert pool.execute("import math\nb = int(a * math.pi)\nc = math", g) == (None, None)
+        assert g == {'a': 2, 'b': 6}
+
+    def test_exceptions(self):
+        pool = self.make_pool()
+        g = {}
+        emsg, exception = pool.execute("a = 17\n1/0", g)
+        assert 'ZeroDivisionError' in emsg
+        assert str(exception) == emsg
+        assert not g
+
+    def test_extra_files_and_python_path(self):
+        pool = self.make_pool()
+        lib_dir = os.path.join(tempfile.mkdtemp(), 'pylib')
+        self.addCleanup(shutil.rmtree, os.path.dirname(lib_dir))
+        os.mkdir(lib_dir)
+        with open(os.path.join(lib_dir, 'constant.py'), 'w') as constant_file:
+            constant_file.write('THE_CONST = 23\n')
+
+        g = {}
+        emsg, _ = pool.execute(
+            "import constant, extra\na = constant.THE_CONST + extra.EXTRA",
+            g,
+            python_path=[lib_dir],
+            extra_files=[('extra.py', b'EXTRA = 1\n')],
+        )
+        assert emsg is None
+        assert g == {'a': 24}
+
+    def test_executions_do_not_share_state(self):
+        pool = self.make_pool()
+        g = {}
+        pool.execute("import math\nmath.answer = 42", g)
+        pool.execute("import math\na = getattr(math, 'answer', None)", g)
+        assert g == {'a': None}
+
+    def test_cpu_limit(self):
+        pool = self.make_pool()
+        emsg, _ = pool.execute("while True: pass", {})
+        assert emsg is not None
+        # The worker survives its child.
+        g = {}
+        assert pool.execute("a = 1", g) == (None, None)
+
+    def test_workers_execute_a_single_job(self):
+        pool = self.make_pool()
+        pids = set()
+        for _ in range(3):
+            worker = pool._idle.get()  # pylint: disable=protected-access
+            pids.add(worker.process.pid)
+            pool._idle.put(worker)  # pylint: disable=protected-access
+            pool.execute("a = 1", {})
+        assert len(pids) == 3
+
+    def test_no_idle_worker(self):
+        pool = self.make_pool(wait_timeout=0.1)
+        worker = pool._idle.get()  # pylint: disable=protected-access
+        self.addCleanup(worker.stop)
+        with pytest.raises(NoIdleWorkerError):
+            pool.execute("a = 1", {})
+
+    def test_worker_failing_to_start(self):
+        pool = self.make_pool(wait_timeout=0.1, cmd=['/nonexistent/python'])
+        with pytest.raises(NoIdleWorkerError):
+            pool.execute("a = 1", {})
+
+        # The missing worker is started by the next execution.
+        time.sleep(0.1)
+        pool.cmd = self.cmd
+        pool.wait_timeout = None
+        g = {}
+        assert pool.execute("a = 1", g) == (None, None)
+        assert g == {'a': 1}
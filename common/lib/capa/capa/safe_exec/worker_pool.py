@@ -0,0 +1,491 @@
+"""
+A pool of pre-warmed codejail worker processes.
+
+Executing code with codejail starts a new sandboxed Python interpreter each
+time, which then imports the modules of the code prolog, numpy and scipy in
+particular.  Instead, each worker of the pool is a sandboxed interpreter
+started, and importing those modules, ahead of its use.  It forks a child
+process which executes a single piece of code under the codejail resource
+limits, and is then stopped, so that no process which ran code is used for
+another execution.  A new worker is started in the background to take its
+place.
+
+When no worker becomes idle in time, the code is executed with codejail
+instead.
+
+The pool is used by safe_exec when ENABLE_CODEJAIL_WORKER_POOL is set.  It
+can also serve the codejail REST service hook, by setting
+CODE_JAIL_REST_SERVICE_REMOTE_EXEC to 'capa.safe_exec.worker_pool.pool_exec'.
+"""
+
+import json
+import logging
+import os
+import queue
+import select
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from django.conf import settings
+from edx_django_utils.monitoring import set_custom_attribute
+from edx_toggles.toggles import SettingToggle
+
+log = logging.getLogger(__name__)
+
+# .. toggle_name: ENABLE_CODEJAIL_WORKER_POOL
+# .. toggle_implementation: SettingToggle
+# .. toggle_default: False
+# .. toggle_description: Set this to True to execute sandboxed code in a pool of pre-warmed
+#   codejail worker processes, sized by CODE_JAIL_WORKER_POOL_SIZE, instead of starting a
+#   new sandboxed interpreter for each execution.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-18
+ENABLE_CODEJAIL_WORKER_POOL = SettingToggle(
+    "ENABLE_CODEJAIL_WORKER_POOL", default=False, module_name=__name__
+)
+
+# Format of the length prefixing each message exchanged with a worker.
+_LENGTH = struct.Struct('>I')
+
+# Extra time given to a worker to answer, on top of the REALTIME limit of
+# the execution, before the worker is considered stuck.
+_WORKER_GRACE_SECONDS = 5
+
+# Code defining `_clean_globals`, which returns the globals produced by
+# sandboxed code that can be sent back from the sandbox, the same way
+# codejail cleans the globals it sends back.
+CLEAN_GLOBALS_CODE = """\
+import json as _json
+
+_OK_TYPES = (type(None), int, float, bytes, str, list, tuple, dict)
+
+
+def _clean_globals(globals_dict):
+    results = {}
+    for name, value in globals_dict.items():
+        if name == "__builtins__" or not isinstance(value, _OK_TYPES):
+            continue
+        try:
+            _json.dumps(value)
+        except Exception:  # pylint: disable=broad-except
+            continue
+        results[name] = value
+    return results
+"""
+
+# Code run by each worker.  It imports the modules named by its arguments,
+# then reads a job from stdin, forks a child that executes the code of the
+# job in its directory, under its resource limits, and writes the error
+# message of the execution, or the cleaned globals it produced, back to the
+# worker, which sends them on stdout and exits.
+WORKER_CODE = CLEAN_GLOBALS_CODE + """\
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import struct
+import sys
+import time
+import traceback
+
+for _module in sys.argv[1:]:
+    try:
+        __import__(_module)
+    except ImportError:
+        pass
+
+_LENGTH = struct.Struct('>I')
+_INPUT = sys.stdin.buffer
+_OUTPUT = sys.stdout.buffer
+
+
+def read_message():
+    header = _INPUT.read(_LENGTH.size)
+    if len(header) < _LENGTH.size:
+        return None
+    return json.loads(_INPUT.read(_LENGTH.unpack(header)[0]).decode('utf-8'))
+
+
+def write_message(message):
+    data = json.dumps(message).encode('utf-8')
+    _OUTPUT.write(_LENGTH.pack(len(data)) + data)
+    _OUTPUT.flush()
+
+
+def run_child(job, write_fd):
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.chdir(job['cwd'])
+    os.environ['TMPDIR'] = 'tmp'
+    for name, value in job['rlimits']:
+        resource.setrlimit(getattr(resource, name), (value, value))
+    sys.path.extend(job['python_path'])
+    globals_dict = job['globals_dict']
+    try:
+        exec(compile(job['code'], 'jailed_code', 'exec'), globals_dict)
+        output = {'globals_dict': _clean_globals(globals_dict)}
+    except BaseException:
+        output = {'emsg': traceback.format_exc()}
+    with os.fdopen(write_fd, 'wb') as output_file:
+        output_file.write(json.dumps(output).encode('utf-8'))
+
+
+def run_job(job):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            run_child(job, write_fd)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+
+    chunks = []
+    deadline = time.time() + job['realtime'] if job['realtime'] else None
+    timed_out = False
+    while True:
+        remaining = deadline - time.time() if deadline else None
+        if (remaining is not None and remaining <= 0) or not select.select([read_fd], [], [], remaining)[0]:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    _, status = os.waitpid(pid, 0)
+    shutil.rmtree(os.path.join(job['cwd'], 'tmp'), ignore_errors=True)
+
+    if timed_out:
+        output = {'emsg': 'Execution exceeded the real time limit of %s seconds' % job['realtime']}
+    else:
+        try:
+            output = json.loads(b''.join(chunks).decode('utf-8'))
+        except ValueError:
+            output = {'emsg': 'Execution ended with status %s' % status}
+    return output
+
+
+_job = read_message()
+if _job is not None:
+    write_message(run_job(_job))
+"""
+
+# Resource limits of the codejail configuration, applied by the workers to
+# the processes executing code, and the resource they limit.
+_RLIMITS = (
+    ('CPU', 'RLIMIT_CPU'),
+    ('VMEM', 'RLIMIT_AS'),
+    ('FSIZE', 'RLIMIT_FSIZE'),
+    ('NPROC', 'RLIMIT_NPROC'),
+)
+
+
+class WorkerError(Exception):
+    """
+    Raised when a worker fails to execute a job.
+    """
+
+
+class NoIdleWorkerError(Exception):
+    """
+    Raised when no worker of a pool becomes idle in time to execute a job.
+    """
+
+
+class CodejailWorker:
+    """
+    A pre-warmed sandboxed interpreter, executing a single job sent to it.
+
+    `cmd` is the command line starting the interpreter with WORKER_CODE,
+    followed by the names of the modules for it to import.
+    """
+    def __init__(self, cmd):
+        self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={},
+        )
+
+    def execute(self, job, timeout):
+        """
+        Sends the given job to the worker, and returns its output.
+
+        Raises:
+            WorkerError if the worker does not answer within timeout seconds,
+            or at all if timeout is None.
+        """
+        data = json.dumps(job).encode('utf-8')
+        try:
+            self.process.stdin.write(_LENGTH.pack(len(data)) + data)
+            self.process.stdin.flush()
+        except OSError as err:
+            raise WorkerError(f'Unable to send a job to the worker: {err}') from err
+
+        deadline = time.monotonic() + timeout if timeout else None
+        length = _LENGTH.unpack(self._read(_LENGTH.size, deadline))[0]
+        return json.loads(self._read(length, deadline).decode('utf-8'))
+
+    def _read(self, size, deadline):
+        """
+        Returns the next size bytes of the output of the worker.
+        """
+        fd = self.process.stdout.fileno()
+        chunks = []
+        while size:
+            remaining = deadline - time.monotonic() if deadline else None
+            if (remaining is not None and remaining <= 0) or not select.select([fd], [], [], remaining)[0]:
+                raise WorkerError('Timed out waiting for the worker')
+            chunk = os.read(fd, size)
+            if not chunk:
+                raise WorkerError('The worker exited')
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def stop(self):
+        """
+        Stops the worker.
+        """
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class CodejailWorkerPool:
+    """
+    A fixed size pool of CodejailWorkers.
+
+    Each execution waits up to wait_timeout seconds for an idle worker, or
+    forever if wait_timeout is None, and executes its code with it.  Workers
+    are started in the background, and each of them executes a single job,
+    after which it is stopped and replaced by a new one.  Workers which fail
+    to start are started again by the next execution.
+    """
+    def __init__(self, cmd, size, wait_timeout=None):
+        self.cmd = cmd
+        self.size = size
+        self.wait_timeout = wait_timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._missing = size
+        self._stopped = False
+        self._start_missing_workers()
+
+    def execute(self, code, globals_dict, python_path=None, extra_files=None, limit_overrides_context=None, slug=None):
+        """
+        Executes the given code, like codejail's safe_exec, with one of the workers.
+
+        Returns the error message and the exception of the execution, or
+        (None, None) if it succeeded, in which case globals_dict is updated
+        with the globals produced by the code.
+
+        Raises:
+            NoIdleWorkerError if no worker becomes idle within wait_timeout
+            seconds.
+        """
+        self._start_missing_workers()
+
+        start = time.monotonic()
+        try:
+            worker = self._idle.get(timeout=self.wait_timeout)
+        except queue.Empty as err:
+            set_custom_attribute('codejail_pool.no_idle_worker', True)
+            raise NoIdleWorkerError(f'No codejail worker was idle within {self.wait_timeout} seconds') from err
+        started = time.monotonic()
+
+        limits = jail_code.get_effective_limits(limit_overrides_context)
+        job_dir = _make_job_dir(python_path or [], extra_files or [])
+        job = {
+            'code': code,
+            'globals_dict': json_safe(globals_dict),
+            'cwd': job_dir,
+            'python_path': [os.path.basename(path) for path in python_path or []],
+            'realtime': limits['REALTIME'],
+            'rlimits': [(rlimit, limits[name]) for name, rlimit in _RLIMITS if limits.get(name)],
+        }
+        try:
+            timeout = limits['REALTIME'] + _WORKER_GRACE_SECONDS if limits['REALTIME'] else None
+            output = worker.execute(job, timeout)
+        except WorkerError as err:
+            log.warning("Codejail worker failed to execute %s: %s", slug, err)
+            output = {'emsg': str(err)}
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            threading.Thread(target=self._replace_worker, args=(worker,), daemon=True).start()
+
+        set_custom_attribute('codejail_pool.size', self.size)
+        set_custom_attribute('codejail_pool.queue_wait_ms', round((started - start) * 1000))
+        set_custom_attribute('codejail_pool.execution_ms', round((time.monotonic() - started) * 1000))
+
+        emsg = output.get('emsg')
+        if emsg:
+            emsg = f"Couldn't execute jailed code: {emsg}"
+            return emsg, SafeExecException(emsg)
+        globals_dict.update(output['globals_dict'])
+        return None, None
+
+    def _start_missing_workers(self):
+        """
+        Starts, in the background, a worker for each one missing from the pool.
+        """
+        with self._lock:
+            missing, self._missing = self._missing, 0
+        for _ in range(missing):
+            threading.Thread(target=self._start_worker, daemon=True).start()
+
+    def _start_worker(self):
+        """
+        Starts a new worker, and hands it to the pool.
+        """
+        try:
+            worker = CodejailWorker(self.cmd)
+        except OSError:
+            log.exception("Unable to start a codejail worker")
+            with self._lock:
+                self._missing += 1
+            return
+        if self._stopped:
+            worker.stop()
+        else:
+            self._idle.put(worker)
+
+    def _replace_worker(self, worker):
+        """
+        Stops the given worker, which executed its job, and starts a new one.
+        """
+        worker.stop()
+        if not self._stopped:
+            self._start_worker()
+
+    def stop(self):
+        """
+        Stops all the idle workers of the pool, and the ones it starts later.
+        """
+        self._stopped = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+def _make_job_dir(python_path, extra_files):
+    """
+    Returns a new directory holding the files needed by a job, readable by
+    the sandbox user, like the one codejail creates for each execution.
+    """
+    job_dir = tempfile.mkdtemp(prefix='codejail-')
+    os.chmod(job_dir, 0o775)
+    tmp_dir = os.path.join(job_dir, 'tmp')
+    os.mkdir(tmp_dir)
+    os.chmod(tmp_dir, 0o777)
+    extra_names = {name for name, _ in extra_files}
+    for path in python_path:
+        name = os.path.basename(path)
+        if name in extra_names:
+            continue
+        if os.path.isdir(path):
+            shutil.copytree(path, os.path.join(job_dir, name))
+        elif os.path.exists(path):
+            shutil.copy(path, os.path.join(job_dir, name))
+    for name, content in extra_files:
+        with open(os.path.join(job_dir, name), 'wb') as extra_file:
+            extra_file.write(content)
+    return job_dir
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def is_worker_pool_enabled():
+    """
+    Returns whether code should be run by the codejail worker pool.
+    """
+    return ENABLE_CODEJAIL_WORKER_POOL.is_enabled()
+
+
+def get_worker_pool():
+    """
+    Returns the worker pool of this process, or None if codejail is not
+    configured to run sandboxed Python code.  The workers of a new pool are
+    started in the background.
+    """
+    from .safe_exec import ASSUMED_IMPORTS  # pylint: disable=import-outside-toplevel
+
+    global _pool, _pool_pid  # pylint: disable=global-statement
+    with _pool_lock:
+        # A forked process cannot use the workers of its parent.
+        if _pool is None or _pool_pid != os.getpid():
+            if not jail_code.is_configured('python'):
+                return None
+            command = jail_code.COMMANDS['python']
+            cmd = ['sudo', '-u', command['user']] if command['user'] else []
+            cmd += command['cmdline_start'] + ['-c', WORKER_CODE]
+            cmd += [module_name for _, module_name in ASSUMED_IMPORTS]
+            _pool = CodejailWorkerPool(
+                cmd,
+                size=getattr(settings, 'CODE_JAIL_WORKER_POOL_SIZE', 4),
+                wait_timeout=getattr(settings, 'CODE_JAIL_WORKER_POOL_WAIT_TIMEOUT', 1),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def pool_exec(data):
+    """
+    Executes code with the worker pool, with the arguments and the results of
+    the codejail REST service hook: data is the dict of arguments sent to the
+    service, and the returned value is the error message and the exception of
+    the execution, or (None, None).  The code is executed with codejail when
+    no worker is idle in time.
+    """
+    globals_dict = data["globals_dict"]
+    kwargs = {
+        'python_path': data.get("python_path"),
+        'extra_files': data.get("extra_files"),
+        'limit_overrides_context': data.get("limit_overrides_context"),
+        'slug': data.get("slug"),
+    }
+    if data.get("unsafely"):
+        try:
+            codejail_not_safe_exec(data["code"], globals_dict, **kwargs)
+        except SafeExecException as err:
+            return str(err), err
+        return None, None
+
+    pool = get_worker_pool()
+    if pool is None:
+        raise SafeExecException("Codejail is not configured to run sandboxed Python code.")
+    try:
+        return pool.execute(data["code"], globals_dict, **kwargs)
+    except NoIdleWorkerError as err:
+        log.info("Executing %s with codejail: %s", kwargs['slug'], err)
+    try:
+        codejail_safe_exec(data["code"], globals_dict, **kwargs)
+    except SafeExecException as err:
+        return str(err), err
+    return None, None
@@ -0,0 +1,96 @@
+"""
+Benchmark comparing the evaluation of formulas one sample at a time with
+calc.evaluator, as FormulaResponse used to check answers, with their
+evaluation over all the samples at once with evaluate_samples.
+
+The formulas are those of the formularesponse problems of the test courses,
+followed by a few representative ones, since the test courses have few.
+
+Usage:
+    pytest common/lib/capa/capa/tests/benchmark_formula_sampling.py -s
+"""
+
+
+import os
+import timeit
+import unittest
+
+import random2 as random
+from calc import evaluator
+from lxml import etree
+
+from capa.util import compare_with_tolerance
+from capa.vectorized_calc import evaluate_samples
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'test', 'data')
+
+FORMULAS = [
+    ('x^2 + 2*x*y + y^2', 'x,y@1,1:10,10#50'),
+    ('sin(omega*t)*e^(-t/tau)', 'omega,t,tau@1,0,1:10,10,5#50'),
+    ('R1*R2/(R1+R2)', 'R1,R2@1,1:1000,1000#50'),
+    ('sqrt(m*g*h*2/m) + ln(v)', 'm,g,h,v@1,9,1,1:10,10,100,10#100'),
+]
+
+NUMBER = 20
+
+
+def corpus_formulas():
+    """
+    Returns the (answer, samples) pairs of the formularesponse problems of the
+    test courses which do not depend on the context of their problem.
+    """
+    formulas = []
+    for dirpath, _, filenames in os.walk(TEST_DATA_DIR):
+        for filename in filenames:
+            if not filename.endswith('.xml'):
+                continue
+            try:
+                tree = etree.parse(os.path.join(dirpath, filename))
+            except etree.XMLSyntaxError:
+                continue
+            for response in tree.iter('formularesponse'):
+                answer = response.get('answer', '')
+                samples = response.get('samples')
+                if samples and answer and '$' not in answer:
+                    formulas.append((answer, samples))
+    return formulas
+
+
+def randomize_variables(samples):
+    """
+    Returns the samples of the variables described by the given samples
+    string, as FormulaResponse.randomize_variables does.
+    """
+    variables, ranges = samples.split('@')
+    ranges, num_samples = ranges.split('#')
+    low, high = (list(map(float, bound.split(','))) for bound in ranges.split(':'))
+    return [
+        {variable: random.uniform(low[index], high[index]) for index, variable in enumerate(variables.split(','))}
+        for _ in range(int(num_samples))
+    ]
+
+
+class FormulaSamplingBenchmark(unittest.TestCase):
+    """
+    Benchmarks evaluating formulas over the samples of their variables.
+    """
+    def test_benchmark(self):
+        for answer, samples in corpus_formulas() + FORMULAS:
+            var_dict_list = randomize_variables(samples)
+            values = evaluate_samples(answer, var_dict_list)
+            if values is not None:
+                for value, var_dict in zip(values, var_dict_list):
+                    assert compare_with_tolerance(value, evaluator(var_dict, {}, answer), '1e-9%')
+
+            per_sample = timeit.timeit(
+                lambda: [evaluator(var_dict, {}, answer) for var_dict in var_dict_list],  # pylint: disable=cell-var-from-loop
+                number=NUMBER,
+            ) / NUMBER
+            vectorized = timeit.timeit(
+                lambda: evaluate_samples(answer, var_dict_list),  # pylint: disable=cell-var-from-loop
+                number=NUMBER,
+            ) / NUMBER
+            print('{:<40} {:>4} samples: per sample {:8.2f}ms, vectorized {:8.2f}ms{}'.format(
+                answer[:40], len(var_dict_list), per_sample * 1000, vectorized * 1000,
+                '' if values is not None else ' (not vectorized)',
+            ))
@@ -0,0 +1,97 @@
+"""
+Benchmark comparing the construction of problems when their trees are parsed,
+made compatible and have their includes inserted for every instance, as
+LoncapaProblem used to, with their construction when the trees are copied out
+of PARSED_PROBLEM_CACHE.
+
+The problems are those of the test courses, followed by a problem including a
+file, since the test courses have few.
+
+Usage:
+    pytest common/lib/capa/capa/tests/benchmark_parsed_problem_cache.py -s
+"""
+
+
+import os
+import shutil
+import tempfile
+import timeit
+import unittest
+
+from fs.osfs import OSFS
+from lxml import etree
+
+from capa.capa_problem import PARSED_PROBLEM_CACHE
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'test', 'data')
+
+INCLUDE_PROBLEM = '<problem><include file="include.xml"/></problem>'
+
+INCLUDED_XML = '<div>{}</div>'.format(''.join(
+    '<multiplechoiceresponse><choicegroup type="MultipleChoice">'
+    '<choice correct="true">Right {0}</choice><choice correct="false">Wrong {0}</choice>'
+    '</choicegroup></multiplechoiceresponse>'.format(index)
+    for index in range(20)
+))
+
+NUMBER = 50
+
+
+def corpus_problems():
+    """
+    Returns the texts of the problems of the test courses which can be built
+    without their course.
+    """
+    problems = []
+    for dirpath, _, filenames in os.walk(TEST_DATA_DIR):
+        if os.path.basename(dirpath) != 'problem':
+            continue
+        for filename in filenames:
+            if not filename.endswith('.xml'):
+                continue
+            with open(os.path.join(dirpath, filename), 'rb') as problem_file:
+                problem_text = problem_file.read().decode('utf-8')
+            try:
+                etree.XML(problem_text.encode('utf-8'))
+                new_loncapa_problem(problem_text)
+            except Exception:  # lint-amnesty, pylint: disable=broad-except
+                continue
+            problems.append((filename, problem_text))
+    return problems
+
+
+class ParsedProblemCacheBenchmark(unittest.TestCase):
+    """
+    Benchmarks constructing problems with and without cached trees.
+    """
+    def test_benchmark(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        include_system = test_capa_system()
+        include_system.filestore = OSFS(root)
+        include_system.filestore.writetext('include.xml', INCLUDED_XML)
+
+        problems = [(name, text, None) for name, text in corpus_problems()]
+        problems.append(('include.xml', INCLUDE_PROBLEM, include_system))
+
+        total_uncached = total_cached = 0
+        for name, problem_text, capa_system in problems:
+            def build():
+                return new_loncapa_problem(problem_text, capa_system=capa_system)  # pylint: disable=cell-var-from-loop
+
+            def build_uncached():
+                PARSED_PROBLEM_CACHE.clear()
+                return build()
+
+            uncached = timeit.timeit(build_uncached, number=NUMBER) / NUMBER
+            build()
+            cached = timeit.timeit(build, number=NUMBER) / NUMBER
+            total_uncached += uncached
+            total_cached += cached
+            print('{:<40} uncached {:8.3f}ms, cached {:8.3f}ms'.format(name[:40], uncached * 1000, cached * 1000))
+        PARSED_PROBLEM_CACHE.clear()
+
+        print('{:<40} uncached {:8.3f}ms, cached {:8.3f}ms'.format(
+            'total ({} problems)'.format(len(problems)), total_uncached * 1000, total_cached * 1000,
+        ))
@@ -3,17 +3,21 @@ Test capa problem.
 """
 
 
+import shutil
+import tempfile
 import textwrap
 import unittest
 import pytest
 import ddt
 import six
+from fs.osfs import OSFS
 from lxml import etree
 from markupsafe import Markup
 from mock import patch
 
+from capa.capa_problem import PARSED_PROBLEM_CACHE, LoncapaProblem, ParsedProblemCache
 from capa.responsetypes import LoncapaProblemError
-from capa.tests.helpers import new_loncapa_problem
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
 from openedx.core.djangolib.markup import HTML
 
 
@@ -734,3 +738,133 @@ class CAPAProblemReportHelpersTest(unittest.TestCase):
         # Ensure that the answer is a string so that the dict returned from this
         # function can eventualy be serialized to json without issues.
         assert isinstance(problem.get_question_answers()['1_solution_1'], six.text_type)
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """ Tests for the cache of parsed problem trees """
+
+    problem_xml = textwrap.dedent("""
+        <problem>
+            <optionresponse>
+                <optioninput label="Color">
+                    <option correct="False">yellow</option>
+                    <option correct="True">blue</option>
+                </optioninput>
+            </optionresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()  # lint-amnesty, pylint: disable=super-with-arguments
+        PARSED_PROBLEM_CACHE.clear()
+        self.addCleanup(PARSED_PROBLEM_CACHE.clear)
+
+    def test_problem_text_parsed_once(self):
+        make_xml_compatible = LoncapaProblem.make_xml_compatible
+        with patch.object(
+            LoncapaProblem, 'make_xml_compatible', autospec=True, side_effect=make_xml_compatible
+        ) as mock_make_xml_compatible:
+            first = new_loncapa_problem(self.problem_xml, seed=1)
+            second = new_loncapa_problem(self.problem_xml, seed=2)
+        assert mock_make_xml_compatible.call_count == 1
+        assert first.get_html() == second.get_html()
+        assert second.tree.find('.//optioninput').get('options') == "('yellow','blue')"
+
+    def test_instances_do_not_share_trees(self):
+        first = new_loncapa_problem(self.problem_xml)
+        second = new_loncapa_problem(self.problem_xml)
+        assert first.tree is not second.tree
+        first.tree.find('.//optioninput').set('options', "('red')")
+        third = new_loncapa_problem(self.problem_xml)
+        assert third.tree.find('.//optioninput').get('options') == "('yellow','blue')"
+
+    def test_invalid_problem_not_cached(self):
+        invalid_xml = self.problem_xml.replace('correct="False"', 'correct="True"')
+        for _ in range(2):
+            with pytest.raises(LoncapaProblemError):
+                new_loncapa_problem(invalid_xml)
+
+    def include_capa_system(self, content):
+        """
+        Returns a capa system whose filestore holds an include.xml file with
+        the given content.
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        capa_system = test_capa_system()
+        capa_system.filestore = OSFS(root)
+        capa_system.filestore.writetext('include.xml', content)
+        return capa_system
+
+    def test_includes_processed_once(self):
+        include_xml = '<problem><include file="include.xml"/></problem>'
+        capa_system = self.include_capa_system('<p>Included</p>')
+        first = new_loncapa_problem(include_xml, capa_system=capa_system, seed=1)
+        capa_system.filestore.remove('include.xml')
+        second = new_loncapa_problem(include_xml, capa_system=capa_system, seed=2)
+        assert first.tree.find('p').text == second.tree.find('p').text == 'Included'
+
+        other = new_loncapa_problem(include_xml, capa_system=self.include_capa_system('<p>Other</p>'))
+        assert other.tree.find('p').text == 'Other'
+
+    def test_missing_include_not_cached(self):
+        include_xml = '<problem><include file="include.xml"/></problem>'
+        capa_system = self.include_capa_system('<p>Included</p>')
+        capa_system.filestore.remove('include.xml')
+        assert new_loncapa_problem(include_xml, capa_system=capa_system).tree.find('p') is None
+        capa_system.filestore.writetext('include.xml', '<p>Included</p>')
+        assert new_loncapa_problem(include_xml, capa_system=capa_system).tree.find('p').text == 'Included'
+
+    def test_size_bound(self):
+        cache = ParsedProblemCache(max_size=2)
+        for index in range(3):
+            cache.set(str(index), etree.XML('<problem id="{}"/>'.format(index)))
+        assert cache.get('0') is None
+        assert cache.get('1').get('id') == '1'
+        cache.set('3', etree.XML('<problem/>'))
+        assert cache.get('2') is None
+        assert cache.get('1') is not None
+
+
+class PrimeContextCacheTest(unittest.TestCase):
+    """ Tests for priming the cache of problem contexts """
+
+    problem_xml = textwrap.dedent("""
+        <problem>
+            <script type="loncapa/python">
+x = random.randint(0, 1000000)
+            </script>
+            <p>$x</p>
+        </problem>
+    """)
+
+    class DictCache(dict):
+        """ A cache over a dict """
+        def set(self, key, value):
+            self[key] = value
+
+        def __bool__(self):
+            return True
+
+    def test_prime_context_cache(self):
+        capa_system = test_capa_system()
+        capa_system.cache = self.DictCache()
+        problem = new_loncapa_problem(self.problem_xml, capa_system=capa_system, seed=1)
+        assert len(capa_system.cache) == 1
+
+        problem.prime_context_cache([(1, 'student'), (2, 'student'), (3, 'student')])
+        assert len(capa_system.cache) == 3
+
+        # The problems of the primed seeds read their context from the cache.
+        for key, (emsg, context) in capa_system.cache.items():
+            capa_system.cache[key] = (emsg, dict(context, x=context['seed'] * 10))
+        for seed in (1, 2, 3):
+            problem = new_loncapa_problem(self.problem_xml, capa_system=capa_system, seed=seed)
+            assert problem.context['x'] == seed * 10
+        assert len(capa_system.cache) == 3
+
+    def test_prime_context_cache_without_cache(self):
+        problem = new_loncapa_problem(self.problem_xml, seed=1)
+        with patch('capa.capa_problem.safe_exec_batch') as mock_safe_exec_batch:
+            problem.prime_context_cache([(2, 'student')])
+        assert not mock_safe_exec_batch.called
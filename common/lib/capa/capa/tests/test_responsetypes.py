@@ -457,6 +457,20 @@ class FormulaResponseTest(ResponseTest):
         input_formula = "x + y"
         self.assert_grade(problem, input_formula, "incorrect")
 
+    def test_formulas_parsed_once(self):
+        """
+        Test that each formula is evaluated over all the samples at once
+        """
+        sample_dict = {'x': (-10, 10), 'y': (-10, 10)}
+        problem = self.build_problem(sample_dict=sample_dict,
+                                     num_samples=10,
+                                     tolerance=0.01,
+                                     answer="x+2*y")
+
+        with mock.patch('capa.vectorized_calc.evaluator', wraps=calc.evaluator) as mock_evaluator:
+            self.assert_grade(problem, "2*x - x + y + y", "correct")
+        assert mock_evaluator.call_count == 2
+
     def test_hint(self):
         """
         Test the hint-giving functionality of FormulaResponse
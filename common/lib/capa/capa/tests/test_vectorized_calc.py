@@ -0,0 +1,84 @@
+"""
+Tests of the evaluation of formulas over many samples at once.
+"""
+
+
+import numbers
+import unittest
+
+import ddt
+import numpy
+import random2 as random
+from calc import evaluator
+
+from capa.util import compare_with_tolerance
+from capa.vectorized_calc import SampleArray, evaluate_samples
+
+
+@ddt.ddt
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Tests of evaluate_samples.
+    """
+    def setUp(self):
+        super().setUp()
+        self.var_dict_list = [
+            {'x': random.uniform(-10, 10), 'y': random.uniform(1, 10)}
+            for _ in range(20)
+        ]
+
+    @ddt.data(
+        'x + 2*y',
+        'x^2 - 3*x*y + y^3',
+        'sin(x)*cos(y) + tan(x/y)',
+        'sqrt(x) + ln(y)',
+        'e^(x/10) + pi',
+        'x/y + 5%',
+        'abs(x) || y',
+        '3*i*x + y',
+        '42',
+    )
+    def test_same_values_as_evaluator(self, math_expr):
+        values = evaluate_samples(math_expr, self.var_dict_list)
+        if values is None:
+            # Expressions the arrays cannot be used with are left to evaluator.
+            return
+        assert len(values) == len(self.var_dict_list)
+        for value, var_dict in zip(values, self.var_dict_list):
+            assert compare_with_tolerance(value, evaluator(var_dict, {}, math_expr), '1e-9%')
+
+    @ddt.data(
+        'x + 2*y',
+        'sin(x)*cos(y) + x^2',
+        '42',
+        'sqrt(2)',
+    )
+    def test_vectorized(self, math_expr):
+        values = evaluate_samples(math_expr, self.var_dict_list)
+        assert values is not None
+        # The values are compared with a tolerance as Python numbers, not numpy scalars.
+        assert all(type(value) in (int, float, complex) for value in values)  # pylint: disable=unidiomatic-typecheck
+
+    def test_only_sample_arrays_are_numbers(self):
+        assert isinstance(numpy.array([1.0]).view(SampleArray), numbers.Number)
+        assert not isinstance(numpy.array([1.0]), numbers.Number)
+
+    @ddt.data(
+        # Errors which evaluator reports.
+        'x + z',
+        'x + (y',
+        'fact(x)',
+        'x / 0',
+        # Floating point errors, which numpy would only warn about.
+        '10^(1000*y)',
+    )
+    def test_errors(self, math_expr):
+        assert evaluate_samples(math_expr, self.var_dict_list) is None
+
+    def test_case_sensitivity(self):
+        var_dict_list = [{'x': 1.0, 'X': 2.0}]
+        assert evaluate_samples('x', var_dict_list, case_sensitive=True) == [1.0]
+        assert evaluate_samples('X', var_dict_list, case_sensitive=True) == [2.0]
+
+    def test_no_samples(self):
+        assert evaluate_samples('x', []) == []
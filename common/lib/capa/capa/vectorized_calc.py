@@ -0,0 +1,104 @@
+"""
+Evaluation of calc formulas over many samples of their variables at once.
+
+Checking a FormulaResponse evaluates the student and instructor formulas
+for each sample of the variables of the problem.  calc.evaluator parses
+its formula on every call, which costs far more than the evaluation itself.
+Instead, evaluate_samples parses each formula once, and evaluates it once
+over arrays holding the values of each variable for every sample.
+"""
+
+
+import numbers
+
+import numpy
+from calc import evaluator
+
+try:
+    from calc.calc import DEFAULT_FUNCTIONS
+except ImportError:  # pragma: no cover
+    DEFAULT_FUNCTIONS = {}
+
+
+class SampleArray(numpy.ndarray, numbers.Number):
+    """
+    Array of the values of an expression for each sample of its variables.
+
+    calc tells operators apart from operands by comparing them with operator
+    strings, and numbers apart from other parse results with isinstance
+    checks, so sample arrays compare unequal to strings, and are numbers.
+    They derive from numbers.Number rather than being registered with it, so
+    that only this class, and no other array, passes those checks.
+    """
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return False
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        if isinstance(other, str):
+            return True
+        return super().__ne__(other)
+
+    __hash__ = None
+
+
+def _as_samples(value):
+    """
+    Returns the given value, viewed as a SampleArray if it is an array.
+    """
+    if isinstance(value, numpy.ndarray) and not isinstance(value, SampleArray):
+        return value.view(SampleArray)
+    return value
+
+
+def _sample_function(function):
+    """
+    Returns the given calc function, made to return SampleArrays for arrays.
+    """
+    def sample_function(*args):
+        return _as_samples(function(*args))
+    return sample_function
+
+
+# Some of the default calc functions, like the numpy.lib.scimath ones, turn
+# their arguments into plain arrays.
+SAMPLE_FUNCTIONS = {name: _sample_function(function) for name, function in DEFAULT_FUNCTIONS.items()}
+
+
+def evaluate_samples(math_expr, var_dict_list, case_sensitive=False):
+    """
+    Returns the list of the values of the given expression for each of the
+    given dicts mapping variables to values, as calc.evaluator would return
+    them but as Python numbers rather than numpy scalars, or None if the
+    expression cannot be evaluated over all the samples at once.
+
+    Any error of the evaluation, including the floating point errors that
+    numpy only warns about for arrays, makes it return None, in which case
+    the expression should be evaluated with calc.evaluator for each dict,
+    which then reports the error as it always did.
+    """
+    num_samples = len(var_dict_list)
+    if not num_samples:
+        return []
+
+    variables = {
+        name: numpy.array([var_dict[name] for var_dict in var_dict_list]).view(SampleArray)
+        for name in var_dict_list[0]
+    }
+    try:
+        with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+            result = evaluator(variables, SAMPLE_FUNCTIONS, math_expr, case_sensitive=case_sensitive)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+    if isinstance(result, numpy.ndarray):
+        if result.shape != (num_samples,):
+            return None
+        return result.view(numpy.ndarray).tolist()
+    if isinstance(result, numpy.generic):
+        result = result.item()
+    if isinstance(result, numbers.Number):
+        # The expression does not depend on the variables.
+        return [result] * num_samples
+    return None
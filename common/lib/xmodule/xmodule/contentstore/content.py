@@ -291,9 +291,16 @@ class StaticContent:  # lint-amnesty, pylint: disable=missing-class-docstring
 
         return urlunparse(('', base_url, asset_path, params, urlencode(updated_query_params), ''))
 
-    def stream_data(self):
+    def stream_data(self, chunk_size=STREAM_DATA_CHUNK_SIZE):  # pylint: disable=unused-argument
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte, chunk_size=STREAM_DATA_CHUNK_SIZE):
+        """
+        Stream the data between first_byte and last_byte (included), without copying it
+        """
+        # pylint: disable=unused-argument
+        yield memoryview(self._data)[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -314,26 +321,26 @@ class StaticContentStream(StaticContent):  # lint-amnesty, pylint: disable=missi
                          length=length, locked=locked, content_digest=content_digest)
         self._stream = stream
 
-    def stream_data(self):
+    def stream_data(self, chunk_size=STREAM_DATA_CHUNK_SIZE):
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            chunk = self._stream.read(chunk_size)
             if len(chunk) == 0:
                 break
             yield chunk
 
-    def stream_data_in_range(self, first_byte, last_byte):
+    def stream_data_in_range(self, first_byte, last_byte, chunk_size=STREAM_DATA_CHUNK_SIZE):
         """
         Stream the data between first_byte and last_byte (included)
         """
         self._stream.seek(first_byte)
         position = first_byte
         while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
+            if last_byte < position + chunk_size - 1:
                 chunk = self._stream.read(last_byte - position + 1)
                 yield chunk
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            chunk = self._stream.read(chunk_size)
+            position += chunk_size
             yield chunk
 
     def close(self):
@@ -348,6 +355,32 @@ class StaticContentStream(StaticContent):  # lint-amnesty, pylint: disable=missi
         return content
 
 
+class StaticContentMetadata(StaticContent):
+    """
+    The metadata of a piece of static content, without its data.
+
+    It is cached to answer the requests for the content which do not need its data, such as
+    conditional requests, and requests for outdated versions of the content.
+    """
+    @classmethod
+    def from_content(cls, content):
+        """
+        Returns the metadata of the given content.
+        """
+        return cls(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=getattr(content, 'locked', False),
+            content_digest=getattr(content, 'content_digest', None),
+        )
+
+    def stream_data(self, chunk_size=STREAM_DATA_CHUNK_SIZE):
+        raise NotImplementedError("The data of the content must be loaded to be streamed")
+
+    def stream_data_in_range(self, first_byte, last_byte, chunk_size=STREAM_DATA_CHUNK_SIZE):
+        raise NotImplementedError("The data of the content must be loaded to be streamed")
+
+
 class ContentStore:
     '''
     Abstraction for all ContentStore providers (e.g. MongoDB)
@@ -3,9 +3,14 @@
 from importlib import import_module
 
 from django.conf import settings
+from django.dispatch import Signal
 
 _CONTENTSTORE = {}
 
+# Sent with the `location` of an asset whenever a contentstore saves or deletes the asset, or
+# changes its attributes, so that the caches of the asset can be invalidated.
+asset_changed = Signal()
+
 
 def load_function(path):
     """
@@ -5,6 +5,10 @@ MongoDB/GridFS-level code for the contentstore.
 
 import json
 import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
 import gridfs
 import pymongo
@@ -15,6 +19,7 @@ from mongodb_proxy import autoretry_read
 from opaque_keys.edx.keys import AssetKey
 
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
+from xmodule.contentstore.django import asset_changed
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
@@ -22,6 +27,19 @@ from xmodule.util.misc import escape_invalid_characters
 
 from .content import ContentStore, StaticContent, StaticContentStream
 
+# The assets exported to tarballs are read from GridFS by this many threads, ahead of their addition
+# to the tarball, holding at most this many bytes of them in memory.  Larger assets are streamed.
+EXPORT_PREFETCH_WORKERS = 4
+EXPORT_PREFETCH_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _send_asset_changed(location):
+    """
+    Sends the asset_changed signal for the asset at the given location, so that its caches, like
+    the ones of the contentserver, never serve an outdated asset, or a 404 for a new one.
+    """
+    asset_changed.send(sender=MongoContentStore, location=location)
+
 
 class MongoContentStore(ContentStore):
     """
@@ -114,6 +132,7 @@ class MongoContentStore(ContentStore):
                 else:
                     fp.write(content.data)
 
+        _send_asset_changed(content.location)
         return content
 
     def delete(self, location_or_id):
@@ -121,6 +140,7 @@ class MongoContentStore(ContentStore):
         Delete an asset.
         """
         if isinstance(location_or_id, AssetKey):
+            _send_asset_changed(location_or_id)
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
@@ -203,7 +223,6 @@ class MongoContentStore(ContentStore):
             assets_policy_file: the filename for the policy file which should be in the same
                 directory as the other policy files.
         """
-        policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
         for asset in assets:
@@ -216,12 +235,86 @@ class MongoContentStore(ContentStore):
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
+
+        with open(assets_policy_file, 'w') as f:
+            json.dump(self._assets_policy(assets), f, sort_keys=True, indent=4)
+
+    def export_all_for_course_to_tar(self, course_key, tar_file, course_dir):
+        """
+        Export all of this course's assets to the static directory, and all of the assets'
+        attributes to the policies/assets.json policy file, of `course_dir` in the given tar file.
+
+        The assets are read from GridFS concurrently, ahead of their addition to the tar file,
+        holding at most EXPORT_PREFETCH_MAX_BYTES of them in memory; larger assets are streamed
+        into the tar file.
+
+        Args:
+            course_key (CourseKey): the :class:`CourseKey` identifying the course
+            tar_file (tarfile.TarFile): the tar file, opened for writing, to add the assets to
+            course_dir: the path of the exported course in the tar file
+        """
+        assets, __ = self.get_all_content_for_course(course_key)
+
+        def read(asset):
+            return self.find(asset['asset_key']).data
+
+        def add_file(name, data, size, mtime):
+            tarinfo = tarfile.TarInfo(f'{course_dir}/{name}')
+            tarinfo.size = size
+            tarinfo.mtime = mtime
+            tar_file.addfile(tarinfo, data)
+
+        with ThreadPoolExecutor(EXPORT_PREFETCH_WORKERS) as executor:
+            prefetched = {}
+            prefetched_bytes = 0
+            next_index = 0
+            for index, asset in enumerate(assets):
+                # Read the following assets while they fit in memory, from the current one on.
+                while next_index < len(assets):
+                    length = assets[next_index]['length']
+                    if length <= EXPORT_PREFETCH_MAX_BYTES:
+                        if prefetched_bytes + length > EXPORT_PREFETCH_MAX_BYTES:
+                            break
+                        prefetched[next_index] = executor.submit(read, assets[next_index])
+                        prefetched_bytes += length
+                    next_index += 1
+
+                name = self._export_name(asset)
+                mtime = asset['uploadDate'].timestamp()
+                if index in prefetched:
+                    data = prefetched.pop(index).result()
+                    prefetched_bytes -= asset['length']
+                    add_file(name, BytesIO(data), len(data), mtime)
+                else:
+                    content = self.find(asset['asset_key'], as_stream=True)
+                    try:
+                        add_file(name, content._stream, content.length, mtime)  # pylint: disable=protected-access
+                    finally:
+                        content.close()
+
+        policy = json.dumps(self._assets_policy(assets), sort_keys=True, indent=4).encode('utf-8')
+        add_file('policies/assets.json', BytesIO(policy), len(policy), time.time())
+
+    @staticmethod
+    def _export_name(asset):
+        """
+        Returns the path of the given asset in an export, relative to the exported course, as export writes it.
+        """
+        directory = os.path.dirname(asset.get('import_path') or '').strip('/')
+        filename = escape_invalid_characters(name=asset['displayname'], invalid_char_list=['/', '\\'])
+        return '/'.join(part for part in ('static', directory, filename) if part)
+
+    @staticmethod
+    def _assets_policy(assets):
+        """
+        Returns the policy of the attributes of the given assets, as exported to policies/assets.json.
+        """
+        policy = {}
+        for asset in assets:
             for attr, value in asset.items():
                 if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
                     policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
-
-        with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f, sort_keys=True, indent=4)
+        return policy
 
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
@@ -382,6 +475,7 @@ class MongoContentStore(ContentStore):
         result = self.fs_files.update_one({'_id': asset_db_key}, {"$set": attr_dict}, upsert=False)
         if result.matched_count == 0:
             raise NotFoundError(asset_db_key)
+        _send_asset_changed(location)
 
     @autoretry_read()
     def get_attrs(self, location):
@@ -435,6 +529,7 @@ class MongoContentStore(ContentStore):
             except FileExists:
                 self.fs.delete(file_id=asset_id)
                 self.create_asset(source_content, asset_id, asset, asset_key)
+            _send_asset_changed(dest_course_key.make_asset_key(asset_key['category'], asset_key['name']))
 
     def create_asset(self, source_content, asset_id, asset, asset_key):
         """
@@ -468,6 +563,10 @@ class MongoContentStore(ContentStore):
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
             self.fs.delete(asset_key)
+            if isinstance(asset_key, str):
+                _send_asset_changed(AssetKey.from_string(asset_key))
+            else:
+                _send_asset_changed(course_key.make_asset_key(asset_key['category'], asset_key['name']))
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -302,6 +302,16 @@ class BulkOperationsMixin:
         """
         return self._get_bulk_ops_record(course_key, ignore_case).active
 
+    def flush_definitions(self, course_key):
+        """
+        Write the definitions of the blocks created so far in the active bulk operation on
+        course_key, rather than when the bulk operation ends.
+
+        Implementing classes which defer writing definitions until the end of bulk operations
+        should override this method; otherwise, it is a noop
+        """
+        pass  # lint-amnesty, pylint: disable=unnecessary-pass
+
     def send_pre_publish_signal(self, bulk_ops_record, course_id):
         """
         Send a signal just before items are published in the course.
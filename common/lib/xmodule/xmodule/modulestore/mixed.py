@@ -1029,6 +1029,13 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         with store.bulk_operations(course_id, emit_signals, ignore_case):
             yield
 
+    def flush_definitions(self, course_key):
+        """
+        Write the definitions of the blocks created so far in the active bulk operation on course_key.
+        """
+        store = self._get_modulestore_for_courselike(course_key)
+        store.flush_definitions(course_key)
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
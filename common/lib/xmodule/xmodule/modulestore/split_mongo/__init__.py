@@ -3,8 +3,12 @@ General utilities
 """
 
 
-from collections import namedtuple
+import copy
+from collections import defaultdict, namedtuple
+from time import time
 
+from edx_django_utils.monitoring import accumulate
+from lazy import lazy
 from opaque_keys.edx.locator import BlockUsageLocator
 
 
@@ -20,3 +24,161 @@ class BlockKey(namedtuple('BlockKey', 'type id')):  # lint-amnesty, pylint: disa
 
 
 CourseEnvelope = namedtuple('CourseEnvelope', 'course_key structure')
+
+
+class CopyOnWriteBlocks(dict):
+    """
+    The blocks of a new version of a structure: a map {BlockKey: BlockData} which initially
+    shares the BlockData of the previous version of the structure, and only copies a block
+    the first time it is looked up by key, so that editing the new version never modifies
+    the previous one and unedited blocks are never copied.
+
+    Iterating over the blocks (keys(), values(), items()) doesn't copy them, so blocks must be
+    looked up by key to be modified.
+
+    It is pickled and (deep) copied as a plain dict.
+    """
+    def __init__(self, blocks):
+        super().__init__(blocks)
+        self._owned = set()
+
+    def __getitem__(self, key):
+        block = super().__getitem__(key)
+        if key not in self._owned:
+            block = copy.deepcopy(block)
+            super().__setitem__(key, block)
+            self._owned.add(key)
+        return block
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._owned.add(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._owned.discard(key)
+
+    def pop(self, key, *args):
+        if key in self:
+            block = self[key]
+            del self[key]
+            return block
+        return super().pop(key, *args)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class StructureIndex:
+    """
+    Indexes of the blocks of a version of a structure, each built the first time it's used.
+
+    Only the versions of structures which have been saved are immutable, so the index of a
+    structure which is being edited would go stale.
+    """
+    ROOT_TYPES = ('course', 'library')
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    @lazy
+    def positions(self):
+        """
+        {BlockKey: position of the block in the structure}
+        """
+        return {block_key: position for position, block_key in enumerate(self.blocks)}
+
+    @lazy
+    def keys_by_type(self):
+        """
+        {block_type: [BlockKey]}
+        """
+        keys_by_type = defaultdict(list)
+        for block_key, block in self.blocks.items():
+            keys_by_type[block.block_type].append(block_key)
+        return keys_by_type
+
+    @lazy
+    def keys_by_id(self):
+        """
+        {block_id: [BlockKey]}, since blocks of different types may have the same id.
+        """
+        keys_by_id = defaultdict(list)
+        for block_key in self.blocks:
+            keys_by_id[block_key.id].append(block_key)
+        return keys_by_id
+
+    @lazy
+    def parents_by_child(self):
+        """
+        {BlockKey: [BlockKey of each parent]}
+        """
+        start_time = time()
+        parents_by_child = defaultdict(list)
+        for block_key, block in self.blocks.items():
+            for child in block.fields.get('children', []):
+                parents_by_child[child].append(block_key)
+        self._accumulate_build('parents_by_child', start_time)
+        return parents_by_child
+
+    @lazy
+    def reachable(self):
+        """
+        frozenset of the BlockKeys of the blocks which have a path to a root of the structure, ie
+        to a course or library block without parents.
+        """
+        parents_by_child = self.parents_by_child
+        start_time = time()
+        children = {block_key: block.fields.get('children', []) for block_key, block in self.blocks.items()}
+        to_visit = [
+            block_key
+            for block_type in self.ROOT_TYPES
+            for block_key in self.keys_by_type.get(block_type, [])
+            if block_key not in parents_by_child
+        ]
+        reachable = set(to_visit)
+        while to_visit:
+            for child in children.get(to_visit.pop(), []):
+                if child not in reachable:
+                    reachable.add(child)
+                    to_visit.append(child)
+        self._accumulate_build('reachable', start_time)
+        return frozenset(reachable)
+
+    def has_path_to_root(self, block_key):
+        """
+        Returns whether the given block has a path to a root of the structure.
+        """
+        return block_key in self.reachable or (
+            block_key.type in self.ROOT_TYPES and block_key not in self.parents_by_child
+        )
+
+    def _accumulate_build(self, index_name, start_time):
+        """
+        Records the number of blocks indexed and the time spent building the given index.
+        """
+        accumulate(f'split.structure_index.{index_name}.blocks', len(self.blocks))
+        accumulate(f'split.structure_index.{index_name}.build_duration', (time() - start_time) * 1000)
+
+    def in_order(self, block_keys):
+        """
+        Returns the given block keys in the order of their blocks in the structure.
+        """
+        return sorted(block_keys, key=self.positions.__getitem__)
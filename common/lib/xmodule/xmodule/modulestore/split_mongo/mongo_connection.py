@@ -18,7 +18,7 @@ import pymongo
 import pytz
 from mongodb_proxy import autoretry_read
 # Import this just to export it
-from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
+from pymongo.errors import BulkWriteError, DuplicateKeyError  # pylint: disable=unused-import
 
 from common.djangoapps.split_modulestore_django.models import SplitModulestoreCourseIndex
 from xmodule.exceptions import HeartbeatFailure
@@ -137,6 +137,8 @@ class QueryTimer:
 
 TIMER = QueryTimer(__name__, 0.01)
 
+DUPLICATE_KEY_ERROR_CODE = 11000
+
 
 def structure_from_mongo(structure, course_context=None):
     """
@@ -195,6 +197,10 @@ class CourseStructureCache:
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
+
+    If the cache backend sets compress_values to False, as the node-local
+    SharedMemoryCache does, the structures are cached uncompressed, and are
+    unpickled straight from the cache's shared buffer.
     """
     def __init__(self):
         self.cache = None
@@ -202,6 +208,7 @@ class CourseStructureCache:
             self.cache = get_cache('course_structure_cache')
         except InvalidCacheBackendError:
             pass
+        self.compress = getattr(self.cache, 'compress_values', True)
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
@@ -210,6 +217,9 @@ class CourseStructureCache:
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
             try:
+                if not self.compress:
+                    return self._get_uncompressed(key, tagger)
+
                 compressed_pickled_data = self.cache.get(key)
                 tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
@@ -230,6 +240,20 @@ class CourseStructureCache:
                 self.cache.delete(key)
                 return None
 
+    def _get_uncompressed(self, key, tagger):
+        """Unpickle the uncompressed struct data from the cache's buffer."""
+        pickled_data = self.cache.read_buffer(key)
+        tagger.tag(from_cache=str(pickled_data is not None).lower())
+
+        if pickled_data is None:
+            # Always log cache misses, because they are unexpected
+            tagger.sample_rate = 1
+            return None
+
+        tagger.measure('uncompressed_size', len(pickled_data))
+        with pickled_data:
+            return pickle.loads(pickled_data, encoding='latin-1')
+
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
         if self.cache is None:
@@ -239,6 +263,11 @@ class CourseStructureCache:
             pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
             tagger.measure('uncompressed_size', len(pickled_data))
 
+            if not self.compress:
+                # Stuctures are immutable, so we set a timeout of "never"
+                self.cache.set(key, pickled_data, None)
+                return
+
             # 1 = Fastest (slightly larger results)
             compressed_pickled_data = zlib.compress(pickled_data, 1)
             tagger.measure('compressed_size', len(compressed_pickled_data))
@@ -513,6 +542,19 @@ class MongoPersistenceBackend:
             tagger.tag(block_type=definition['block_type'])
             self.definitions.insert_one(definition)
 
+    def insert_definitions(self, definitions, course_context=None):
+        """
+        Create the given definitions in the db at once, skipping any which already exist
+        """
+        with TIMER.timer("insert_definitions", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            try:
+                self.definitions.insert_many(definitions, ordered=False)
+            except BulkWriteError as err:
+                # The definitions are append only, so those which were already written are fine.
+                if any(error['code'] != DUPLICATE_KEY_ERROR_CODE for error in err.details['writeErrors']):
+                    raise
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -0,0 +1,262 @@
+"""
+Node-local Django cache backend that shares cached values between all the
+processes of a host through memory-mapped files.
+
+It is meant for the course_structure_cache: course structures are
+immutable per version id, large, and read by every worker of a host.
+Storing them once per host, uncompressed, lets every worker load them
+straight from the shared page cache instead of fetching, decompressing and
+keeping its own copy of the compressed data.
+
+To enable it, configure the course_structure_cache with, for example::
+
+    CACHES['course_structure_cache'] = {
+        'BACKEND': 'xmodule.modulestore.split_mongo.shared_memory_cache.SharedMemoryCache',
+        'LOCATION': '/dev/shm/course_structure_cache',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_SIZE': 2 * 1024 * 1024 * 1024,
+        },
+    }
+
+where LOCATION is a directory on a node-local, preferably memory-backed,
+filesystem and MAX_SIZE is the byte budget of the cache, beyond which the
+least recently used values are evicted.
+"""
+
+
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+log = logging.getLogger(__name__)
+
+# Header of every cached file: the expiry time of the value (0 if it never
+# expires), and whether the value is stored as raw bytes or pickled.
+_HEADER = struct.Struct('<dB')
+_RAW_BYTES = 0
+_PICKLED = 1
+
+_CACHE_SUFFIX = '.shmcache'
+_TEMP_PREFIX = 'tmp-'
+
+# Each process culls the cache once it has written this fraction of the
+# byte budget since its last cull, rather than listing the directory on
+# every write.  The cache can therefore exceed its budget by up to this
+# fraction per writing process.
+_CULL_FRACTION = 0.05
+
+# Temporary files older than this were left by a process that died while
+# writing them, and are deleted when culling.
+_STALE_TEMP_FILE_AGE = 60 * 60
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Cache backend storing each value in its own file of a node-local
+    directory, and reading it through a read-only memory mapping.
+
+    Bytes values are stored as they are, so that read_buffer can return a
+    zero-copy view of them.  Other values are pickled.
+
+    Files are written to a temporary file and atomically renamed into
+    place, so that concurrent readers never see a partially written value,
+    and a reader that has mapped a value keeps a valid mapping even if the
+    value is evicted by another process.
+    """
+    # Values given to this cache should not be compressed, so that they can
+    # be read without copying them out of the shared mapping.
+    compress_values = False
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._dir = os.path.abspath(location)
+        options = params.get('OPTIONS', {})
+        self._max_size = int(options.get('MAX_SIZE', 1024 * 1024 * 1024))
+        self._written_since_cull = 0
+        os.makedirs(self._dir, exist_ok=True)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.has_key(key, version):
+            return False
+        self.set(key, value, timeout, version)
+        return True
+
+    def get(self, key, default=None, version=None):
+        opened = self._open(key, version)
+        if opened is None:
+            return default
+        kind, mapping = opened
+        with mapping:
+            if kind == _PICKLED:
+                return pickle.loads(mapping[_HEADER.size:])
+            return mapping[_HEADER.size:]
+
+    def read_buffer(self, key, version=None):
+        """
+        Returns a read-only memoryview of the bytes value cached for the given
+        key, which shares its memory with every other process of the host
+        reading the same value, or None if there is no such value.
+        """
+        opened = self._open(key, version)
+        if opened is None:
+            return None
+        kind, mapping = opened
+        if kind != _RAW_BYTES:
+            mapping.close()
+            return None
+        # The mapping is closed once the returned view, and any view of it,
+        # has been garbage collected.
+        return memoryview(mapping)[_HEADER.size:]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        path = self._key_to_path(key, version)
+        expiry = self.get_backend_timeout(timeout)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            kind = _RAW_BYTES
+        else:
+            kind = _PICKLED
+            value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        fd, temp_path = tempfile.mkstemp(dir=self._dir, prefix=_TEMP_PREFIX)
+        try:
+            with open(fd, 'wb') as temp_file:
+                temp_file.write(_HEADER.pack(expiry or 0, kind))
+                temp_file.write(value)
+            os.replace(temp_path, path)
+        except BaseException as error:
+            self._delete_path(temp_path)
+            if not isinstance(error, OSError):
+                raise
+            log.exception("SharedMemoryCache: Unable to write the value of %s to %s", key, path)
+            return
+
+        self._written_since_cull += _HEADER.size + len(value)
+        if self._written_since_cull >= self._max_size * _CULL_FRACTION:
+            self._cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, version=version)
+        if value is None:
+            return False
+        self.set(key, value, timeout, version)
+        return True
+
+    def delete(self, key, version=None):
+        return self._delete_path(self._key_to_path(key, version))
+
+    def has_key(self, key, version=None):
+        opened = self._open(key, version)
+        if opened is None:
+            return False
+        opened[1].close()
+        return True
+
+    def clear(self):
+        for entry in self._list_entries() + self._list_temp_entries():
+            self._delete_path(entry.path)
+
+    def _key_to_path(self, key, version):
+        """
+        Returns the path of the file storing the value of the given key.
+        """
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return os.path.join(self._dir, hashlib.md5(key.encode()).hexdigest() + _CACHE_SUFFIX)
+
+    def _open(self, key, version):
+        """
+        Maps the file storing the value of the given key, and returns the
+        kind of the value and the mapping, or None if there is no unexpired
+        value for the key.
+        """
+        path = self._key_to_path(key, version)
+        try:
+            with open(path, 'rb') as cache_file:
+                mapping = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError is raised when mapping an empty file.
+            return None
+
+        expiry, kind = _HEADER.unpack_from(mapping)
+        if expiry and expiry < time.time():
+            mapping.close()
+            self._delete_path(path)
+            return None
+
+        # Update the modification time of the file, which is its last access
+        # time for the LRU eviction.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return kind, mapping
+
+    def _list_entries(self):
+        """
+        Returns the directory entries of all the values in the cache.
+        """
+        try:
+            return [entry for entry in os.scandir(self._dir) if entry.name.endswith(_CACHE_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def _list_temp_entries(self):
+        """
+        Returns the directory entries of the temporary files of values being written.
+        """
+        try:
+            return [entry for entry in os.scandir(self._dir) if entry.name.startswith(_TEMP_PREFIX)]
+        except FileNotFoundError:
+            return []
+
+    def _cull(self):
+        """
+        Evicts the least recently used values until the cache fits within
+        its byte budget, and deletes stale temporary files.
+        """
+        self._written_since_cull = 0
+        stale_time = time.time() - _STALE_TEMP_FILE_AGE
+        for entry in self._list_temp_entries():
+            try:
+                if entry.stat().st_mtime < stale_time:
+                    self._delete_path(entry.path)
+            except FileNotFoundError:
+                continue
+
+        entries = []
+        total_size = 0
+        for entry in self._list_entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        if total_size <= self._max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            if self._delete_path(path):
+                total_size -= size
+            if total_size <= self._max_size:
+                break
+
+    @staticmethod
+    def _delete_path(path):
+        """
+        Deletes the given file, and returns whether it existed.
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
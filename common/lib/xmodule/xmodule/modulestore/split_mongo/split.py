@@ -64,6 +64,7 @@ from importlib import import_module
 
 from bson.objectid import ObjectId
 from ccx_keys.locator import CCXBlockUsageLocator, CCXLocator
+from edx_django_utils.monitoring import accumulate
 from mongodb_proxy import autoretry_read
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import (
@@ -100,7 +101,7 @@ from xmodule.modulestore.exceptions import (
     MultipleLibraryBlocksFound,
     VersionConflictError
 )
-from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo import BlockKey, CopyOnWriteBlocks, CourseEnvelope, StructureIndex
 from xmodule.modulestore.split_mongo.mongo_connection import DuplicateKeyError, DjangoFlexPersistenceBackend
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.partitions.partitions_service import PartitionService
@@ -291,6 +292,23 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         return dirty
 
+    def flush_definitions(self, course_key):
+        """
+        Write the definitions created so far in the active bulk operation on course_key to the
+        database at once, rather than one by one when the bulk operation ends. Definitions are
+        immutable, and are only used once the structures which refer to them are written.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if not bulk_write_record.active:
+            return
+
+        new_ids = bulk_write_record.definitions.keys() - bulk_write_record.definitions_in_db
+        if new_ids:
+            self.db_connection.insert_definitions(
+                [bulk_write_record.definitions[_id] for _id in new_ids], bulk_write_record.course_key
+            )
+            bulk_write_record.definitions_in_db.update(new_ids)
+
     def get_course_index(self, course_key, ignore_case=False):
         """
         Return the index for course_key.
@@ -476,8 +494,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         if bulk_write_record.active and course_key.branch in bulk_write_record.dirty_branches:
             return bulk_write_record.structure_for_branch(course_key.branch)
 
-        # Otherwise, make a new structure
-        new_structure = copy.deepcopy(structure)
+        # Otherwise, make a new structure, which shares the blocks of the old one until they're edited
+        new_structure = copy.deepcopy({key: value for key, value in structure.items() if key != 'blocks'})
+        new_structure['blocks'] = CopyOnWriteBlocks(structure['blocks'])
         new_structure['_id'] = ObjectId()
         new_structure['previous_version'] = structure['_id']
         new_structure['edited_by'] = user_id
@@ -802,8 +821,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 del self.request_cache.data.setdefault('course_cache', {})[course_version_guid]
             except KeyError:
                 pass
+            self.request_cache.data.setdefault('structure_indexes', {}).pop(course_version_guid, None)
         else:
             self.request_cache.data['course_cache'] = {}
+            self.request_cache.data['structure_indexes'] = {}
 
     def _lookup_course(self, course_key, head_validation=True):
         """
@@ -1210,6 +1231,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         course = self._lookup_course(course_locator)
         items = []
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
+        definitions = {}
 
         def _block_matches_all(block_data):
             """
@@ -1221,18 +1243,42 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 self._block_matches(block_data.fields, settings)
             ):
                 if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
+                    definition_block = definitions.get(block_data.definition)
+                    if definition_block is None:
+                        definition_block = self.get_definition(course_locator, block_data.definition)
                     return self._block_matches(definition_block['fields'], content)
                 else:
                     return True
 
+        def _candidate_blocks(block_name=None):
+            """
+            Return the (block_key, block_data) pairs of the blocks which may match the criteria, in the
+            order of the structure, and load the definitions of those which need to be checked at once.
+            """
+            block_keys = self._find_candidate_block_keys(course, qualifiers, settings, block_name)
+            if block_keys is None:
+                blocks = course.structure['blocks'].items()
+            else:
+                blocks = [(block_key, course.structure['blocks'][block_key]) for block_key in block_keys]
+            if content:
+                definition_ids = [
+                    block.definition for block_key, block in blocks
+                    if self._block_matches(block, qualifiers) and self._block_matches(block.fields, settings)
+                ]
+                if definition_ids:
+                    definitions.update(
+                        (definition['_id'], definition)
+                        for definition in self.get_definitions(course_locator, definition_ids)
+                    )
+            return blocks
+
         if settings is None:
             settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in course.structure['blocks'].items():
+            for block_id, block in _candidate_blocks(block_name):
                 # Don't do an in comparison blindly; first check to make sure
                 # that the name qualifier we're looking at isn't a plain string;
                 # if it is a string, then it should match exactly. If it's other
@@ -1261,9 +1307,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         if not include_orphans:
             path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+            if self._get_structure_index(course.course_key, course.structure) is None:
+                parents_cache = self.build_block_key_to_parents_mapping(course.structure)
 
-        for block_id, value in course.structure['blocks'].items():
+        for block_id, value in _candidate_blocks():
             if _block_matches_all(value):
                 if not include_orphans:
                     if (
@@ -1279,6 +1326,73 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
+    def _get_structure_index(self, course_key, structure):
+        """
+        Return the StructureIndex of the given structure, which is cached for the request by the
+        version of the structure, or None if the structure is being edited in a bulk operation.
+
+        Also return None if there is no request cache, as an index rebuilt for every lookup (e.g. for
+        each candidate block get_items checks for a path to the root) costs more than it saves.
+        """
+        if self.request_cache is None:
+            return None
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and structure['_id'] not in bulk_write_record.structures_in_db:
+            return None
+
+        structure_indexes = self.request_cache.data.setdefault('structure_indexes', {})
+        structure_index = structure_indexes.get(structure['_id'])
+        if structure_index is None:
+            structure_index = structure_indexes[structure['_id']] = StructureIndex(structure['blocks'])
+        else:
+            # each reuse saves rebuilding the indexes it uses (see split.structure_index.*.build_duration)
+            accumulate('split.structure_index.reuses', 1)
+        return structure_index
+
+    def _find_candidate_block_keys(self, course, qualifiers, settings, block_name=None):
+        """
+        Use the indexes of the course structure to find the keys of the blocks which may match the
+        exact block_type, children and name criteria of get_items, in the order of the structure.
+
+        Return None if there are no such criteria, or if the structure can't be indexed, in which
+        case all the blocks of the structure may match.
+        """
+        def _is_exact(criteria, value_type):
+            return isinstance(criteria, value_type) or (
+                isinstance(criteria, dict) and list(criteria) == ['$in'] and
+                all(isinstance(value, value_type) for value in criteria['$in'])
+            )
+
+        def _values(criteria):
+            return criteria['$in'] if isinstance(criteria, dict) else [criteria]
+
+        block_type = qualifiers.get('block_type')
+        child = settings.get('children') if settings else None
+        if isinstance(block_name, (list, tuple, set, frozenset)):
+            block_name = {'$in': block_name}
+        lookups = [
+            (index_name, _values(criteria))
+            for index_name, criteria, value_type in (
+                ('keys_by_type', block_type, str),
+                ('parents_by_child', child, tuple),
+                ('keys_by_id', block_name, str),
+            )
+            if criteria is not None and _is_exact(criteria, value_type)
+        ]
+        if not lookups:
+            return None
+
+        structure_index = self._get_structure_index(course.course_key, course.structure)
+        if structure_index is None:
+            return None
+
+        block_keys = None
+        for index_name, values in lookups:
+            index = getattr(structure_index, index_name)
+            matches = {block_key for value in values for block_key in index.get(value, [])}
+            block_keys = matches if block_keys is None else block_keys & matches
+        return structure_index.in_order(block_keys)
+
     def build_block_key_to_parents_mapping(self, structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
@@ -1308,6 +1422,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         :return Bool: whether or not component has path to the root
         """
+        structure_index = self._get_structure_index(course.course_key, course.structure)
+        if structure_index is not None:
+            return structure_index.has_path_to_root(block_key)
 
         if path_cache and block_key in path_cache:
             return path_cache[block_key]
@@ -1347,7 +1464,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course.course_key, course.structure)
+        if structure_index is None:
+            all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        else:
+            all_parent_ids = structure_index.parents_by_child.get(BlockKey.from_usage_key(locator), [])
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
@@ -1380,11 +1501,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         course = self._lookup_course(course_key)
         items = set(course.structure['blocks'].keys())
         items.remove(course.structure['root'])
-        blocks = course.structure['blocks']
-        for block_id, block_data in blocks.items():
-            items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
-            if block_data.block_type in detached_categories:
-                items.discard(block_id)
+        structure_index = self._get_structure_index(course_key, course.structure)
+        if structure_index is None:
+            blocks = course.structure['blocks']
+            for block_id, block_data in blocks.items():
+                items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
+                if block_data.block_type in detached_categories:
+                    items.discard(block_id)
+        else:
+            items.difference_update(structure_index.parents_by_child)
+            for block_type in detached_categories:
+                items.difference_update(structure_index.keys_by_type.get(block_type, []))
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
             for block_id in items
@@ -2855,11 +2982,14 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         original_structure = self._lookup_course(course_locator).structure
         index_entry = self._get_index_if_valid(course_locator)
         new_structure = self.version_structure(course_locator, original_structure, user_id)
-        for block in new_structure['blocks'].values():
-            if 'children' in block.fields:
-                block.fields['children'] = [
-                    block_id for block_id in block.fields['children']
-                    if block_id in new_structure['blocks']
+        # Only look up (and so copy) the blocks which have children to remove.
+        blocks = new_structure['blocks']
+        for block_key, block in list(blocks.items()):
+            children = block.fields.get('children')
+            if children and any(block_id not in blocks for block_id in children):
+                blocks[block_key].fields['children'] = [
+                    block_id for block_id in children
+                    if block_id in blocks
                 ]
         self.update_structure(course_locator, new_structure)
         if index_entry is not None:
@@ -0,0 +1,119 @@
+"""
+Benchmark comparing versioning a 5,000-block split structure to edit a single
+block by deep copying the whole structure, as SplitMongoModuleStore.version_structure
+used to, with sharing the unchanged blocks of the previous version.
+
+Usage:
+    pytest common/lib/xmodule/xmodule/modulestore/tests/benchmark_version_structure.py -s
+"""
+
+
+import copy
+import datetime
+import timeit
+import unittest
+
+from bson.objectid import ObjectId
+from pytz import UTC
+
+from xmodule.modulestore.split_mongo import BlockKey, CopyOnWriteBlocks
+from xmodule.modulestore.split_mongo.mongo_connection import structure_from_mongo, structure_to_mongo
+
+NUM_CHAPTERS = 10
+NUM_SEQUENTIALS = 10
+NUM_VERTICALS = 10
+NUM_LEAVES = 4
+NUMBER = 20
+
+
+def block_document(block_type, block_id, version, children=()):
+    """
+    Returns the Mongo document of a block of a structure.
+    """
+    return {
+        'block_type': block_type,
+        'block_id': block_id,
+        'definition': ObjectId(),
+        'fields': {
+            'display_name': f'{block_type} {block_id}',
+            'children': [[child_type, child_id] for child_type, child_id in children],
+        },
+        'defaults': {},
+        'asides': {},
+        'edit_info': {
+            'edited_by': 'benchmark',
+            'edited_on': datetime.datetime.now(UTC),
+            'previous_version': None,
+            'update_version': version,
+            'source_version': None,
+        },
+    }
+
+
+def large_structure():
+    """
+    Returns a structure of a course of about 5,000 blocks, as loaded from Mongo.
+    """
+    version = ObjectId()
+    blocks = []
+    chapters = []
+    for chapter in range(NUM_CHAPTERS):
+        sequentials = []
+        for sequential in range(NUM_SEQUENTIALS):
+            verticals = []
+            for vertical in range(NUM_VERTICALS):
+                vertical_id = f'vertical_{chapter}_{sequential}_{vertical}'
+                leaves = [('problem', f'{vertical_id}_problem_{leaf}') for leaf in range(NUM_LEAVES)]
+                blocks.extend(block_document(*leaf, version) for leaf in leaves)
+                blocks.append(block_document('vertical', vertical_id, version, leaves))
+                verticals.append(('vertical', vertical_id))
+            sequential_id = f'sequential_{chapter}_{sequential}'
+            blocks.append(block_document('sequential', sequential_id, version, verticals))
+            sequentials.append(('sequential', sequential_id))
+        blocks.append(block_document('chapter', f'chapter_{chapter}', version, sequentials))
+        chapters.append(('chapter', f'chapter_{chapter}'))
+    blocks.append(block_document('course', 'course', version, chapters))
+    return structure_from_mongo({
+        '_id': version,
+        'root': ['course', 'course'],
+        'previous_version': None,
+        'original_version': version,
+        'edited_by': 'benchmark',
+        'edited_on': datetime.datetime.now(UTC),
+        'schema_version': 1,
+        'blocks': blocks,
+    })
+
+
+def deep_copy(structure):
+    return copy.deepcopy(structure)
+
+
+def share_blocks(structure):
+    new_structure = copy.deepcopy({key: value for key, value in structure.items() if key != 'blocks'})
+    new_structure['blocks'] = CopyOnWriteBlocks(structure['blocks'])
+    return new_structure
+
+
+class VersionStructureBenchmark(unittest.TestCase):
+    """
+    Benchmarks versioning a large structure to change the title of one of its blocks.
+    """
+    def test_benchmark(self):
+        structure = large_structure()
+        edited_key = BlockKey('problem', 'vertical_5_5_5_problem_0')
+
+        def edit(version_structure):
+            new_structure = version_structure(structure)
+            new_structure['blocks'][edited_key].fields['display_name'] = 'edited'
+            return new_structure
+
+        for name, version_structure in (('deepcopy', deep_copy), ('shared blocks', share_blocks)):
+            new_structure = edit(version_structure)
+            assert structure['blocks'][edited_key].fields['display_name'] != 'edited'
+            assert len(structure_to_mongo(new_structure)['blocks']) == len(structure['blocks'])
+            duration = timeit.timeit(
+                lambda: edit(version_structure),  # pylint: disable=cell-var-from-loop
+                number=NUMBER,
+            ) / NUMBER
+            print('{:<16} {} blocks {:8.2f}ms'.format(name, len(structure['blocks']), duration * 1000))
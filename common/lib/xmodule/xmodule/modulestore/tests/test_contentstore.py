@@ -3,11 +3,15 @@
 """
 
 
+import io
+import json
 import logging
 import mimetypes
 import shutil
+import tarfile
 import unittest
 from tempfile import mkdtemp
+from unittest.mock import patch
 from uuid import uuid4
 
 import pytest
@@ -147,6 +151,41 @@ class TestContentstore(unittest.TestCase):
         finally:
             shutil.rmtree(root_dir)
 
+    @ddt.data(
+        (True, 64 * 1024 * 1024),
+        (False, 64 * 1024 * 1024),
+        (False, 1),  # streams all of the assets
+    )
+    @ddt.unpack
+    def test_export_for_course_to_tar(self, deprecated, prefetch_max_bytes):
+        """
+        Test exporting to a tar file exports the same assets and policy as exporting to disk
+        """
+        self.set_up_assets(deprecated)
+        root_dir = path.Path(mkdtemp())
+        tar_buffer = io.BytesIO()
+        try:
+            self.contentstore.export_all_for_course(
+                self.course1_key, root_dir / 'static',
+                path.Path(root_dir / "assets.json"),
+            )
+            with patch('xmodule.contentstore.mongo.EXPORT_PREFETCH_MAX_BYTES', prefetch_max_bytes):
+                with tarfile.open(fileobj=tar_buffer, mode='w|gz') as tar_file:
+                    self.contentstore.export_all_for_course_to_tar(self.course1_key, tar_file, 'course')
+
+            tar_buffer.seek(0)
+            with tarfile.open(fileobj=tar_buffer) as tar_file:
+                assert sorted(tar_file.getnames()) == sorted(
+                    ['course/policies/assets.json'] + [f'course/static/{filename}' for filename in self.course1_files]
+                )
+                for filename in self.course1_files:
+                    exported = tar_file.extractfile(f'course/static/{filename}').read()
+                    assert exported == path.Path(root_dir / 'static' / filename).read_bytes()
+                policy = json.load(tar_file.extractfile('course/policies/assets.json'))
+                assert policy == json.loads(path.Path(root_dir / 'assets.json').read_text())
+        finally:
+            shutil.rmtree(root_dir)
+
     @ddt.data(True, False)
     def test_get_all_content(self, deprecated):
         """
@@ -0,0 +1,125 @@
+"""
+Tests for the SharedMemoryCache backend.
+"""
+
+
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from xmodule.modulestore.split_mongo.shared_memory_cache import SharedMemoryCache
+
+
+class TestSharedMemoryCache(unittest.TestCase):
+    """
+    Tests for SharedMemoryCache
+    """
+    def setUp(self):
+        super().setUp()
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.cache = self._create_cache()
+
+    def _create_cache(self, max_size=1024 * 1024):
+        """
+        Returns a cache backed by the test's directory.
+        """
+        return SharedMemoryCache(self.location, {'TIMEOUT': None, 'OPTIONS': {'MAX_SIZE': max_size}})
+
+    def test_bytes_value(self):
+        self.cache.set('key', b'value')
+        assert self.cache.get('key') == b'value'
+        with self.cache.read_buffer('key') as buffer:
+            assert buffer.readonly
+            assert buffer == b'value'
+
+    def test_pickled_value(self):
+        self.cache.set('key', {'field': 'value'})
+        assert self.cache.get('key') == {'field': 'value'}
+        # Only bytes values can be read without a copy.
+        assert self.cache.read_buffer('key') is None
+
+    def test_missing_value(self):
+        assert self.cache.get('key') is None
+        assert self.cache.get('key', 'default') == 'default'
+        assert self.cache.read_buffer('key') is None
+        assert not self.cache.has_key('key')
+
+    def test_shared_between_instances(self):
+        structure = pickle.dumps({'blocks': list(range(100))}, 4)
+        self.cache.set('structure', structure)
+        with self._create_cache().read_buffer('structure') as buffer:
+            assert pickle.loads(buffer) == {'blocks': list(range(100))}
+
+    def test_timeout(self):
+        self.cache.set('expired', b'value', 0)
+        self.cache.set('unexpired', b'value', 60)
+        assert self.cache.get('expired') is None
+        assert self.cache.get('unexpired') == b'value'
+
+    def test_add_and_delete(self):
+        assert self.cache.add('key', b'value')
+        assert not self.cache.add('key', b'other value')
+        assert self.cache.get('key') == b'value'
+        assert self.cache.delete('key')
+        assert not self.cache.delete('key')
+        assert self.cache.get('key') is None
+
+    def test_clear(self):
+        self.cache.set('key', b'value')
+        self.cache.clear()
+        assert self.cache.get('key') is None
+        assert not os.listdir(self.location)
+
+    def test_evicts_least_recently_used(self):
+        cache = self._create_cache(max_size=2500)
+        cache.set('first', b'x' * 1000)
+        time.sleep(0.01)
+        cache.set('second', b'x' * 1000)
+        time.sleep(0.01)
+        assert cache.get('first') is not None
+        time.sleep(0.01)
+
+        cache.set('third', b'x' * 1000)
+        assert cache.has_key('first')
+        assert not cache.has_key('second')
+        assert cache.has_key('third')
+
+    def test_culls_after_writing_a_fraction_of_the_budget(self):
+        cache = self._create_cache(max_size=100000)
+        with patch.object(SharedMemoryCache, '_cull', autospec=True, side_effect=SharedMemoryCache._cull) as mock_cull:
+            for index in range(4):
+                cache.set(f'key{index}', b'x' * 1000)
+            mock_cull.assert_not_called()
+            cache.set('large', b'x' * 5000)
+            mock_cull.assert_called_once_with(cache)
+
+    def test_failed_write_removes_temporary_file(self):
+        with patch('os.replace', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.cache.set('key', b'value')
+        with patch('os.replace', side_effect=OSError):
+            self.cache.set('key', b'value')
+        assert not os.listdir(self.location)
+
+    def test_cull_deletes_stale_temporary_files(self):
+        stale_fd, stale_path = tempfile.mkstemp(dir=self.location, prefix='tmp-')
+        os.close(stale_fd)
+        os.utime(stale_path, (time.time() - 2 * 60 * 60,) * 2)
+        recent_fd, recent_path = tempfile.mkstemp(dir=self.location, prefix='tmp-')
+        os.close(recent_fd)
+
+        self.cache._cull()  # pylint: disable=protected-access
+        assert not os.path.exists(stale_path)
+        assert os.path.exists(recent_path)
+
+    def test_evicted_buffer_stays_valid(self):
+        self.cache.set('key', b'value')
+        buffer = self.cache.read_buffer('key')
+        self.cache.delete('key')
+        assert buffer == b'value'
+        buffer.release()
@@ -5,6 +5,7 @@
 
 import datetime
 import os
+import pickle
 import random
 import re
 import unittest
@@ -35,11 +36,12 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.shared_memory_cache import SharedMemoryCache
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
-from xmodule.modulestore.tests.utils import mock_tab_from_json
+from xmodule.modulestore.tests.utils import MemoryCache, mock_tab_from_json
 from xmodule.x_module import XModuleMixin
 
 BRANCH_NAME_DRAFT = ModuleStoreEnum.BranchName.draft
@@ -893,6 +895,28 @@ class TestCourseStructureCache(CacheIsolationMixin, SplitModuleTest):
         # now make sure that you get the same structure
         assert cached_structure == not_cached_structure
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_shared_memory_cache(self, mock_get_cache):
+        shared_memory_cache = SharedMemoryCache(tempdir.mkdtemp_clean(), {'TIMEOUT': None})
+        mock_get_cache.return_value = shared_memory_cache
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # the structure is cached uncompressed, and read back from the shared cache
+        cache_key = self.new_course.id.version_guid
+        with shared_memory_cache.read_buffer(cache_key) as pickled_structure:
+            assert pickle.loads(pickled_structure) == not_cached_structure
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+        assert cached_structure == not_cached_structure
+
+        # If data is corrupted, get it from mongo again.
+        shared_memory_cache.set(cache_key, b"bad_data")
+        with check_mongo_calls(1):
+            not_corrupt_structure = self._get_structure(self.new_course)
+        assert not_corrupt_structure == not_cached_structure
+
     def test_dummy_cache(self):
         with check_mongo_calls(1):
             not_cached_structure = self._get_structure(self.new_course)
@@ -1105,6 +1129,37 @@ class SplitModuleItemTests(SplitModuleTest):
         matches = modulestore().get_items(locator, settings={'group_access': {'$exists': False}})
         assert len(matches) == 7
 
+    def test_get_items_indexed(self):
+        """
+        get_items finds the same items, in the same order, with and without the structure indexes
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        for kwargs in (
+            {'qualifiers': {'category': 'chapter'}},
+            {'qualifiers': {'category': {'$in': ['chapter', 'problem']}}},
+            {'qualifiers': {'category': 'chapter'}, 'settings': {'display_name': re.compile(r'Hera')}},
+            {'qualifiers': {'name': 'chapter1'}},
+            {'qualifiers': {'name': ['chapter1', 'chapter2']}},
+            {'qualifiers': {'children': BlockKey('chapter', 'chapter1')}},
+            {'qualifiers': {'category': 'course', 'children': BlockKey('chapter', 'chapter2')}},
+            {'qualifiers': {'category': 'garbage'}},
+        ):
+            with patch.object(SplitMongoModuleStore, '_find_candidate_block_keys', return_value=None):
+                expected = [item.location for item in modulestore().get_items(locator, **kwargs)]
+            with patch.object(modulestore(), 'request_cache', MemoryCache()):
+                assert [item.location for item in modulestore().get_items(locator, **kwargs)] == expected, kwargs
+
+        course = modulestore()._lookup_course(locator)  # pylint: disable=protected-access
+        # The structures are only indexed for requests, as the indexes are cached for them.
+        assert modulestore()._get_structure_index(locator, course.structure) is None  # pylint: disable=protected-access
+        with patch.object(modulestore(), 'request_cache', MemoryCache()):
+            structure_index = modulestore()._get_structure_index(  # pylint: disable=protected-access
+                locator, course.structure
+            )
+        assert structure_index is not None
+        assert len(structure_index.keys_by_type['chapter']) == 4
+        assert structure_index.parents_by_child[BlockKey('chapter', 'chapter1')] == [BlockKey('course', 'head12345')]
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
@@ -1126,6 +1181,29 @@ class SplitModuleItemTests(SplitModuleTest):
         parent = modulestore().get_parent_location(locator)
         assert parent is None
 
+    def test_paths_to_root_indexed(self):
+        """
+        has_path_to_root, get_parent_location and get_orphans give the same answers with and without the
+        structure indexes
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        modulestore().create_item(self.user_id, locator, 'html', block_id='orphan_html')
+        course = modulestore()._lookup_course(locator)  # pylint: disable=protected-access
+        block_keys = list(course.structure['blocks']) + [BlockKey('chapter', 'nosuchblock')]
+
+        def paths_to_root():
+            return (
+                [modulestore().has_path_to_root(block_key, course) for block_key in block_keys],
+                [modulestore().get_parent_location(locator.make_usage_key(*block_key)) for block_key in block_keys],
+                set(modulestore().get_orphans(locator)),
+            )
+
+        with patch.object(SplitMongoModuleStore, '_get_structure_index', return_value=None):
+            expected = paths_to_root()
+        with patch.object(modulestore(), 'request_cache', MemoryCache()):
+            assert paths_to_root() == expected
+        assert locator.make_usage_key('html', 'orphan_html') in expected[2]
+
     @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
     def test_get_children(self, _from_json):
         """
@@ -1455,6 +1533,30 @@ class TestItemCrud(SplitModuleTest):
         assert history_info['previous_version'] == pre_version_guid
         assert history_info['edited_by'] == self.user_id
 
+    def test_version_structure_shares_unchanged_blocks(self):
+        """
+        test that a new version of a structure shares the blocks of the old one until they're edited
+        """
+        course_key = CourseLocator(org='testx', course='GreekHero', run='run', branch=BRANCH_NAME_DRAFT)
+        structure = modulestore()._lookup_course(course_key).structure  # pylint: disable=protected-access
+        original_blocks = dict(structure['blocks'])
+        new_structure = modulestore().version_structure(course_key, structure, self.user_id)
+
+        edited_key = BlockKey('problem', 'problem3_2')
+        new_structure['blocks'][edited_key].fields['display_name'] = 'edited'
+        assert structure['blocks'][edited_key].fields.get('display_name') != 'edited', 'original changed'
+        new_blocks = dict(new_structure['blocks'].items())
+        assert new_blocks[edited_key] is not original_blocks[edited_key]
+        for block_key, block in original_blocks.items():
+            if block_key != edited_key:
+                assert new_blocks[block_key] is block
+
+        # the structure cache pickles structures as plain dicts
+        unpickled = pickle.loads(pickle.dumps(new_structure))
+        assert type(unpickled['blocks']) is dict  # pylint: disable=unidiomatic-typecheck
+        assert set(unpickled['blocks']) == set(original_blocks)
+        assert unpickled['blocks'][edited_key].fields['display_name'] == 'edited'
+
     def test_update_children(self):
         """
         test updating an item's children ensuring the definition doesn't version but the course does if it should
@@ -4,11 +4,13 @@ Methods for exporting course data to XML
 
 
 import logging
-import os
+import tarfile
+import time
 from abc import abstractmethod
 from json import dumps
 
 import lxml.etree
+from fs.memoryfs import MemoryFS
 from fs.osfs import OSFS
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict, Scope
@@ -105,7 +107,7 @@ class ExportManager:
     """
     Manages XML exporting for courselike objects.
     """
-    def __init__(self, modulestore, contentstore, courselike_key, root_dir, target_dir):
+    def __init__(self, modulestore, contentstore, courselike_key, root_dir, target_dir, tar_file=None):
         """
         Export all modules from `modulestore` and content from `contentstore` as xml to `root_dir`.
 
@@ -114,12 +116,16 @@ class ExportManager:
         `courselike_key`: The Locator of the Descriptor to export
         `root_dir`: The directory to write the exported xml to
         `target_dir`: The name of the directory inside `root_dir` to write the content to
+        `tar_file`: A `tarfile.TarFile` opened for writing to add the export to instead of writing it
+            to `root_dir`, which is then ignored. The static assets are streamed into it as they are
+            exported, and the xml is added to it once it is fully exported.
         """
         self.modulestore = modulestore
         self.contentstore = contentstore
         self.courselike_key = courselike_key
         self.root_dir = root_dir
         self.target_dir = str(target_dir)
+        self.tar_file = tar_file
 
     @abstractmethod
     def get_key(self):
@@ -143,6 +149,45 @@ class ExportManager:
         Perform any final processing after the other export tasks are done.
         """
 
+    def export_static_content(self, root_courselike_dir):
+        """
+        Export the static assets, and their policy file, to `root_courselike_dir`.
+        """
+        if not self.contentstore:
+            return
+        if self.tar_file is not None:
+            self.contentstore.export_all_for_course_to_tar(self.courselike_key, self.tar_file, root_courselike_dir)
+        else:
+            self.contentstore.export_all_for_course(
+                self.courselike_key,
+                root_courselike_dir + '/static/',
+                root_courselike_dir + '/policies/assets.json',
+            )
+
+    def add_to_tar_file(self, fsm):
+        """
+        Add the files exported to `fsm` to the tar file.
+
+        The files which were also exported as static assets, like video transcripts, are skipped, as
+        the static assets overwrite them when exporting to disk.
+        """
+        mtime = time.time()
+        added_names = set(self.tar_file.getnames())
+        for dir_path in fsm.walk.dirs():
+            tarinfo = tarfile.TarInfo(dir_path.lstrip('/'))
+            tarinfo.type = tarfile.DIRTYPE
+            tarinfo.mode = 0o755
+            tarinfo.mtime = mtime
+            self.tar_file.addfile(tarinfo)
+        for file_path in fsm.walk.files():
+            if file_path.lstrip('/') in added_names:
+                continue
+            tarinfo = tarfile.TarInfo(file_path.lstrip('/'))
+            tarinfo.size = fsm.getsize(file_path)
+            tarinfo.mtime = mtime
+            with fsm.openbin(file_path) as exported_file:
+                self.tar_file.addfile(tarinfo, exported_file)
+
     @abstractmethod
     def get_courselike(self):
         """
@@ -155,7 +200,7 @@ class ExportManager:
         """
         with self.modulestore.bulk_operations(self.courselike_key):
 
-            fsm = OSFS(self.root_dir)
+            fsm = MemoryFS() if self.tar_file is not None else OSFS(self.root_dir)
             root = lxml.etree.Element('unknown')
 
             # export only the published content
@@ -173,12 +218,18 @@ class ExportManager:
             self.process_root(root, export_fs)
 
             # Process extra items-- drafts, assets, etc
-            root_courselike_dir = self.root_dir + '/' + self.target_dir
+            if self.tar_file is not None:
+                root_courselike_dir = self.target_dir
+            else:
+                root_courselike_dir = self.root_dir + '/' + self.target_dir
             self.process_extra(root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs)
 
             # Any last pass adjustments
             self.post_process(root, export_fs)
 
+            if self.tar_file is not None:
+                self.add_to_tar_file(fsm)
+
 
 class CourseExportManager(ExportManager):
     """
@@ -203,27 +254,20 @@ class CourseExportManager(ExportManager):
 
     def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
         # Export the modulestore's asset metadata.
-        asset_dir = root_courselike_dir + '/' + AssetMetadata.EXPORTED_ASSET_DIR + '/'
-        if not os.path.isdir(asset_dir):
-            os.makedirs(asset_dir)
+        asset_dir = export_fs.makedir(AssetMetadata.EXPORTED_ASSET_DIR, recreate=True)
         asset_root = lxml.etree.Element(AssetMetadata.ALL_ASSETS_XML_TAG)
         course_assets = self.modulestore.get_all_asset_metadata(self.courselike_key, None)
         for asset_md in course_assets:
             # All asset types are exported using the "asset" tag - but their asset type is specified in each asset key.
             asset = lxml.etree.SubElement(asset_root, AssetMetadata.ASSET_XML_TAG)
             asset_md.to_xml(asset)
-        with OSFS(asset_dir).open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
+        with asset_dir.open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
             lxml.etree.ElementTree(asset_root).write(asset_xml_file, encoding='utf-8')
 
         # export the static assets
         policies_dir = export_fs.makedir('policies', recreate=True)
+        self.export_static_content(root_courselike_dir)
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
-            )
-
             # If we are using the default course image, export it to the
             # legacy location to support backwards compatibility.
             if courselike.course_image == courselike.fields['course_image'].default:
@@ -237,10 +281,8 @@ class CourseExportManager(ExportManager):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_courselike_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                    output_dir = export_fs.makedirs('static/images', recreate=True)
+                    with output_dir.open('course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
@@ -315,13 +357,7 @@ class LibraryExportManager(ExportManager):
         """
         # export the static assets
         export_fs.makedir('policies', recreate=True)
-
-        if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
-            )
+        self.export_static_content(root_courselike_dir)
 
     def post_process(self, root, export_fs):
         """
@@ -350,6 +386,20 @@ def export_library_to_xml(modulestore, contentstore, library_key, root_dir, libr
     LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
 
 
+def export_course_to_tarball(modulestore, contentstore, course_key, tar_file, course_dir):
+    """
+    Thin wrapper for the Course Export Manager, exporting to a tar file. See ExportManager for details.
+    """
+    CourseExportManager(modulestore, contentstore, course_key, None, course_dir, tar_file=tar_file).export()
+
+
+def export_library_to_tarball(modulestore, contentstore, library_key, tar_file, library_dir):
+    """
+    Thin wrapper for the Library Export Manager, exporting to a tar file. See ExportManager for details.
+    """
+    LibraryExportManager(modulestore, contentstore, library_key, None, library_dir, tar_file=tar_file).export()
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
@@ -27,6 +27,9 @@ import mimetypes
 import os
 import re
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import time
 
 import xblock
 from django.utils.translation import gettext as _
@@ -60,6 +63,11 @@ log = logging.getLogger(__name__)
 
 DEFAULT_STATIC_CONTENT_SUBDIR = 'static'
 
+# In pipelined imports, the number of static files uploaded concurrently, and the number of
+# blocks whose definitions are written to the modulestore at once.
+STATIC_CONTENT_IMPORT_WORKERS = 8
+IMPORT_BATCH_SIZE = 500
+
 
 class CourseImportException(Exception):
     """
@@ -117,10 +125,12 @@ class LocationMixin(XBlockMixin):
 
 
 class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docstring
-    def __init__(self, static_content_store, course_data_path, target_id):
+    def __init__(self, static_content_store, course_data_path, target_id, executor=None):
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        # If specified, the concurrent.futures.Executor used to import the static files concurrently
+        self.executor = executor
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -137,6 +147,7 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -150,12 +161,19 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
                 if verbose:
                     log.debug('importing static content %s...', file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+                file_paths.append(file_path)
+
+        import_static_file = partial(self.import_static_file, base_dir=static_dir)
+        if self.executor is None:
+            imported_files_attrs = map(import_static_file, file_paths)
+        else:
+            imported_files_attrs = self.executor.map(import_static_file, file_paths)
 
-                if imported_file_attrs:
-                    # store the remapping information which will be needed
-                    # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+        for imported_file_attrs in imported_files_attrs:
+            if imported_file_attrs:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
 
         return remap_dict
 
@@ -255,6 +273,15 @@ class ImportManager:
             create this file to implement custom logic in their course.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        pipelined: if True, import the static content in the background, uploading its files concurrently,
+            while the OLX is parsed (when the courselike is imported into an existing one) and its blocks
+            are imported, and write the definitions of the imported blocks in batches of IMPORT_BATCH_SIZE
+            rather than all at once at the end of the import.
+
+        progress_callback: if specified, called with the name and the duration in seconds of each stage of
+            the import as it completes: 'Parsing', 'Importing static content', 'Importing blocks' and
+            'Importing drafts'.
     """
     store_class = XMLModuleStore
 
@@ -267,6 +294,7 @@ class ImportManager:
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
             python_lib_filename='python_lib.zip',
+            pipelined=False, progress_callback=None,
     ):
         self.store = store
         self.user_id = user_id
@@ -282,6 +310,19 @@ class ImportManager:
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
+        self.pipelined = pipelined
+        self.progress_callback = progress_callback
+        self._executor = None
+        self._static_import = None
+        self._num_imported_blocks = 0
+        if pipelined:
+            # One more worker runs the static content import itself.
+            self._executor = ThreadPoolExecutor(STATIC_CONTENT_IMPORT_WORKERS + 1)
+            dest_id = self.get_existing_dest_id()
+            if dest_id is not None and source_dirs is not None and len(source_dirs) == 1:
+                self._start_import_static(path(data_dir) / source_dirs[0], dest_id)
+
+        start_time = time()
         self.xml_module_store = self.store_class(
             data_dir,
             default_class=default_class,
@@ -291,8 +332,44 @@ class ImportManager:
             xblock_select=store.xblock_select,
             target_course_id=target_id,
         )
+        self._report_stage('Parsing', time() - start_time)
         self.logger, self.errors = make_error_tracker()
 
+    def _report_stage(self, stage, duration):
+        """
+        Report that the given stage of the import has completed.
+        """
+        log.info(f'Course import {self.target_id}: {stage} completed in {duration:.2f}s')
+        if self.progress_callback is not None:
+            self.progress_callback(stage, duration)
+
+    def _start_import_static(self, data_path, dest_id):
+        """
+        Start importing the static content in the background, with its files uploaded concurrently.
+        """
+        def import_static():
+            start_time = time()
+            self.import_static(data_path, dest_id)
+            return time() - start_time
+
+        self._static_import = (data_path, dest_id, self._executor.submit(import_static))
+
+    def _finish_import_static(self):
+        """
+        Wait for the static content import started in the background, and raise its error if any.
+        """
+        _, _, static_import = self._static_import
+        self._static_import = None
+        self._report_stage('Importing static content', static_import.result())
+
+    def _block_imported(self, dest_id):
+        """
+        Write the definitions of the imported blocks every IMPORT_BATCH_SIZE blocks in pipelined imports.
+        """
+        self._num_imported_blocks += 1
+        if self.pipelined and self._num_imported_blocks % IMPORT_BATCH_SIZE == 0:
+            self.store.flush_definitions(dest_id)
+
     def preflight(self):
         """
         Perform any pre-import sanity checks.
@@ -315,7 +392,8 @@ class ImportManager:
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            executor=self._executor,
         )
         if self.do_import_static:
             if self.verbose:
@@ -446,6 +524,13 @@ class ImportManager:
         """
         pass  # lint-amnesty, pylint: disable=unnecessary-pass
 
+    def get_existing_dest_id(self):
+        """
+        Return the key of the existing courselike which will be imported into, if it is known before parsing
+        the OLX, or None.
+        """
+        return None
+
     @abstractmethod
     def get_dest_id(self, courselike_key):
         """
@@ -514,6 +599,7 @@ class ImportManager:
                             f'Course import {dest_id}: failed to import module location {child.location}'
                         )
                         raise ModuleFailedToImport(child.display_name, child.location)  # pylint: disable=raise-missing-from
+                    self._block_imported(dest_id)
 
                     depth_first(child)
 
@@ -539,11 +625,20 @@ class ImportManager:
                 )
                 # pylint: disable=raise-missing-from
                 raise ModuleFailedToImport(leftover.display_name, leftover.location)
+            self._block_imported(dest_id)
 
     def run_imports(self):
         """
         Iterate over the given directories and yield courses.
         """
+        try:
+            yield from self._run_imports()
+        finally:
+            if self._executor is not None:
+                # Don't leave static files being uploaded after the import, even a failed one.
+                self._executor.shutdown()
+
+    def _run_imports(self):  # lint-amnesty, pylint: disable=missing-function-docstring
         self.preflight()
         for courselike_key in self.xml_module_store.modules.keys():
             try:
@@ -553,17 +648,32 @@ class ImportManager:
 
             # This bulk operation wraps all the operations to populate the published branch.
             with self.store.bulk_operations(dest_id):
+                start_time = time()
                 # Retrieve the course itself.
                 source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
 
-                # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                # Import all static pieces, in the background in pipelined imports.
+                if not self.pipelined:
+                    static_start_time = time()
+                    self.import_static(data_path, dest_id)
+                    static_duration = time() - static_start_time
+                    self._report_stage('Importing static content', static_duration)
+                    # The blocks stage doesn't include the static content import.
+                    start_time += static_duration
+                elif self._static_import is None or self._static_import[:2] != (data_path, dest_id):
+                    self._start_import_static(data_path, dest_id)
 
                 # Import asset metadata stored in XML.
                 self.import_asset_metadata(data_path, dest_id)
 
                 # Import all children
                 self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                if self.pipelined:
+                    self.store.flush_definitions(dest_id)
+                self._report_stage('Importing blocks', time() - start_time)
+
+                if self.pipelined:
+                    self._finish_import_static()
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
@@ -571,8 +681,10 @@ class ImportManager:
             # due to the recursive_build() above creating a draft item for each course block
             # and then publishing it.
             with self.store.bulk_operations(dest_id):
+                start_time = time()
                 # Import all draft items into the courselike.
                 courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
+                self._report_stage('Importing drafts', time() - start_time)
 
             yield courselike
 
@@ -595,6 +707,15 @@ class CourseImportManager(ImportManager):
         )
         return source_course, course, course_data_path
 
+    def get_existing_dest_id(self):
+        """
+        Return the target course key if the course exists with this exact key, since get_dest_id
+        would use the key of an existing course which only differs by case.
+        """
+        if self.target_id is not None and self.store.has_course(self.target_id, ignore_case=True) == self.target_id:
+            return self.target_id
+        return None
+
     def get_dest_id(self, courselike_key):
         """
         Get the course key that will be used for the target modulestore.
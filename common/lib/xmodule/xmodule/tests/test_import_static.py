@@ -4,8 +4,10 @@ Tests that check that we ignore the appropriate files when importing courses.
 
 
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 
+import ddt
 from opaque_keys.edx.locator import CourseLocator
 
 from xmodule.modulestore.tests.utils import (
@@ -18,6 +20,7 @@ from xmodule.modulestore.xml_importer import StaticContentImporter
 from xmodule.tests import DATA_DIR
 
 
+@ddt.ddt
 class IgnoredFilesTestCase(unittest.TestCase):
     """
     Tests for ignored files
@@ -31,7 +34,8 @@ class IgnoredFilesTestCase(unittest.TestCase):
             self.addCleanup(remove_temp_files_from_list, list(dictionary.keys()), self.course_dir / "static")
             add_temp_files_from_dict(dictionary, self.course_dir / "static")
 
-    def test_sample_static_files(self):
+    @ddt.data(False, True)
+    def test_sample_static_files(self, concurrently):
         """
         Test for to ensure Mac OS metadata files (filename starts with "._") as well
         as files ending with "~" get ignored, while files starting with "." are not.
@@ -39,10 +43,12 @@ class IgnoredFilesTestCase(unittest.TestCase):
         course_id = CourseLocator("edX", "course_ignore", "2014_Fall")
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
+        executor = ThreadPoolExecutor(2) if concurrently else None
         static_content_importer = StaticContentImporter(
             static_content_store=content_store,
             course_data_path=self.course_dir,
-            target_id=course_id
+            target_id=course_id,
+            executor=executor,
         )
         static_content_importer.import_static_content_directory()
         saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
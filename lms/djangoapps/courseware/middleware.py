@@ -7,6 +7,7 @@ from django.shortcuts import redirect
 from django.utils.deprecation import MiddlewareMixin
 
 from lms.djangoapps.courseware.exceptions import Redirect
+from lms.djangoapps.courseware.model_data import defer_user_state_writes, flush_user_state_writes
 from openedx.core.lib.request_utils import COURSE_REGEX
 
 
@@ -37,3 +38,23 @@ class CacheCourseIdMiddleware(MiddlewareMixin):
 
             if course_id and course_id != request.session.get('course_id'):
                 request.session['course_id'] = course_id
+
+
+class UserStateWriteBehindMiddleware(MiddlewareMixin):
+    """
+    Middleware that defers the writes of the user state of blocks until the end of the request,
+    where the courseware.user_state_write_behind waffle flag is enabled.
+    """
+
+    def process_request(self, request):  # pylint: disable=unused-argument
+        """
+        Defer the user state writes of the request.
+        """
+        defer_user_state_writes()
+
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        """
+        Make the user state writes deferred during the request.
+        """
+        flush_user_state_writes()
+        return response
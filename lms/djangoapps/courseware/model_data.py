@@ -26,23 +26,33 @@ import json
 import logging
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict, namedtuple
+from time import time
 
+from django.conf import settings
 from django.db import DatabaseError, IntegrityError, transaction
+from edx_django_utils import monitoring as monitoring_utils
+from edx_django_utils.cache import RequestCache
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
-from opaque_keys.edx.keys import LearningContextKey
-from xblock.core import XBlockAside
+from opaque_keys.edx.keys import CourseKey, LearningContextKey
+from xblock.core import XBlock, XBlockAside
 from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
-from xblock.fields import Scope, UserScope
-from xblock.runtime import KeyValueStore
+from xblock.fields import BlockScope, Scope, ScopeIds, UserScope
+from xblock.runtime import KeyValueStore, Mixologist
 
+from lms.djangoapps.courseware.toggles import COURSEWARE_USER_STATE_WRITE_BEHIND
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from xmodule.modulestore.django import modulestore
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
 
 log = logging.getLogger(__name__)
 
+# The request cache holding the Scope.user_state writes deferred until the end of the request.
+DEFERRED_USER_STATE_NAMESPACE = 'courseware.model_data.deferred_user_state'
+_DEFERRED_WRITES_KEY = 'writes'
+
 
 class InvalidWriteError(Exception):
     """
@@ -51,6 +61,57 @@ class InvalidWriteError(Exception):
     """
 
 
+def defer_user_state_writes():
+    """
+    Defer the Scope.user_state writes of the current request until flush_user_state_writes
+    is called, in the courses where the courseware.user_state_write_behind waffle flag is
+    enabled. The writes to each block are coalesced, and all of them are made in bulk.
+
+    Writes to blocks that have a score are never deferred.
+    """
+    RequestCache(DEFERRED_USER_STATE_NAMESPACE).set(_DEFERRED_WRITES_KEY, {})
+
+
+def _deferred_user_state_writes(user, client):
+    """
+    Returns the dict of the Scope.user_state writes of `user` deferred in the current request,
+    mapping usage keys to state dicts, or None if writes aren't deferred.
+    """
+    cached_response = RequestCache(DEFERRED_USER_STATE_NAMESPACE).get_cached_response(_DEFERRED_WRITES_KEY)
+    if not cached_response.is_found:
+        return None
+    _, writes = cached_response.value.setdefault(user.username, (client, {}))
+    return writes
+
+
+def flush_user_state_writes():
+    """
+    Make the Scope.user_state writes deferred since defer_user_state_writes was called, and
+    stop deferring them.
+    """
+    request_cache = RequestCache(DEFERRED_USER_STATE_NAMESPACE)
+    cached_response = request_cache.get_cached_response(_DEFERRED_WRITES_KEY)
+    if not cached_response.is_found:
+        return
+    request_cache.delete(_DEFERRED_WRITES_KEY)
+
+    start_time = time()
+    num_blocks = 0
+    for username, (client, block_keys_to_state) in cached_response.value.items():
+        if not block_keys_to_state:
+            continue
+        num_blocks += len(block_keys_to_state)
+        try:
+            client.bulk_set_many(username, block_keys_to_state)
+        except DatabaseError:
+            log.exception("Saving deferred user state failed for %s", username)
+            monitoring_utils.accumulate('xb_user_state.write_behind.failures', 1)
+
+    if num_blocks:
+        monitoring_utils.accumulate('xb_user_state.write_behind.blocks', num_blocks)
+        monitoring_utils.accumulate('xb_user_state.write_behind.flush_duration', (time() - start_time) * 1000)
+
+
 def _all_usage_keys(descriptors, aside_types):
     """
     Return a set of all usage_ids for the `descriptors` and for
@@ -82,6 +143,48 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+class _BlockStructureBlock:
+    """
+    Stands in for the block at a usage key in a FieldDataCache, which only
+    needs the scope ids and the fields of the blocks it caches data for, so
+    that data can be cached without loading the blocks from the modulestore.
+    """
+    _mixologist = None
+
+    def __init__(self, usage_key, block_type=None, has_score=None):
+        """
+        Arguments:
+            usage_key: The usage key of the block, or None to only cache the data of its block type
+            block_type: The block type, if usage_key is None
+            has_score: Whether the block has a score, as collected in the block structure, or
+                None if it wasn't collected
+        """
+        block_type = usage_key.block_type if usage_key is not None else block_type
+        self.location = usage_key
+        self.scope_ids = ScopeIds(None, block_type, None, usage_key)
+        block_class = self._mixed_class(block_type)
+        self.entry_point = block_class.entry_point
+        self.fields = block_class.fields
+        if has_score is None:
+            # has_score is a field of some blocks, whose value isn't known without the
+            # block, so they are assumed to have a score.
+            has_score = getattr(block_class, 'has_score', False)
+        self.has_score = bool(has_score)
+
+    @classmethod
+    def _mixed_class(cls, block_type):
+        """
+        Returns the class of the blocks of the given type, with the mixins the
+        modulestore adds to them, or XBlock for unknown block types.
+        """
+        if cls._mixologist is None:
+            cls._mixologist = Mixologist(getattr(settings, 'XBLOCK_MIXINS', ()))
+        block_class = XBlock.load_class(
+            block_type, default=XBlock, select=getattr(settings, 'XBLOCK_SELECT_FUNCTION', None),
+        )
+        return cls._mixologist.mix(block_class)
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -334,11 +437,14 @@ class UserStateCache:
     """
     Cache for Scope.user_state xblock field data.
     """
-    def __init__(self, user, course_id):
+    def __init__(self, user, course_id, scorable_locations=frozenset()):
         self._cache = defaultdict(dict)
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
+        # Only the writes to the blocks cached by cache_fields which have no score are deferred.
+        self._scorable_locations = scorable_locations
+        self._cached_usage_keys = set()
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -350,12 +456,29 @@ class UserStateCache:
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        usage_keys = _all_usage_keys(xblocks, aside_types)
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            usage_keys,
         )
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
+        self._cached_usage_keys.update(usage_keys)
+
+        deferred_writes = self._deferred_writes()
+        for usage_key in usage_keys.intersection(deferred_writes or ()):
+            self._cache[usage_key].update(deferred_writes[usage_key])
+
+    def _deferred_writes(self):
+        """
+        Returns the dict of the writes of the user deferred until the end of the request,
+        mapping usage keys to state dicts, or None if writes aren't deferred in this course.
+        """
+        if not isinstance(self.course_id, CourseKey) or not COURSEWARE_USER_STATE_WRITE_BEHIND.is_enabled(
+            self.course_id
+        ):
+            return None
+        return _deferred_user_state_writes(self.user, self._client)
 
     def set(self, kvs_key, value):
         """
@@ -399,6 +522,18 @@ class UserStateCache:
 
             pending_updates[cache_key][kvs_key.field_name] = value
 
+        deferred_writes = self._deferred_writes()
+        if deferred_writes is not None and not self.user.is_anonymous:
+            for cache_key in list(pending_updates):
+                if cache_key not in self._cached_usage_keys or cache_key in self._scorable_locations:
+                    # Also write any state of the block deferred by another FieldDataCache.
+                    pending_updates[cache_key] = {**deferred_writes.pop(cache_key, {}), **pending_updates[cache_key]}
+                else:
+                    deferred_writes.setdefault(cache_key, {}).update(pending_updates[cache_key])
+                    self._cache[cache_key].update(pending_updates.pop(cache_key))
+            if not pending_updates:
+                return
+
         try:
             self._client.set_many(
                 self.user.username,
@@ -444,6 +579,10 @@ class UserStateCache:
         if kvs_key.field_name not in field_state:
             raise KeyError(kvs_key.field_name)
 
+        deferred_writes = self._deferred_writes()
+        if deferred_writes and cache_key in deferred_writes:
+            deferred_writes[cache_key].pop(kvs_key.field_name, None)
+
         self._client.delete(self.user.username, cache_key, fields=[kvs_key.field_name])
         del field_state[kvs_key.field_name]
 
@@ -689,10 +828,12 @@ class FieldDataCache:
         self.user = user
         self.read_only = read_only
 
+        self.scorable_locations = set()
         self.cache = {
             Scope.user_state: UserStateCache(
                 self.user,
                 self.course_id,
+                self.scorable_locations,
             ),
             Scope.user_info: UserInfoCache(
                 self.user,
@@ -704,13 +845,18 @@ class FieldDataCache:
                 self.course_id,
             ),
         }
-        self.scorable_locations = set()
+        self._cached_usage_keys = set()
+        self._cached_block_types = set()
+        # Whether to cache the data of blocks when it is first accessed, see add_block_structure_descendents.
+        self._cache_missing_blocks = False
         self.add_descriptors_to_cache(descriptors)
 
     def add_descriptors_to_cache(self, descriptors):
         """
         Add all `descriptors` to this FieldDataCache.
         """
+        self._cached_usage_keys.update(desc.scope_ids.usage_id for desc in descriptors)
+        self._cached_block_types.update(desc.scope_ids.block_type for desc in descriptors)
         if self.user.is_authenticated:
             self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
             for scope, fields in self._fields_to_cache(descriptors).items():
@@ -776,6 +922,87 @@ class FieldDataCache:
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
+    def add_block_structure_descendents(self, usage_key, depth=None):
+        """
+        Add all descendants of the block at `usage_key` to this FieldDataCache, as they
+        are in the collected block structure of the course, without loading them from
+        the modulestore. This makes one query per scope for all the descendants.
+
+        The block structure is only updated some time after the course is published,
+        and does not include the blocks required by conditional blocks, so the data of
+        any other block is then cached when it is first accessed.
+
+        Arguments:
+            usage_key: The usage key of the block
+            depth is the number of levels of descendant modules to load StudentModules for, in addition to
+                the supplied block. If depth is None, load all descendant StudentModules
+
+        Returns whether the block is in the block structure.  If it isn't, nothing is cached.
+        """
+        block_structure = get_course_in_cache(usage_key.course_key)
+        if usage_key not in block_structure:
+            return False
+
+        usage_keys = []
+        level = [usage_key]
+        while level and (depth is None or depth >= 0):
+            usage_keys.extend(level)
+            level = [child for parent in level for child in block_structure.get_children(parent)]
+            depth = depth - 1 if depth is not None else depth
+
+        self._add_block_structure_blocks(usage_keys, block_structure)
+        return True
+
+    @classmethod
+    def cache_for_block_structure_descendents(cls, course_id, user, descriptor, depth=None,
+                                              asides=None, read_only=False):
+        """
+        Same as cache_for_descriptor_descendents, but caches the data of the descendants
+        of the descriptor as they are in the collected block structure of the course, see
+        add_block_structure_descendents.  Falls back on the descendants of the descriptor
+        if it isn't in the block structure.
+        """
+        cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only)
+        if not cache.add_block_structure_descendents(descriptor.location, depth):
+            cache.add_descriptor_descendents(descriptor, depth)
+        return cache
+
+    def _add_block_structure_blocks(self, usage_keys, block_structure=None):
+        """
+        Add the blocks at `usage_keys` to this FieldDataCache, and from then on cache the
+        data of any other block when it is first accessed.
+
+        The blocks have the has_score values collected in `block_structure`, if given.
+        """
+        self._cache_missing_blocks = True
+        self.add_descriptors_to_cache([
+            _BlockStructureBlock(
+                usage_key,
+                has_score=block_structure.get_xblock_field(usage_key, 'has_score') if block_structure else None,
+            )
+            for usage_key in usage_keys
+        ])
+
+    def _cache_missing_block(self, key):
+        """
+        Cache the data of the block of `key` if it isn't cached yet, once data has been
+        cached from a block structure, which may not include all the blocks.
+        """
+        if not self._cache_missing_blocks:
+            return
+
+        if key.scope.block == BlockScope.USAGE:
+            usage_key = getattr(key.block_scope_id, 'usage_key', key.block_scope_id)
+            if usage_key not in self._cached_usage_keys:
+                self._add_block_structure_blocks([usage_key])
+        elif key.scope.block == BlockScope.TYPE and key.block_scope_id not in self._cached_block_types:
+            # Preferences are keyed by block type only.
+            self._cached_block_types.add(key.block_scope_id)
+            if self.user.is_authenticated:
+                block = _BlockStructureBlock(None, key.block_scope_id)
+                fields = [field for field in block.fields.values() if field.scope == Scope.preferences]
+                self.cache[Scope.preferences].cache_fields(fields, [block], self.asides)
+
     def _fields_to_cache(self, descriptors):
         """
         Returns a map of scopes to fields in that scope that should be cached
@@ -805,6 +1032,7 @@ class FieldDataCache:
         if key.scope not in self.cache:
             raise KeyError(key.field_name)
 
+        self._cache_missing_block(key)
         return self.cache[key.scope].get(key)
 
     def set_many(self, kv_dict):
@@ -831,6 +1059,7 @@ class FieldDataCache:
             if key.scope not in self.cache:
                 continue
 
+            self._cache_missing_block(key)
             by_scope[key.scope][key] = value
 
         for scope, set_many_data in by_scope.items():
@@ -863,6 +1092,7 @@ class FieldDataCache:
         if key.scope not in self.cache:
             raise KeyError(key.field_name)
 
+        self._cache_missing_block(key)
         self.cache[key.scope].delete(key)
 
     def has(self, key):
@@ -883,6 +1113,7 @@ class FieldDataCache:
         if key.scope not in self.cache:
             return False
 
+        self._cache_missing_block(key)
         return self.cache[key.scope].has(key)
 
     def last_modified(self, key):
@@ -902,6 +1133,7 @@ class FieldDataCache:
         if key.scope not in self.cache:
             return None
 
+        self._cache_missing_block(key)
         return self.cache[key.scope].last_modified(key)
 
     def __len__(self):
@@ -43,6 +43,7 @@ from xblock.runtime import KvsFieldData
 from common.djangoapps import static_replace
 from common.djangoapps.xblock_django.constants import ATTR_KEY_USER_ID
 from capa.xqueue_interface import XQueueInterface
+from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.courseware.access import get_user_role, has_access
 from lms.djangoapps.courseware.entrance_exams import user_can_skip_entrance_exam, user_has_passed_entrance_exam
 from lms.djangoapps.courseware.masquerade import (
@@ -54,6 +55,7 @@ from lms.djangoapps.courseware.masquerade import (
 from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
 from lms.djangoapps.courseware.services import UserStateService
+from lms.djangoapps.courseware.toggles import COURSEWARE_PREFETCH_FROM_BLOCK_STRUCTURE
 from lms.djangoapps.grades.api import GradesUtilService
 from lms.djangoapps.grades.api import signals as grades_signals
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
@@ -91,6 +93,7 @@ from common.djangoapps.util import milestones_helpers
 from common.djangoapps.util.json_request import JsonResponse
 from common.djangoapps.edxmako.services import MakoService
 from common.djangoapps.xblock_django.user_service import DjangoXBlockUserService
+from xmodule.block_metadata_utils import display_name_with_default_escaped
 from xmodule.contentstore.django import contentstore
 from xmodule.error_module import ErrorBlock, NonStaffErrorBlock
 from xmodule.exceptions import NotFoundError, ProcessingError
@@ -172,81 +175,128 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
         if course_module is None:
             return None, None, None
 
-        toc_chapters = []
-        chapters = course_module.get_display_items()
+        return _toc_for_chapters(user, course, course_module.get_display_items(), active_chapter, active_section)
 
-        # Check for content which needs to be completed
-        # before the rest of the content is made available
-        required_content = milestones_helpers.get_required_content(course.id, user)
 
-        # The user may not actually have to complete the entrance exam, if one is required
-        if user_can_skip_entrance_exam(user, course):
-            required_content = [content for content in required_content if not content == course.entrance_exam_id]
+def toc_for_course_blocks(user, course, active_chapter, active_section):
+    """
+    Create the same table of contents as toc_for_course, from the chapters and sections of
+    the course blocks the user has access to, as transformed from the cached block structure
+    of the course, without binding any of them to the user.
+    """
+    course_blocks = get_course_blocks(user, course.location)
+    if course.location not in course_blocks:
+        return None, None, None
 
-        previous_of_active_section, next_of_active_section = None, None
-        last_processed_section, last_processed_chapter = None, None
-        found_active_section = False
-        for chapter in chapters:
-            # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (bool)
-            # xss-lint: disable=python-deprecated-display-name
-            display_id = slugify(chapter.display_name_with_default_escaped)
-            local_hide_from_toc = False
-            if required_content:
-                if str(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
+    chapters = [_TocBlock(course_blocks, chapter_key) for chapter_key in course_blocks.get_children(course.location)]
+    return _toc_for_chapters(user, course, chapters, active_chapter, active_section)
+
+
+class _TocBlock:
+    """
+    The fields of a chapter or section of a transformed course block structure, which
+    toc_for_course reads from chapter and section modules.
+    """
+    def __init__(self, course_blocks, usage_key):
+        self._course_blocks = course_blocks
+        self.location = usage_key
+        self.url_name = usage_key.block_id
+        for field_name in ('display_name', 'format', 'due', 'graded', 'hide_from_toc'):
+            setattr(self, field_name, course_blocks.get_xblock_field(usage_key, field_name))
+        self.display_name_with_default_escaped = display_name_with_default_escaped(self)
+        # is_time_limited isn't collected, but is set on all the special exams.
+        self.is_time_limited = any(
+            course_blocks.get_xblock_field(usage_key, field_name)
+            for field_name in ('is_timed_exam', 'is_proctored_enabled', 'is_practice_exam')
+        )
+
+    def get_display_items(self):
+        """
+        Returns the children of the block.
+        """
+        return [
+            _TocBlock(self._course_blocks, child_key) for child_key in self._course_blocks.get_children(self.location)
+        ]
+
+
+def _toc_for_chapters(user, course, chapters, active_chapter, active_section):
+    """
+    Create the table of contents described in toc_for_course for the given chapters.
+    """
+    toc_chapters = []
+
+    # Check for content which needs to be completed
+    # before the rest of the content is made available
+    required_content = milestones_helpers.get_required_content(course.id, user)
+
+    # The user may not actually have to complete the entrance exam, if one is required
+    if user_can_skip_entrance_exam(user, course):
+        required_content = [content for content in required_content if not content == course.entrance_exam_id]
+
+    previous_of_active_section, next_of_active_section = None, None
+    last_processed_section, last_processed_chapter = None, None
+    found_active_section = False
+    for chapter in chapters:
+        # Only show required content, if there is required content
+        # chapter.hide_from_toc is read-only (bool)
+        # xss-lint: disable=python-deprecated-display-name
+        display_id = slugify(chapter.display_name_with_default_escaped)
+        local_hide_from_toc = False
+        if required_content:
+            if str(chapter.location) not in required_content:
+                local_hide_from_toc = True
+
+        # Skip the current chapter if a hide flag is tripped
+        if chapter.hide_from_toc or local_hide_from_toc:
+            continue
+
+        sections = []
+        for section in chapter.get_display_items():
+            # skip the section if it is hidden from the user
+            if section.hide_from_toc:
                 continue
 
-            sections = []
-            for section in chapter.get_display_items():
-                # skip the section if it is hidden from the user
-                if section.hide_from_toc:
-                    continue
-
-                is_section_active = (chapter.url_name == active_chapter and section.url_name == active_section)
-                if is_section_active:
-                    found_active_section = True
-
-                section_context = {
-                    # xss-lint: disable=python-deprecated-display-name
-                    'display_name': section.display_name_with_default_escaped,
-                    'url_name': section.url_name,
-                    'format': section.format if section.format is not None else '',
-                    'due': section.due,
-                    'active': is_section_active,
-                    'graded': section.graded,
-                }
-                _add_timed_exam_info(user, course, section, section_context)
-
-                # update next and previous of active section, if applicable
-                if is_section_active:
-                    if last_processed_section:
-                        previous_of_active_section = last_processed_section.copy()
-                        previous_of_active_section['chapter_url_name'] = last_processed_chapter.url_name
-                elif found_active_section and not next_of_active_section:
-                    next_of_active_section = section_context.copy()
-                    next_of_active_section['chapter_url_name'] = chapter.url_name
-
-                sections.append(section_context)
-                last_processed_section = section_context
-                last_processed_chapter = chapter
-
-            toc_chapters.append({
+            is_section_active = (chapter.url_name == active_chapter and section.url_name == active_section)
+            if is_section_active:
+                found_active_section = True
+
+            section_context = {
                 # xss-lint: disable=python-deprecated-display-name
-                'display_name': chapter.display_name_with_default_escaped,
-                'display_id': display_id,
-                'url_name': chapter.url_name,
-                'sections': sections,
-                'active': chapter.url_name == active_chapter
-            })
-        return {
-            'chapters': toc_chapters,
-            'previous_of_active_section': previous_of_active_section,
-            'next_of_active_section': next_of_active_section,
-        }
+                'display_name': section.display_name_with_default_escaped,
+                'url_name': section.url_name,
+                'format': section.format if section.format is not None else '',
+                'due': section.due,
+                'active': is_section_active,
+                'graded': section.graded,
+            }
+            _add_timed_exam_info(user, course, section, section_context)
+
+            # update next and previous of active section, if applicable
+            if is_section_active:
+                if last_processed_section:
+                    previous_of_active_section = last_processed_section.copy()
+                    previous_of_active_section['chapter_url_name'] = last_processed_chapter.url_name
+            elif found_active_section and not next_of_active_section:
+                next_of_active_section = section_context.copy()
+                next_of_active_section['chapter_url_name'] = chapter.url_name
+
+            sections.append(section_context)
+            last_processed_section = section_context
+            last_processed_chapter = chapter
+
+        toc_chapters.append({
+            # xss-lint: disable=python-deprecated-display-name
+            'display_name': chapter.display_name_with_default_escaped,
+            'display_id': display_id,
+            'url_name': chapter.url_name,
+            'sections': sections,
+            'active': chapter.url_name == active_chapter
+        })
+    return {
+        'chapters': toc_chapters,
+        'previous_of_active_section': previous_of_active_section,
+        'next_of_active_section': next_of_active_section,
+    }
 
 
 def _add_timed_exam_info(user, course, section, section_context):
@@ -1128,7 +1178,12 @@ def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_inf
     descriptor, tracking_context = _get_descriptor_by_usage_key(usage_key)
 
     _, user = setup_masquerade(request, course_key, has_access(request.user, 'staff', descriptor, course_key))
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+    # Blocks without children have nothing more to prefetch from the block structure.
+    if descriptor.has_children and COURSEWARE_PREFETCH_FROM_BLOCK_STRUCTURE.is_enabled(course_key):
+        cache_for_descendents = FieldDataCache.cache_for_block_structure_descendents
+    else:
+        cache_for_descendents = FieldDataCache.cache_for_descriptor_descendents
+    field_data_cache = cache_for_descendents(
         course_key,
         user,
         descriptor,
@@ -0,0 +1,74 @@
+"""
+Benchmark comparing prefetching the user data of the blocks of a 50-unit
+sequence from its descriptors loaded from the modulestore, as the courseware
+index and render_xblock views do by default, with prefetching it from the
+usage keys of the cached block structure of the course.
+
+Usage:
+    pytest lms/djangoapps/courseware/tests/benchmark_field_data_cache.py -s
+"""
+
+
+import json
+import timeit
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.courseware.model_data import FieldDataCache
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+NUM_UNITS = 50
+NUMBER = 10
+
+
+class FieldDataCacheBenchmark(ModuleStoreTestCase):
+    """
+    Benchmarks prefetching the user data of a sequence.
+    """
+    databases = set(connections)
+
+    def setUp(self):
+        super().setUp()
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create()
+        with self.store.bulk_operations(self.course.id):
+            chapter = ItemFactory.create(parent=self.course, category='chapter')
+            self.sequence = ItemFactory.create(parent=chapter, category='sequential')
+            for _ in range(NUM_UNITS):
+                vertical = ItemFactory.create(parent=self.sequence, category='vertical')
+                for category in ('problem', 'html', 'video'):
+                    block = ItemFactory.create(parent=vertical, category=category)
+                    StudentModuleFactory(
+                        student=self.user,
+                        course_id=self.course.id,
+                        module_state_key=block.location,
+                        module_type=category,
+                        state=json.dumps({'position': 1}),
+                    )
+        get_course_in_cache(self.course.id)
+
+    def prefetch_from_descriptors(self):
+        sequence = modulestore().get_item(self.sequence.location, depth=None, lazy=False)
+        return FieldDataCache.cache_for_descriptor_descendents(self.course.id, self.user, sequence)
+
+    def prefetch_from_block_structure(self):
+        field_data_cache = FieldDataCache([], self.course.id, self.user)
+        field_data_cache.add_block_structure_descendents(self.sequence.location)
+        return field_data_cache
+
+    def test_benchmark(self):
+        for name, prefetch in (
+            ('descriptors', self.prefetch_from_descriptors),
+            ('block structure', self.prefetch_from_block_structure),
+        ):
+            with CaptureQueriesContext(connections['default']) as queries:
+                field_data_cache = prefetch()
+            assert len(field_data_cache) == NUM_UNITS * 3
+            duration = timeit.timeit(prefetch, number=NUMBER) / NUMBER
+            print('{:<16} {:4} queries {:8.2f}ms'.format(name, len(queries), duration * 1000))
@@ -8,12 +8,20 @@ import pytest
 
 from django.db import connections, DatabaseError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from edx_toggles.toggles.testutils import override_waffle_flag
 from xblock.core import XBlock
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.fields import BlockScope, Scope, ScopeIds
 
 from common.djangoapps.student.tests.factories import UserFactory
-from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from lms.djangoapps.courseware.model_data import (
+    DjangoKeyValueStore,
+    FieldDataCache,
+    InvalidScopeError,
+    defer_user_state_writes,
+    flush_user_state_writes
+)
 from lms.djangoapps.courseware.models import (
     StudentModule,
     XModuleStudentInfoField,
@@ -26,6 +34,14 @@ from lms.djangoapps.courseware.tests.factories import StudentInfoFactory
 from lms.djangoapps.courseware.tests.factories import StudentModuleFactory as cmfStudentModuleFactory
 from lms.djangoapps.courseware.tests.factories import StudentPrefsFactory
 from lms.djangoapps.courseware.tests.factories import UserStateSummaryFactory
+from lms.djangoapps.courseware.toggles import (
+    COURSEWARE_PREFETCH_FROM_BLOCK_STRUCTURE,
+    COURSEWARE_USER_STATE_WRITE_BEHIND
+)
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 
 def mock_field(scope, name):
@@ -444,3 +460,189 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestBlockStructureDescendents(ModuleStoreTestCase):
+    """
+    Tests for caching the data of the descendants of a block from the block structure of its course.
+    """
+    databases = set(connections)
+
+    def setUp(self):
+        super().setUp()
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        self.sequence = ItemFactory.create(parent=chapter, category='sequential')
+        self.verticals = [ItemFactory.create(parent=self.sequence, category='vertical') for _ in range(3)]
+        self.problems = [ItemFactory.create(parent=vertical, category='problem') for vertical in self.verticals]
+        # Build the block structure of the course before any test changes the course.
+        get_course_in_cache(self.course.id)
+        for problem in self.problems:
+            self.create_state(problem.location)
+
+    def create_state(self, location):
+        cmfStudentModuleFactory(
+            student=self.user,
+            course_id=self.course.id,
+            module_state_key=location,
+            state=json.dumps({'attempts': 2}),
+        )
+
+    def get_attempts(self, field_data_cache, location):
+        return DjangoKeyValueStore(field_data_cache).get(
+            DjangoKeyValueStore.Key(Scope.user_state, self.user.id, location, 'attempts')
+        )
+
+    def test_cache_for_block_structure_descendents(self):
+        sequence = modulestore().get_item(self.sequence.location)
+        with CaptureQueriesContext(connections['default']) as queries:
+            field_data_cache = FieldDataCache.cache_for_block_structure_descendents(
+                self.course.id, self.user, sequence,
+            )
+        assert len([query for query in queries if 'courseware_studentmodule' in query['sql']]) == 1
+
+        descriptor_field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.course.id, self.user, sequence,
+        )
+        assert len(field_data_cache) == len(descriptor_field_data_cache)
+        with self.assertNumQueries(0):
+            for problem in self.problems:
+                assert self.get_attempts(field_data_cache, problem.location) == 2
+
+    def test_depth(self):
+        field_data_cache = FieldDataCache([], self.course.id, self.user)
+        assert field_data_cache.add_block_structure_descendents(self.sequence.location, depth=1)
+        assert len(field_data_cache) == 0
+
+    def test_not_in_block_structure(self):
+        vertical = ItemFactory.create(parent=self.sequence, category='vertical')
+        problem = ItemFactory.create(parent=vertical, category='problem')
+        self.create_state(problem.location)
+
+        field_data_cache = FieldDataCache.cache_for_block_structure_descendents(
+            self.course.id, self.user, modulestore().get_item(vertical.location),
+        )
+        with self.assertNumQueries(0):
+            assert self.get_attempts(field_data_cache, problem.location) == 2
+
+    def test_missing_block_cached_on_access(self):
+        problem = ItemFactory.create(parent=self.verticals[0], category='problem')
+        self.create_state(problem.location)
+
+        field_data_cache = FieldDataCache([], self.course.id, self.user)
+        assert field_data_cache.add_block_structure_descendents(self.sequence.location)
+        assert self.get_attempts(field_data_cache, problem.location) == 2
+
+    @override_waffle_flag(COURSEWARE_PREFETCH_FROM_BLOCK_STRUCTURE, active=True)
+    @override_waffle_flag(COURSEWARE_USER_STATE_WRITE_BEHIND, active=True)
+    def test_scored_field_blocks_written_through(self):
+        # Whether LTI blocks have a score is a field, so it is only known from the block structure.
+        scored_lti = ItemFactory.create(parent=self.verticals[0], category='lti', metadata={'has_score': True})
+        unscored_lti = ItemFactory.create(parent=self.verticals[0], category='lti')
+        get_course_in_cache(self.course.id)
+        missing_lti = ItemFactory.create(parent=self.verticals[0], category='lti', metadata={'has_score': True})
+        locations = [scored_lti.location, unscored_lti.location, missing_lti.location]
+
+        defer_user_state_writes()
+        self.addCleanup(flush_user_state_writes)
+        field_data_cache = FieldDataCache([], self.course.id, self.user)
+        assert field_data_cache.add_block_structure_descendents(self.sequence.location)
+        kvs = DjangoKeyValueStore(field_data_cache)
+        for location in locations:
+            kvs.set(DjangoKeyValueStore.Key(Scope.user_state, self.user.id, location, 'module_score'), 0.5)
+
+        written = StudentModule.objects.filter(student=self.user, module_state_key__in=locations)
+        assert {student_module.module_state_key for student_module in written} == {
+            scored_lti.location, missing_lti.location,
+        }
+
+
+@override_waffle_flag(COURSEWARE_USER_STATE_WRITE_BEHIND, active=True)
+class TestUserStateWriteBehind(TestCase):
+    """
+    Tests for deferring user state writes until the end of the request.
+    """
+    databases = set(connections)
+
+    def setUp(self):
+        super().setUp()
+        self.user = UserFactory.create()
+        # The state of problems is written with their history, which bulk writes don't save.
+        self.location = COURSE_KEY.make_usage_key('html', 'usage_id')
+        self.descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        self.descriptor.scope_ids = ScopeIds('user1', 'html', self.location, self.location)
+        self.descriptor.has_score = False
+        self.key = DjangoKeyValueStore.Key(Scope.user_state, self.user.id, self.location, 'a_field')
+        defer_user_state_writes()
+        self.addCleanup(flush_user_state_writes)
+
+    def kvs(self):
+        return DjangoKeyValueStore(FieldDataCache([self.descriptor], COURSE_KEY, self.user))
+
+    def stored_state(self):
+        return json.loads(StudentModule.objects.get(student=self.user, module_state_key=self.location).state)
+
+    def create_state(self, state):
+        return StudentModuleFactory(
+            student=self.user, module_state_key=self.location, module_type='html', state=json.dumps(state),
+        )
+
+    def test_writes_deferred(self):
+        kvs = self.kvs()
+        kvs.set(self.key, 'first_value')
+        kvs.set(self.key, 'second_value')
+        assert kvs.get(self.key) == 'second_value'
+        assert not StudentModule.objects.filter(student=self.user).exists()
+
+        flush_user_state_writes()
+        assert self.stored_state() == {'a_field': 'second_value'}
+
+        # Writes are no longer deferred once flushed.
+        kvs.set(self.key, 'third_value')
+        assert self.stored_state() == {'a_field': 'third_value'}
+
+    def test_deferred_writes_read(self):
+        self.kvs().set(self.key, 'a_value')
+        assert self.kvs().get(self.key) == 'a_value'
+
+    def test_deferred_writes_merged(self):
+        self.create_state({'a_field': 'a_value', 'b_field': 'b_value'})
+        self.kvs().set(self.key, 'new_value')
+        flush_user_state_writes()
+        assert self.stored_state() == {'a_field': 'new_value', 'b_field': 'b_value'}
+
+    def test_state_created_meanwhile_merged(self):
+        self.kvs().set(self.key, 'new_value')
+        self.create_state({'a_field': 'a_value', 'b_field': 'b_value'})
+        # The row is created by another process after the rows to update are read.
+        with patch(
+            'lms.djangoapps.courseware.user_state_client.DjangoXBlockUserStateClient._get_student_modules',
+            return_value=[],
+        ):
+            flush_user_state_writes()
+        assert self.stored_state() == {'a_field': 'new_value', 'b_field': 'b_value'}
+
+    def test_unchanged_state_not_written(self):
+        student_module = self.create_state({'a_field': 'a_value'})
+        self.kvs().set(self.key, 'a_value')
+        flush_user_state_writes()
+        assert StudentModule.objects.get(pk=student_module.pk).modified == student_module.modified
+
+    def test_deferred_write_deleted(self):
+        self.create_state({'a_field': 'a_value'})
+        kvs = self.kvs()
+        kvs.set(self.key, 'new_value')
+        kvs.delete(self.key)
+        flush_user_state_writes()
+        assert self.stored_state() == {}
+
+    def test_scored_blocks_written_through(self):
+        self.descriptor.has_score = True
+        self.kvs().set(self.key, 'a_value')
+        assert self.stored_state() == {'a_field': 'a_value'}
+
+    @override_waffle_flag(COURSEWARE_USER_STATE_WRITE_BEHIND, active=False)
+    def test_flag_disabled(self):
+        self.kvs().set(self.key, 'a_value')
+        assert self.stored_state() == {'a_field': 'a_value'}
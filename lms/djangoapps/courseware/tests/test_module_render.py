@@ -1087,6 +1087,16 @@ class TestTOC(ModuleStoreTestCase):
             assert actual['previous_of_active_section']['url_name'] == 'Toy_Videos'
             assert actual['next_of_active_section']['url_name'] == 'video_123456789012'
 
+    @ddt.data(None, 'Welcome')
+    def test_toc_for_course_blocks(self, section):
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            self.setup_request_and_course(2, 0)
+            expected = render.toc_for_course(
+                self.request.user, self.request, self.toy_course, self.chapter, section, self.field_data_cache
+            )
+            actual = render.toc_for_course_blocks(self.request.user, self.toy_course, self.chapter, section)
+        assert actual == expected
+
 
 @ddt.ddt
 @patch.dict('django.conf.settings.FEATURES', {'ENABLE_SPECIAL_EXAMS': True})
@@ -59,6 +59,7 @@ from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
 from lms.djangoapps.courseware.tests.helpers import get_expiration_banner_text
 from lms.djangoapps.courseware.testutils import RenderXBlockTestMixin
 from lms.djangoapps.courseware.toggles import (
+    COURSEWARE_LAZY_INDEX_BINDING,
     COURSEWARE_MICROFRONTEND_COURSE_TEAM_PREVIEW,
     COURSEWARE_OPTIMIZED_RENDER_XBLOCK,
     COURSEWARE_USE_LEGACY_FRONTEND,
@@ -534,6 +535,13 @@ class ViewsTestCase(BaseViewsTestCase):
         self.assertNotContains(response, self.problem.location)
         self.assertContains(response, self.problem2.location)
 
+    @override_waffle_flag(COURSEWARE_LAZY_INDEX_BINDING, active=True)
+    def test_index_success_lazy_binding(self):
+        response = self._verify_index_response()
+        self.assertContains(response, self.problem2.location)
+        self._verify_index_response(expected_response_code=404, chapter_name='non-existent')
+        self._verify_index_response(expected_response_code=404, section_name='non-existent')
+
     def test_index_nonexistent_chapter(self):
         self._verify_index_response(expected_response_code=404, chapter_name='non-existent')
 
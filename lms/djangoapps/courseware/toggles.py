@@ -114,6 +114,53 @@ COURSEWARE_OPTIMIZED_RENDER_XBLOCK = CourseWaffleFlag(
     WAFFLE_FLAG_NAMESPACE, 'optimized_render_xblock', __name__
 )
 
+# .. toggle_name: courseware.prefetch_from_block_structure
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Waffle flag to prefetch the user data of the blocks of a sequence, when rendering it in
+#   the courseware or with render_xblock, from the usage keys of the collected block structure of the course instead
+#   of from the blocks loaded from the modulestore. This makes one query per scope for the whole sequence. Data of
+#   blocks missing from the block structure, e.g. because it wasn't updated yet after a publish, is then fetched
+#   when first accessed.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-01-18
+COURSEWARE_PREFETCH_FROM_BLOCK_STRUCTURE = CourseWaffleFlag(
+    WAFFLE_FLAG_NAMESPACE, 'prefetch_from_block_structure', __name__
+)
+
+# .. toggle_name: courseware.lazy_index_binding
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Waffle flag to only bind to the user the requested chapter and section of the course in the
+#   legacy courseware index view, rather than all the chapters of the course and all the sections of the chapter, and
+#   to create its table of contents from the course blocks the user has access to, rather than by binding every
+#   chapter and section of the course. The units of the requested section are still all bound, since the legacy
+#   sequence page renders every one of them.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-01-18
+COURSEWARE_LAZY_INDEX_BINDING = CourseWaffleFlag(
+    WAFFLE_FLAG_NAMESPACE, 'lazy_index_binding', __name__
+)
+
+# .. toggle_name: courseware.user_state_write_behind
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: Waffle flag to defer the writes of the user state of blocks until the end of the request,
+#   coalesce the writes to each block, and make them with bulk inserts and updates, skipping the rows whose state
+#   doesn't change. The state of blocks which have a score is still written immediately. Deferred writes which fail
+#   are logged and reported in the xb_user_state.write_behind.failures custom attribute, along with the
+#   xb_user_state.write_behind.blocks and xb_user_state.write_behind.flush_duration attributes.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-01-18
+# .. toggle_warnings: Requires lms.djangoapps.courseware.middleware.UserStateWriteBehindMiddleware. The modified date
+#   of the StudentModule rows whose state doesn't change is no longer updated.
+COURSEWARE_USER_STATE_WRITE_BEHIND = CourseWaffleFlag(
+    WAFFLE_FLAG_NAMESPACE, 'user_state_write_behind', __name__
+)
+
 
 def courseware_mfe_is_active(course_key: CourseKey) -> bool:
     """
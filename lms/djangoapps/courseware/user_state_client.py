@@ -14,11 +14,12 @@ from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imp
 from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from edx_django_utils import monitoring as monitoring_utils
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
-from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, StudentModuleHistory
 
 try:
     import simplejson as json
@@ -310,6 +311,88 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         duration = (finish_time - evt_time) * 1000  # milliseconds
         self._nr_stat_accumulate('set_many', 'duration', duration)
 
+    def bulk_set_many(self, username, block_keys_to_state, scope=Scope.user_state):
+        """
+        Set fields for many XBlocks, like :meth:`set_many`, with one query to read the
+        existing state of all the blocks, and bulk inserts and updates of their rows.
+
+        Rows whose state doesn't change aren't written, so their ``modified`` date isn't
+        updated. Bulk writes don't send the ``post_save`` signal, so the blocks whose state
+        history is saved are set with :meth:`set_many`, as are the blocks to create if some
+        of their rows were created meanwhile by another process.
+
+        Arguments:
+            username: The name of the user whose state should be set
+            block_keys_to_state (dict): A dict mapping UsageKeys to state dicts.
+                Each state dict maps field names to values. These state dicts
+                are overlaid over the stored state.
+            scope (Scope): The scope to set data in
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported")
+
+        self._nr_stat_increment('bulk_set_many', 'calls')
+
+        if self.user is not None and self.user.username == username:
+            user = self.user
+        else:
+            user = User.objects.get(username=username)
+
+        if user.is_anonymous:
+            return
+
+        evt_time = time()
+
+        with_history = {
+            usage_key: state for usage_key, state in block_keys_to_state.items()
+            if usage_key.block_type in StudentModuleHistory.HISTORY_SAVING_TYPES
+        }
+        if with_history:
+            self.set_many(username, with_history, scope)
+
+        block_keys_to_state = {
+            usage_key: state for usage_key, state in block_keys_to_state.items() if usage_key not in with_history
+        }
+        created_modules = []
+        updated_modules = []
+        for student_module, usage_key in self._get_student_modules(username, list(block_keys_to_state)):
+            state = block_keys_to_state.pop(usage_key, None)
+            if state is None:
+                continue
+            current_state = json.loads(student_module.state) if student_module.state else {}
+            if all(field in current_state and current_state[field] == value for field, value in state.items()):
+                continue
+            current_state.update(state)
+            student_module.state = json.dumps(current_state)
+            student_module.modified = timezone.now()
+            updated_modules.append(student_module)
+
+        for usage_key, state in block_keys_to_state.items():
+            created_modules.append(StudentModule(
+                student=user,
+                course_id=usage_key.context_key,
+                module_state_key=usage_key,
+                module_type=usage_key.block_type,
+                state=json.dumps(state),
+            ))
+
+        if updated_modules:
+            StudentModule.objects.bulk_update(updated_modules, ['state', 'modified'])
+        if created_modules:
+            try:
+                with transaction.atomic():
+                    StudentModule.objects.bulk_create(created_modules)
+            except IntegrityError:
+                # Some of the rows were created meanwhile by another process, so set the state
+                # of the blocks one by one, overlaying it over the state of the rows created.
+                self.set_many(username, block_keys_to_state, scope)
+
+        self._nr_stat_accumulate('bulk_set_many', 'blocks_created', len(created_modules))
+        self._nr_stat_accumulate('bulk_set_many', 'blocks_updated', len(updated_modules))
+        finish_time = time()
+        duration = (finish_time - evt_time) * 1000  # milliseconds
+        self._nr_stat_accumulate('bulk_set_many', 'duration', duration)
+
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
         Delete the stored XBlock state for a many xblock usages.
@@ -62,9 +62,11 @@ from ..entrance_exams import (
 )
 from ..masquerade import check_content_start_date_for_masquerade_user, setup_masquerade
 from ..model_data import FieldDataCache
-from ..module_render import get_module_for_descriptor, toc_for_course
+from ..module_render import get_module_for_descriptor, toc_for_course, toc_for_course_blocks
 from ..permissions import MASQUERADE_AS_STUDENT
 from ..toggles import (
+    COURSEWARE_LAZY_INDEX_BINDING,
+    COURSEWARE_PREFETCH_FROM_BLOCK_STRUCTURE,
     courseware_legacy_is_visible,
     courseware_mfe_is_advertised
 )
@@ -332,7 +334,7 @@ class CoursewareIndex(View):
         """
         child = None
         if url_name:
-            child = parent.get_child_by(lambda m: m.location.block_id == url_name)
+            child = self._get_child_by_url_name(parent, url_name)
             if not child:
                 # User may be trying to access a child that isn't live yet
                 if not self._is_masquerading_as_student():
@@ -346,6 +348,16 @@ class CoursewareIndex(View):
             child = get_current_child(parent, min_depth=min_depth, requested_child=self.request.GET.get("child"))
         return child
 
+    def _get_child_by_url_name(self, parent, url_name):
+        """
+        Returns the child of the parent with the specified url_name, or None.
+        """
+        if COURSEWARE_LAZY_INDEX_BINDING.is_enabled(self.course_key):
+            # Only bind the requested child, rather than all the children of the parent.
+            child_key = next((key for key in parent.children if key.block_id == url_name), None)
+            return parent.get_child(child_key) if child_key else None
+        return parent.get_child_by(lambda m: m.location.block_id == url_name)
+
     def _find_chapter(self):
         """
         Finds the requested chapter.
@@ -389,9 +401,15 @@ class CoursewareIndex(View):
         """
         # Pre-fetch all descendant data
         self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
-        self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
+        if not (
+            COURSEWARE_PREFETCH_FROM_BLOCK_STRUCTURE.is_enabled(self.course_key) and
+            self.field_data_cache.add_block_structure_descendents(self.section.location)
+        ):
+            self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
 
-        # Bind section to user
+        # Bind section to user.  Even with COURSEWARE_LAZY_INDEX_BINDING, which only binds the requested
+        # chapter and section, the units of the section are all bound: the legacy sequence page renders the
+        # content of every unit, which the client switches between without further requests.
         self.section = get_module_for_descriptor(
             self.effective_user,
             self.request,
@@ -453,14 +471,22 @@ class CoursewareIndex(View):
                 self.effective_user,
             )
         )
-        table_of_contents = toc_for_course(
-            self.effective_user,
-            self.request,
-            self.course,
-            self.chapter_url_name,
-            self.section_url_name,
-            self.field_data_cache,
-        )
+        if COURSEWARE_LAZY_INDEX_BINDING.is_enabled(self.course_key):
+            table_of_contents = toc_for_course_blocks(
+                self.effective_user,
+                self.course,
+                self.chapter_url_name,
+                self.section_url_name,
+            )
+        else:
+            table_of_contents = toc_for_course(
+                self.effective_user,
+                self.request,
+                self.course,
+                self.chapter_url_name,
+                self.section_url_name,
+                self.field_data_cache,
+            )
         courseware_context['accordion'] = render_accordion(
             self.request,
             self.course,
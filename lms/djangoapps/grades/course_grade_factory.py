@@ -1,7 +1,7 @@
 """
 Course Grade Factory Class
 """
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from logging import getLogger
 
 from openedx.core.djangoapps.signals.signals import (
@@ -13,7 +13,7 @@ from openedx.core.djangoapps.signals.signals import (
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
-from .models import PersistentCourseGrade
+from .models import PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks
 from .models_api import prefetch_grade_overrides_and_visible_blocks
 
 log = getLogger(__name__)
@@ -24,6 +24,15 @@ class CourseGradeFactory:
     Factory class to create Course Grade objects.
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
+    GradeRecord = namedtuple(
+        'GradeRecord',
+        ['student', 'persisted', 'percent', 'letter_grade', 'passed', 'subsection_grades'],
+    )
+    SubsectionGradeRecord = namedtuple(
+        'SubsectionGradeRecord',
+        ['usage_key', 'earned_all', 'possible_all', 'earned_graded', 'possible_graded', 'first_attempted',
+         'visible_blocks'],
+    )
 
     def read(
             self,
@@ -107,6 +116,71 @@ class CourseGradeFactory:
         for user in users:
             yield self._iter_grade_result(user, course_data, force_update)
 
+    def bulk_read(self, users, course_key):
+        """
+        Given a course_key and a batch of students (User), yield a read-only
+        GradeRecord of the persisted grades of every student, for reporting.
+        GradeRecord is a named tuple of:
+
+            (student, persisted, percent, letter_grade, passed, subsection_grades)
+
+        where subsection_grades maps the usage key of each subsection with a
+        persisted grade to a SubsectionGradeRecord, whose earned and possible
+        scores include any grade override, and whose visible_blocks is the
+        BlockRecordList the grade was computed from.
+
+        Unlike iter, which builds a CourseGrade per student, the course grades,
+        subsection grades and visible blocks of the whole batch are read in a
+        constant number of queries, and no grades are computed.  Students
+        without a persisted course grade have persisted set to False and a
+        zero grade.
+        """
+        users = list(users)
+        if not users:
+            return
+
+        course_grades = {}
+        subsection_grades = defaultdict(dict)
+        if should_persist_grades(course_key):
+            user_ids = [user.id for user in users]
+            course_grades = {
+                user_id: (percent_grade, letter_grade)
+                for user_id, percent_grade, letter_grade in PersistentCourseGrade.objects.filter(
+                    user_id__in=user_ids, course_id=course_key,
+                ).values_list('user_id', 'percent_grade', 'letter_grade')
+            }
+            subsection_values = list(PersistentSubsectionGrade.objects.filter(
+                user_id__in=user_ids, course_id=course_key,
+            ).values_list(
+                'user_id', 'usage_key', 'first_attempted', 'visible_blocks_id',
+                'earned_all', 'possible_all', 'earned_graded', 'possible_graded',
+                'override__earned_all_override', 'override__possible_all_override',
+                'override__earned_graded_override', 'override__possible_graded_override',
+            ))
+            visible_blocks = VisibleBlocks.bulk_read_blocks(values[3] for values in subsection_values)
+            for user_id, usage_key, first_attempted, visible_blocks_hash, *scores in subsection_values:
+                if usage_key.run is None:
+                    usage_key = usage_key.replace(course_key=course_key)
+                # Each score is replaced by its override, if any.
+                scores = [
+                    score if override is None else override
+                    for score, override in zip(scores[:4], scores[4:])
+                ]
+                subsection_grades[user_id][usage_key] = self.SubsectionGradeRecord(
+                    usage_key, *scores, first_attempted, visible_blocks.get(visible_blocks_hash),
+                )
+
+        for user in users:
+            try:
+                percent, letter_grade = course_grades[user.id]
+            except KeyError:
+                yield self.GradeRecord(user, False, 0.0, None, False, subsection_grades.get(user.id, {}))
+            else:
+                yield self.GradeRecord(
+                    user, True, percent, letter_grade or None, letter_grade != '',
+                    subsection_grades.get(user.id, {}),
+                )
+
     def _iter_grade_result(self, user, course_data, force_update):  # lint-amnesty, pylint: disable=missing-function-docstring
         try:
             kwargs = {
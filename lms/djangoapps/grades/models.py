@@ -174,6 +174,19 @@ class VisibleBlocks(models.Model):
             prefetched = cls._initialize_cache(user_id, course_key)
         return prefetched
 
+    @classmethod
+    def bulk_read_blocks(cls, hashes):
+        """
+        Reads the visible blocks with the given hashes in a single query,
+        and returns a dictionary mapping each hash to its BlockRecordList.
+        The blocks of a hash that is shared by many grades are only read
+        and parsed once.
+        """
+        return {
+            hashed: BlockRecordList.from_json(blocks_json)
+            for hashed, blocks_json in cls.objects.filter(hashed__in=set(hashes)).values_list('hashed', 'blocks_json')
+        }
+
     @classmethod
     def cached_get_or_create(cls, user_id, blocks):
         """
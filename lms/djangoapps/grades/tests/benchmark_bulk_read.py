@@ -0,0 +1,129 @@
+"""
+Benchmark comparing the per-student reads of persisted grades done by
+CourseGradeFactory.iter with CourseGradeFactory.bulk_read, for batches
+of 1k and 10k learners.  Reports the number of queries and the wall time
+of reading the persisted course grades, subsection grades and visible
+blocks of every learner of the batch.
+
+Since it needs a database, it runs as a test case, which the default test
+collection does not pick up.
+
+Usage:
+    pytest lms/djangoapps/grades/tests/benchmark_bulk_read.py -s
+"""
+
+
+import timeit
+from collections import namedtuple
+from datetime import datetime
+
+import pytz
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
+
+from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
+
+from ..course_grade_factory import CourseGradeFactory
+from ..models import BlockRecord, BlockRecordList, PersistentCourseGrade, PersistentSubsectionGrade, VisibleBlocks
+from ..models_api import prefetch_course_and_subsection_grades, prefetch_grade_overrides_and_visible_blocks
+
+NUM_LEARNERS = (1000, 10000)
+NUM_SUBSECTIONS = 10
+
+# Only the id of a User is needed to read its grades.
+FakeUser = namedtuple('FakeUser', ['id'])
+
+
+class BulkReadBenchmark(TestCase):
+    """
+    Benchmarks the reads of persisted grades.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course_key = CourseLocator(org='benchmark', course='bulk_read', run='run')
+        subsection_keys = [
+            BlockUsageLocator(course_key=cls.course_key, block_type='sequential', block_id=f'subsection_{index}')
+            for index in range(NUM_SUBSECTIONS)
+        ]
+        visible_blocks = []
+        for subsection_key in subsection_keys:
+            blocks = BlockRecordList([
+                BlockRecord(
+                    locator=subsection_key.replace(block_type='problem', block_id=f'{subsection_key.block_id}_problem'),
+                    weight=1,
+                    raw_possible=10,
+                    graded=True,
+                ),
+            ], cls.course_key)
+            visible_blocks.append(VisibleBlocks.objects.create(
+                blocks_json=blocks.json_value, hashed=blocks.hash_value, course_id=cls.course_key,
+            ))
+
+        cls.users = [FakeUser(user_id) for user_id in range(1, max(NUM_LEARNERS) + 1)]
+        now = datetime.now(pytz.UTC)
+        PersistentCourseGrade.objects.bulk_create([
+            PersistentCourseGrade(
+                user_id=user.id,
+                course_id=cls.course_key,
+                grading_policy_hash='policy',
+                percent_grade=0.5,
+                letter_grade='Pass',
+                passed_timestamp=now,
+            )
+            for user in cls.users
+        ], batch_size=1000)
+        PersistentSubsectionGrade.objects.bulk_create([
+            PersistentSubsectionGrade(
+                user_id=user.id,
+                course_id=cls.course_key,
+                usage_key=subsection_key,
+                visible_blocks=blocks,
+                earned_all=5.0,
+                possible_all=10.0,
+                earned_graded=5.0,
+                possible_graded=10.0,
+                first_attempted=now,
+            )
+            for user in cls.users
+            for subsection_key, blocks in zip(subsection_keys, visible_blocks)
+        ], batch_size=1000)
+
+    def _read_per_student(self, users):
+        """
+        Reads the persisted grades of the given users as the grade report and
+        CourseGradeFactory.iter do: a bulk prefetch of the course and
+        subsection grades, followed by a prefetch of each user's overrides
+        and visible blocks, and a read of each user's grades.
+        """
+        prefetch_course_and_subsection_grades(self.course_key, users)
+        for user in users:
+            prefetch_grade_overrides_and_visible_blocks(user, self.course_key)
+            PersistentCourseGrade.read(user.id, self.course_key)
+            for grade in PersistentSubsectionGrade.bulk_read_grades(user.id, self.course_key):
+                grade.visible_blocks.blocks  # pylint: disable=pointless-statement
+
+    def _bulk_read(self, users):
+        """
+        Reads the persisted grades of the given users with bulk_read.
+        """
+        for _ in CourseGradeFactory().bulk_read(users, self.course_key):
+            pass
+
+    def _measure(self, read, users):
+        """
+        Returns the number of queries and the wall time of the given read.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            wall_time = timeit.timeit(lambda: read(users), number=1)
+        return len(queries), wall_time
+
+    def test_benchmark(self):
+        with persistent_grades_feature_flags(global_flag=True, enabled_for_all_courses=True):
+            for num_learners in NUM_LEARNERS:
+                users = self.users[:num_learners]
+                for name, read in (('per student', self._read_per_student), ('bulk_read', self._bulk_read)):
+                    num_queries, wall_time = self._measure(read, users)
+                    print(f'{num_learners:>6} learners, {name:<12}: {num_queries:>6} queries, {wall_time:.3f}s')
@@ -2,11 +2,17 @@
 Tests for the CourseGradeFactory class.
 """
 import itertools
+from datetime import datetime
 from unittest.mock import patch
 
 import ddt
+import pytz
 from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from edx_toggles.toggles.testutils import override_waffle_switch
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
 
 from common.djangoapps.student.tests.factories import UserFactory
 from lms.djangoapps.courseware.access import has_access
@@ -18,6 +24,13 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle_switch
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
+from ..models import (
+    BlockRecord,
+    BlockRecordList,
+    PersistentCourseGrade,
+    PersistentSubsectionGrade,
+    PersistentSubsectionGradeOverride
+)
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
 from .base import GradeTestBase
 from .utils import mock_get_score
@@ -351,3 +364,105 @@ class TestGradeIteration(SharedModuleStoreTestCase):
                 students_to_errors[student] = error
 
         return students_to_course_grades, students_to_errors
+
+
+class TestGradeBulkRead(TestCase):
+    """
+    Test reading persisted grades of a batch of students in bulk.
+    """
+    def setUp(self):
+        super().setUp()
+        self.course_key = CourseLocator(org='some_org', course='some_course', run='some_run')
+        self.subsection_keys = [
+            BlockUsageLocator(course_key=self.course_key, block_type='sequential', block_id=f'subsection_{index}')
+            for index in range(2)
+        ]
+        self.block_records = BlockRecordList([
+            BlockRecord(
+                locator=BlockUsageLocator(course_key=self.course_key, block_type='problem', block_id='problem'),
+                weight=1,
+                raw_possible=10,
+                graded=True,
+            ),
+        ], self.course_key)
+        self.students = [UserFactory.create() for _ in range(3)]
+
+    def _persist_grades(self, student, percent_grade, letter_grade):
+        """
+        Persists a course grade and subsection grades for the given student.
+        """
+        PersistentCourseGrade.update_or_create(
+            user_id=student.id,
+            course_id=self.course_key,
+            grading_policy_hash='policy',
+            percent_grade=percent_grade,
+            letter_grade=letter_grade,
+            passed=bool(letter_grade),
+        )
+        return [
+            PersistentSubsectionGrade.update_or_create_grade(
+                user_id=student.id,
+                usage_key=subsection_key,
+                earned_all=5.0,
+                possible_all=10.0,
+                earned_graded=5.0,
+                possible_graded=10.0,
+                visible_blocks=self.block_records,
+                first_attempted=datetime(2000, 1, 1, tzinfo=pytz.UTC),
+            )
+            for subsection_key in self.subsection_keys
+        ]
+
+    def _bulk_read(self, students):
+        """
+        Returns the grade records of the given students and the number of
+        queries used to read them.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            records = list(CourseGradeFactory().bulk_read(students, self.course_key))
+        return records, len(queries)
+
+    def test_empty_student_list(self):
+        with persistent_grades_feature_flags(global_flag=True, enabled_for_all_courses=True):
+            assert self._bulk_read([]) == ([], 0)
+
+    def test_bulk_read(self):
+        with persistent_grades_feature_flags(global_flag=True, enabled_for_all_courses=True):
+            passing_grades = self._persist_grades(self.students[0], 0.8, 'Pass')
+            self._persist_grades(self.students[1], 0.2, '')
+            PersistentSubsectionGradeOverride.objects.create(grade=passing_grades[0], earned_graded_override=8.0)
+
+            records, _ = self._bulk_read(self.students)
+
+        assert [record.student for record in records] == self.students
+        passing, failing, ungraded = records
+        assert (passing.persisted, passing.percent, passing.letter_grade, passing.passed) == (True, 0.8, 'Pass', True)
+        assert (failing.persisted, failing.percent, failing.letter_grade, failing.passed) == (True, 0.2, None, False)
+        assert not ungraded.persisted
+        assert (ungraded.percent, ungraded.letter_grade, ungraded.passed) == (0.0, None, False)
+        assert ungraded.subsection_grades == {}
+
+        overridden, not_overridden = (passing.subsection_grades[key] for key in self.subsection_keys)
+        assert (overridden.earned_graded, overridden.possible_graded, overridden.earned_all) == (8.0, 10.0, 5.0)
+        assert (not_overridden.earned_graded, not_overridden.possible_graded) == (5.0, 10.0)
+        assert overridden.visible_blocks == self.block_records
+        assert overridden.visible_blocks is failing.subsection_grades[self.subsection_keys[0]].visible_blocks
+
+    def test_constant_number_of_queries(self):
+        with persistent_grades_feature_flags(global_flag=True, enabled_for_all_courses=True):
+            for student in self.students:
+                self._persist_grades(student, 0.5, 'Pass')
+
+            _, single_student_queries = self._bulk_read(self.students[:1])
+            _, all_students_queries = self._bulk_read(self.students)
+
+        assert all_students_queries == single_student_queries
+
+    def test_grades_not_persisted(self):
+        with persistent_grades_feature_flags(global_flag=True, enabled_for_all_courses=True):
+            self._persist_grades(self.students[0], 0.8, 'Pass')
+
+        with persistent_grades_feature_flags(global_flag=False):
+            records, _ = self._bulk_read(self.students)
+
+        assert not any(record.persisted or record.subsection_grades for record in records)
@@ -52,6 +52,9 @@ SALE_ORDER_FEATURES = ('id', 'company_name', 'company_contact_name', 'company_co
 AVAILABLE_FEATURES = STUDENT_FEATURES + PROFILE_FEATURES + PROGRAM_ENROLLMENT_FEATURES
 COURSE_REGISTRATION_FEATURES = ('code', 'course_id', 'created_by', 'created_at', 'is_valid')
 COUPON_FEATURES = ('code', 'course_id', 'percentage_discount', 'description', 'expiration_date', 'is_active')
+
+# Number of students fetched per query by iter_enrolled_students_features.
+STUDENT_FEATURES_BATCH_SIZE = 1000
 CERTIFICATE_FEATURES = ('course_id', 'mode', 'status', 'grade', 'created_date', 'is_active', 'error_reason')
 
 UNAVAILABLE = "[unavailable]"
@@ -95,13 +98,22 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iter_enrolled_students_features(course_key, features))
+
+
+def iter_enrolled_students_features(course_key, features):
+    """
+    Return a generator of the student features that are returned by
+    enrolled_students_features.  Students are fetched in batches of
+    STUDENT_FEATURES_BATCH_SIZE, so that only one batch of students is
+    held in memory at a time.
+    """
     include_cohort_column = 'cohort' in features
     include_team_column = 'team' in features
     include_city_column = 'city' in features
     include_enrollment_mode = 'enrollment_mode' in features
     include_verification_status = 'verification_status' in features
     include_program_enrollments = 'external_user_key' in features
-    external_user_key_dict = {}
 
     students = User.objects.filter(
         courseenrollment__course_id=course_key,
@@ -114,11 +126,6 @@ def enrolled_students_features(course_key, features):
     if include_team_column:
         students = students.prefetch_related('teams')
 
-    if include_program_enrollments and len(students) > 0:
-        program_enrollments = fetch_program_enrollments_by_students(users=students, realized_only=True)
-        for program_enrollment in program_enrollments:
-            external_user_key_dict[program_enrollment.user_id] = program_enrollment.external_user_key
-
     def extract_attr(student, feature):
         """Evaluate a student attribute that is ready for JSON serialization"""
         attr = getattr(student, feature)
@@ -128,7 +135,7 @@ def enrolled_students_features(course_key, features):
         except TypeError:
             return str(attr)
 
-    def extract_student(student, features):
+    def extract_student(student, features, external_user_key_dict):
         """ convert student to dictionary """
         student_features = [x for x in STUDENT_FEATURES if x in features]
         profile_features = [x for x in PROFILE_FEATURES if x in features]
@@ -191,7 +198,20 @@ def enrolled_students_features(course_key, features):
 
         return student_dict
 
-    return [extract_student(student, features) for student in students]
+    batch = list(students[:STUDENT_FEATURES_BATCH_SIZE])
+    while batch:
+        external_user_key_dict = {}
+        if include_program_enrollments:
+            program_enrollments = fetch_program_enrollments_by_students(users=batch, realized_only=True)
+            for program_enrollment in program_enrollments:
+                external_user_key_dict[program_enrollment.user_id] = program_enrollment.external_user_key
+
+        for student in batch:
+            yield extract_student(student, features, external_user_key_dict)
+
+        if len(batch) < STUDENT_FEATURES_BATCH_SIZE:
+            break
+        batch = list(students.filter(username__gt=batch[-1].username)[:STUDENT_FEATURES_BATCH_SIZE])
 
 
 def list_may_enroll(course_key, features):
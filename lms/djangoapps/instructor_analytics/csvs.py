@@ -72,6 +72,16 @@ def format_dictlist(dictlist, features):
     }
     """
 
+    header, datarows = format_dictlist_rows(dictlist, features)
+    return header, list(datarows)
+
+
+def format_dictlist_rows(dictlist, features):
+    """
+    Like format_dictlist, but returns the datarows as a generator, so
+    that `dictlist` can also be a generator that is consumed lazily.
+    """
+
     def dict_to_entry(dct):
         """ Convert dictionary to a list for a csv row """
         relevant_items = [(k, v) for (k, v) in dct.items() if k in features]
@@ -80,7 +90,7 @@ def format_dictlist(dictlist, features):
         return vals
 
     header = features
-    datarows = list(map(dict_to_entry, dictlist))
+    datarows = map(dict_to_entry, dictlist)
 
     return header, datarows
 
@@ -3,7 +3,7 @@ This module contains various configuration settings via
 waffle switches for the instructor_task app.
 """
 
-from edx_toggles.toggles import LegacyWaffleFlagNamespace, LegacyWaffleSwitchNamespace
+from edx_toggles.toggles import LegacyWaffleFlagNamespace, LegacyWaffleSwitchNamespace, WaffleSwitch
 
 from openedx.core.djangoapps.waffle_utils import CourseWaffleFlag
 
@@ -16,6 +16,15 @@ WAFFLE_SWITCHES = LegacyWaffleSwitchNamespace(name=WAFFLE_NAMESPACE)
 # Waffle switches
 # TODO: Replace with WaffleSwitch(). See WAFFLE_SWITCHES comment.
 OPTIMIZE_GET_LEARNERS_FOR_COURSE = 'optimize_get_learners_for_course'
+# .. toggle_name: instructor_task.parallel_course_grade_report
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, course grade reports for large courses are generated by fanning batches of
+#   enrolled learners out to parallel celery subtasks. Each subtask stores a partial report, and the last subtask to
+#   complete merges the partial reports into the final report.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+PARALLEL_COURSE_GRADE_REPORT = WaffleSwitch(f'{WAFFLE_NAMESPACE}.parallel_course_grade_report', __name__)
 
 # Course override flags
 # TODO: Replace with WaffleFlag(). See waffle_flags() docstring.
@@ -52,6 +61,14 @@ def optimize_get_learners_switch_enabled():
     return WAFFLE_SWITCHES.is_enabled(OPTIMIZE_GET_LEARNERS_FOR_COURSE)
 
 
+def parallel_course_grade_report_enabled():
+    """
+    Returns True if course grade reports should be generated in
+    parallel subtasks, otherwise False.
+    """
+    return PARALLEL_COURSE_GRADE_REPORT.is_enabled()
+
+
 def problem_grade_report_verified_only(course_id):
     """
     Returns True if problem grade reports should only
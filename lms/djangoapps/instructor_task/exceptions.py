@@ -16,3 +16,8 @@ class UpdateProblemModuleStateError(Exception):
 class DuplicateTaskException(Exception):
     """Exception indicating that a task already exists or has already completed."""
     pass  # lint-amnesty, pylint: disable=unnecessary-pass
+
+
+class SubtasksFailedException(Exception):
+    """Exception indicating that some of the subtasks of a task have failed."""
+    pass  # lint-amnesty, pylint: disable=unnecessary-pass
@@ -12,17 +12,20 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import codecs
 import csv
 import hashlib
+import io
 import json
 import logging
 import os.path
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 
 from django.utils.translation import ugettext as _
@@ -37,6 +40,10 @@ QUEUING = 'QUEUING'
 PROGRESS = 'PROGRESS'
 TASK_INPUT_LENGTH = 10000
 
+# Size in bytes up to which a report is spooled in memory before it is
+# stored.  Larger reports are spooled to a temporary file on disk.
+REPORT_SPOOL_MAX_SIZE = 1024 * 1024
+
 
 class InstructorTask(models.Model):
     """
@@ -190,9 +197,8 @@ class InstructorTask(models.Model):
 class ReportStore:
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows of CSV files can be passed as generators, so that reports
+    are written without holding the whole dataset in memory.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -285,12 +291,43 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` can be any iterable, including a generator.  The rows are
+        consumed one at a time and written as utf-8 encoded csv to a
+        spooled temporary file, which is kept in memory only up to
+        REPORT_SPOOL_MAX_SIZE bytes, and then streamed to the storage
+        backend.
+        """
+        path = self.path_to(course_id, filename, parent_dir)
+        with SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE) as spool:
+            csvwriter = csv.writer(codecs.getwriter('utf-8')(spool))
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            spool.seek(0)
+            self.storage.save(path, File(spool))
+
+    def read_rows(self, course_id, filename, parent_dir=''):
+        """
+        Return a list of the rows of the csv file with the given filename
+        that was stored for the given course by `store_rows`, or an empty
+        list if there is no such file.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer, parent_dir)
+        path = self.path_to(course_id, filename, parent_dir)
+        if not self.storage.exists(path):
+            return []
+        with self.storage.open(path) as stored_file:
+            contents = stored_file.read()
+        if isinstance(contents, bytes):
+            contents = contents.decode('utf-8')
+        return list(csv.reader(io.StringIO(contents)))
+
+    def delete(self, course_id, filename, parent_dir=''):
+        """
+        Delete the file with the given filename that was stored for the
+        given course, if it exists.
+        """
+        path = self.path_to(course_id, filename, parent_dir)
+        if self.storage.exists(path):
+            self.storage.delete(path)
 
     def links_for(self, course_id):
         """
@@ -11,7 +11,7 @@ from time import time
 from uuid import uuid4
 
 import psutil
-from celery.states import READY_STATES, RETRY, SUCCESS
+from celery.states import FAILURE, READY_STATES, RETRY, SUCCESS
 from django.core.cache import cache
 from django.db import DatabaseError, transaction
 
@@ -456,7 +456,7 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         raise DuplicateTaskException(msg)
 
 
-def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
+def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0, defer_completion=False):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -467,16 +467,23 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
     The subtask lock acquired in the call to check_subtask_is_valid() is released here, only when
     the attempting of retries has concluded.
+
+    If `defer_completion` is True, the InstructorTask is not marked as succeeded once its last
+    subtask completes, and the caller must then complete it with complete_task_after_subtasks().
+
+    Returns True if this was the update of the last subtask of the InstructorTask to complete.
     """
     try:
-        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+        return _update_subtask_status(entry_id, current_task_id, new_subtask_status, defer_completion)
     except DatabaseError:
         # If we fail, try again recursively.
         retry_count += 1
         if retry_count < MAX_DATABASE_LOCK_RETRIES:
             TASK_LOG.info("Retrying to update status for subtask %s of instructor task %d with status %s:  retry %d",
                           current_task_id, entry_id, new_subtask_status, retry_count)
-            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
+            return update_subtask_status(
+                entry_id, current_task_id, new_subtask_status, retry_count, defer_completion
+            )
         else:
             TASK_LOG.info("Failed to update status after %d retries for subtask %s of instructor task %d with status %s",  # lint-amnesty, pylint: disable=line-too-long
                           retry_count, current_task_id, entry_id, new_subtask_status)
@@ -489,7 +496,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
 
 @transaction.atomic
-def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
+def _update_subtask_status(entry_id, current_task_id, new_subtask_status, defer_completion=False):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -509,12 +516,14 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     subtasks.  'Total' is expected to have been set at the time the subtasks were created.
     The other three counters are incremented depending on the value of `status`.  Once the counters
     for 'succeeded' and 'failed' match the 'total', the subtasks are done and the InstructorTask's
-    "status" is changed to SUCCESS.
+    "status" is changed to SUCCESS, unless `defer_completion` is True.
 
     The "subtasks" field also contains a 'status' key, that contains a dict that stores status
     information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
     is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
     about failure messages, progress made, etc.
+
+    Returns True if this was the update of the last subtask to complete.
     """
     TASK_LOG.info("Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
@@ -565,7 +574,7 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         # At present, we mark the task as having succeeded.  In future, we should see
         # if there was a catastrophic failure that occurred, and figure out how to
         # report that here.
-        if num_remaining <= 0:
+        if num_remaining <= 0 and not defer_completion:
             entry.task_state = SUCCESS
         entry.subtasks = json.dumps(subtask_dict)
         entry.task_output = InstructorTask.create_output_for_success(task_progress)
@@ -574,6 +583,22 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         entry.save()
         TASK_LOG.info("Task output updated to %s for subtask %s of instructor task %d",
                       entry.task_output, current_task_id, entry_id)
+        return new_state in READY_STATES and num_remaining <= 0
     except Exception:
         TASK_LOG.exception("Unexpected error while updating InstructorTask.")
         raise
+
+
+def complete_task_after_subtasks(entry_id, exception=None, traceback_string=None):
+    """
+    Marks the InstructorTask whose last subtask completed with a deferred completion
+    as succeeded or, if an exception is given, as failed with that exception.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if exception is None:
+        entry.task_state = SUCCESS
+    else:
+        entry.task_state = FAILURE
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback_string)
+    entry.save()
+    TASK_LOG.info("Task state updated to %s for instructor task %d", entry.task_state, entry_id)
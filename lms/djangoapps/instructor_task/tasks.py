@@ -20,14 +20,26 @@ of the query for traversing StudentModule objects.
 
 """
 
+import json
 import logging
+import traceback
 from functools import partial
 
 from celery import shared_task
+from celery.states import FAILURE, SUCCESS
 from django.utils.translation import ugettext_noop
 from edx_django_utils.monitoring import set_code_owner_attribute
 
 from lms.djangoapps.bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.config.waffle import parallel_course_grade_report_enabled
+from lms.djangoapps.instructor_task.exceptions import SubtasksFailedException
+from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    complete_task_after_subtasks,
+    update_subtask_status
+)
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import upload_may_enroll_csv, upload_students_csv
@@ -46,6 +58,7 @@ from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     override_score_module_state,
     perform_module_state_update,
+    prime_rescore_problem_module_state,
     rescore_problem_module_state,
     reset_attempts_module_state
 )
@@ -77,8 +90,9 @@ def rescore_problem(entry_id, xmodule_instance_args):
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
     update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    prime_fcn = partial(prime_rescore_problem_module_state, xmodule_instance_args)
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(perform_module_state_update, update_fcn, None, prime_fcn=prime_fcn)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -193,10 +207,95 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    if parallel_course_grade_report_enabled():
+        create_subtask_fcn = partial(_create_grades_csv_subtask, entry_id, xmodule_instance_args)
+        task_fn = partial(CourseGradeReport.generate_in_subtasks, create_subtask_fcn, xmodule_instance_args)
+    else:
+        task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _create_grades_csv_subtask(entry_id, xmodule_instance_args, subtask_index, user_ids, initial_subtask_status):
+    """
+    Creates a subtask to grade the given users for a course grade report.
+    """
+    return calculate_grades_csv_subtask.subtask(
+        (
+            entry_id,
+            xmodule_instance_args,
+            subtask_index,
+            user_ids,
+            initial_subtask_status.to_dict(),
+        ),
+        task_id=initial_subtask_status.task_id,
+    )
+
+
+@shared_task
+@set_code_owner_attribute
+def calculate_grades_csv_subtask(entry_id, xmodule_instance_args, subtask_index, user_ids, subtask_status_dict):
+    """
+    Grades a batch of users for a course grade report that is generated in
+    parallel, and stores their rows as a partial report.  The last subtask
+    to complete merges the partial reports into the final report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        "Task: %s, InstructorTask ID: %s, Grading %d users in subtask %d",
+        current_task_id, entry_id, len(user_ids), subtask_index
+    )
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        succeeded, failed = CourseGradeReport.grade_subtask(xmodule_instance_args, entry_id, subtask_index, user_ids)
+    except Exception:
+        TASK_LOG.exception("Task: %s, InstructorTask ID: %s, Grading failed unexpectedly", current_task_id, entry_id)
+        # Since we don't know how far the subtask got, count all of its users as having failed.
+        subtask_status.increment(failed=len(user_ids), state=FAILURE)
+        _update_grades_csv_subtask_status(entry_id, xmodule_instance_args, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(succeeded=succeeded, failed=failed, state=SUCCESS)
+    _update_grades_csv_subtask_status(entry_id, xmodule_instance_args, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
+def _update_grades_csv_subtask_status(entry_id, xmodule_instance_args, current_task_id, subtask_status):
+    """
+    Updates the status of a subtask of a course grade report.
+
+    Once the last subtask completes, the partial reports are merged into the
+    final report before the grade report task is marked as succeeded.  The
+    task is marked as failed instead if any of its subtasks, or the merge,
+    failed.
+    """
+    if not update_subtask_status(entry_id, current_task_id, subtask_status, defer_completion=True):
+        return
+
+    subtasks = json.loads(InstructorTask.objects.get(pk=entry_id).subtasks)
+    if subtasks['failed']:
+        TASK_LOG.error(
+            "InstructorTask ID: %s, %d of %d grade report subtasks failed, not merging the partial reports",
+            entry_id, subtasks['failed'], subtasks['total']
+        )
+        try:
+            CourseGradeReport.delete_subtask_reports(xmodule_instance_args, entry_id)
+        finally:
+            complete_task_after_subtasks(entry_id, SubtasksFailedException(
+                f"{subtasks['failed']} of {subtasks['total']} subtasks failed"
+            ))
+        return
+
+    try:
+        CourseGradeReport.merge_subtask_reports(xmodule_instance_args, entry_id)
+    except Exception as exc:
+        TASK_LOG.exception("InstructorTask ID: %s, Merging the partial grade reports failed", entry_id)
+        complete_task_after_subtasks(entry_id, exc, traceback.format_exc())
+        raise
+    complete_task_after_subtasks(entry_id)
+
+
 @shared_task(base=BaseInstructorTask)
 @set_code_owner_attribute
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
@@ -7,8 +7,8 @@ import logging
 from datetime import datetime
 from time import time
 from pytz import UTC
-from lms.djangoapps.instructor_analytics.basic import enrolled_students_features, list_may_enroll
-from lms.djangoapps.instructor_analytics.csvs import format_dictlist
+from lms.djangoapps.instructor_analytics.basic import iter_enrolled_students_features, list_may_enroll
+from lms.djangoapps.instructor_analytics.csvs import format_dictlist_rows
 from common.djangoapps.student.models import CourseEnrollment  # lint-amnesty, pylint: disable=unused-import
 
 from .runner import TaskProgress
@@ -18,6 +18,20 @@ TASK_LOG = logging.getLogger('edx.celery.task')
 FILTERED_OUT_ROLES = ['staff', 'instructor', 'finance_admin', 'sales_admin']
 
 
+def _counted_rows(task_progress, header, rows):
+    """
+    A generator of the given header and rows, which counts the rows as
+    attempted and succeeded in the given task_progress as they are
+    consumed.
+    """
+    yield header
+    for row in rows:
+        task_progress.attempted += 1
+        task_progress.succeeded += 1
+        yield row
+    task_progress.skipped = task_progress.total - task_progress.attempted
+
+
 def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing
@@ -34,18 +48,13 @@ def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_inp
     # Compute result table and format it
     query_features = task_input.get('features')
     student_data = list_may_enroll(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    header, rows = format_dictlist_rows(student_data, query_features)
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
 
     # Perform the upload
-    upload_csv_to_report_store(rows, 'may_enroll_info', course_id, start_date)
+    upload_csv_to_report_store(_counted_rows(task_progress, header, rows), 'may_enroll_info', course_id, start_date)
 
     return task_progress.update_task_state(extra_meta=current_step)
 
@@ -64,15 +73,11 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     current_step = {'step': 'Calculating Profile Info'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # compute the student features table and format it
+    # compute the student features table and format it, as the rows are
+    # streamed to the report store
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    student_data = iter_enrolled_students_features(course_id, query_features)
+    header, rows = format_dictlist_rows(student_data, query_features)
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
@@ -80,6 +85,12 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     # Perform the upload
     upload_parent_dir = task_input.get('upload_parent_dir', '')
     upload_filename = task_input.get('filename', 'student_profile_info')
-    upload_csv_to_report_store(rows, upload_filename, course_id, start_date, parent_dir=upload_parent_dir)
+    upload_csv_to_report_store(
+        _counted_rows(task_progress, header, rows),
+        upload_filename,
+        course_id,
+        start_date,
+        parent_dir=upload_parent_dir,
+    )
 
     return task_progress.update_task_state(extra_meta=current_step)
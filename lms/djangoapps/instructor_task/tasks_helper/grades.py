@@ -2,11 +2,12 @@
 Functionality for generating grade reports.
 """
 
+import json
 import logging
 import re
 from collections import OrderedDict, defaultdict
 from datetime import datetime
-from itertools import chain
+from itertools import chain, count
 from time import time
 
 from django.conf import settings
@@ -33,6 +34,8 @@ from lms.djangoapps.instructor_task.config.waffle import (
     optimize_get_learners_switch_enabled,
     problem_grade_report_verified_only
 )
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -45,7 +48,7 @@ from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import RowSpool, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -162,31 +165,38 @@ class GradeReportBase:
         course_id = context.course_id
         return get_enrolled_learners_for_course(course_id=course_id, verified_only=context.report_for_verified_only)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, error_rows):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        A generator of the success rows for the given batched_rows and
+        context, which adds the error rows to the given RowSpool.
+
+        The metrics on task status are complete once the generator is
+        exhausted.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        num_succeeded = 0
+        for success_batch, error_batch in batched_rows:
+            num_succeeded += len(success_batch)
+            error_rows.extend(error_batch)
+            yield from success_batch
 
         # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
+        context.task_progress.succeeded = num_succeeded
         context.task_progress.failed = len(error_rows)
         context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_rows, error_rows):
+    def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
         """
         Creates and uploads a CSV for the given headers and rows.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store(success_rows, context.upload_filename, context.course_id, date)
-        if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, context.upload_filename + '_err', context.course_id, date)
+        upload_csv_to_report_store(
+            chain([success_headers], success_rows), context.upload_filename, context.course_id, date
+        )
+        if len(error_rows) > 0:
+            upload_csv_to_report_store(
+                chain([error_headers], error_rows), context.upload_filename + '_err', context.course_id, date
+            )
 
     def log_additional_info_for_testing(self, context, message):
         """
@@ -218,6 +228,7 @@ class _CourseGradeReportContext:
             task_input=_task_input,
         )
         self.action_name = action_name
+        self.entry_id = _entry_id
         self.course_id = course_id
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
         self.report_for_verified_only = course_grade_report_verified_only(self.course_id)
@@ -408,6 +419,14 @@ class CourseGradeReport:
     # Batch size for chunking the list of enrollees in the course.
     USER_BATCH_SIZE = 100
 
+    # Number of enrollees graded by each subtask of a report that is
+    # generated in parallel.
+    USERS_PER_SUBTASK = 2000
+
+    # Directory, relative to the report's upload directory, in which
+    # subtasks store their partial reports.
+    PARTIAL_REPORTS_DIR = 'partial_grade_reports'
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
@@ -417,6 +436,174 @@ class CourseGradeReport:
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)  # lint-amnesty, pylint: disable=protected-access
 
+    @classmethod
+    def generate_in_subtasks(
+        cls, create_subtask_fcn, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name
+    ):
+        """
+        Public method to generate a grade report by fanning batches of
+        enrollees out to parallel subtasks.
+
+        `create_subtask_fcn` is a function of the subtask's index, the ids
+        of its enrollees and its initial SubtaskStatus that constructs the
+        subtask, which should call `grade_subtask` and, once it is the last
+        subtask to complete, `merge_subtask_reports`, or
+        `delete_subtask_reports` if any of the subtasks failed.
+
+        Reports for courses that fit in a single subtask are generated
+        serially by `generate`.
+        """
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            # The parent task was requeued after its subtasks were queued.
+            TASK_LOG.warning('Task %s has already queued grade report subtasks: %s', entry.task_id, entry)
+            return json.loads(entry.task_output)
+
+        filter_kwargs = {'courseenrollment__course_id': course_id}
+        if course_grade_report_verified_only(course_id):
+            filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
+        users = get_user_model().objects.filter(**filter_kwargs).order_by('id')
+        total_num_users = users.count()
+        if total_num_users <= cls.USERS_PER_SUBTASK:
+            return cls.generate(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+
+        subtask_indices = count()
+
+        def _create_grade_subtask(user_list, initial_subtask_status):
+            return create_subtask_fcn(
+                next(subtask_indices),
+                [user['pk'] for user in user_list],
+                initial_subtask_status,
+            )
+
+        return queue_subtasks_for_query(
+            entry,
+            action_name,
+            _create_grade_subtask,
+            [users],
+            [],
+            cls.USERS_PER_SUBTASK,
+            total_num_users,
+        )
+
+    @classmethod
+    def grade_subtask(cls, _xmodule_instance_args, _entry_id, subtask_index, user_ids):
+        """
+        Public method to grade the given enrollees for the subtask with the
+        given index of a report generated by `generate_in_subtasks`, and to
+        store their rows as partial reports.
+
+        Returns a tuple of the numbers of succeeded and failed enrollees.
+        """
+        report = CourseGradeReport()
+        context = report._subtask_context(_xmodule_instance_args, _entry_id)  # pylint: disable=protected-access
+        with modulestore().bulk_operations(context.course_id):
+            users = get_user_model().objects.filter(id__in=user_ids).select_related('profile').order_by('id')
+            success_rows, error_rows = report._rows_for_users(context, list(users))  # pylint: disable=protected-access
+
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        for rows, suffix in ((success_rows, ''), (error_rows, '_err')):
+            if rows:
+                report_store.store_rows(
+                    context.course_id,
+                    report._partial_report_name(context, subtask_index, suffix),  # pylint: disable=protected-access
+                    rows,
+                    context.upload_parent_dir,
+                )
+        return len(success_rows), len(error_rows)
+
+    @classmethod
+    def merge_subtask_reports(cls, _xmodule_instance_args, _entry_id):
+        """
+        Public method to merge the partial reports stored by the subtasks
+        of a report generated by `generate_in_subtasks` into the final
+        report, once all of its subtasks have completed.
+        """
+        report = CourseGradeReport()
+        context = report._subtask_context(_xmodule_instance_args, _entry_id)  # pylint: disable=protected-access
+        with modulestore().bulk_operations(context.course_id):
+            success_headers = report._success_headers(context)  # pylint: disable=protected-access
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        num_subtasks = json.loads(entry.subtasks)['total']
+
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        partial_reports = report._partial_report_names(context, num_subtasks)  # pylint: disable=protected-access
+
+        def _partial_rows(suffix):
+            for filename in partial_reports[suffix]:
+                yield from report_store.read_rows(context.course_id, filename, context.upload_parent_dir)
+
+        TASK_LOG.info('%s, Task type: %s, Merging %d partial grade reports', context.task_info_string,
+                      context.action_name, num_subtasks)
+        with RowSpool() as error_rows:
+            error_rows.extend(_partial_rows('_err'))
+            report._upload(  # pylint: disable=protected-access
+                context,
+                success_headers,
+                _partial_rows(''),
+                report._error_headers(),  # pylint: disable=protected-access
+                error_rows,
+            )
+        report._delete_partial_reports(context, num_subtasks)  # pylint: disable=protected-access
+
+        task_progress = json.loads(entry.task_output)
+        TASK_LOG.info('%s, Task type: %s, Completed grades: %s', context.task_info_string, context.action_name,
+                      task_progress)
+        return task_progress
+
+    @classmethod
+    def delete_subtask_reports(cls, _xmodule_instance_args, _entry_id):
+        """
+        Public method to delete the partial reports stored by the subtasks
+        of a report generated by `generate_in_subtasks`, when they are not
+        merged because some of its subtasks have failed.
+        """
+        report = CourseGradeReport()
+        context = report._subtask_context(_xmodule_instance_args, _entry_id)  # pylint: disable=protected-access
+        num_subtasks = json.loads(InstructorTask.objects.get(pk=_entry_id).subtasks)['total']
+        report._delete_partial_reports(context, num_subtasks)  # pylint: disable=protected-access
+
+    def _subtask_context(self, _xmodule_instance_args, _entry_id):
+        """
+        Returns the report context for a subtask of the given InstructorTask.
+        """
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        action_name = json.loads(entry.task_output)['action_name']
+        return _CourseGradeReportContext(
+            _xmodule_instance_args, _entry_id, entry.course_id, json.loads(entry.task_input), action_name,
+        )
+
+    def _partial_report_name(self, context, subtask_index, suffix):
+        """
+        Returns the name of the partial report with the given suffix stored
+        by the subtask with the given index.
+        """
+        return '{dir}/{entry_id}/{filename}_{subtask_index:05d}{suffix}.csv'.format(
+            dir=self.PARTIAL_REPORTS_DIR,
+            entry_id=context.entry_id,
+            filename=context.upload_filename,
+            subtask_index=subtask_index,
+            suffix=suffix,
+        )
+
+    def _partial_report_names(self, context, num_subtasks):
+        """
+        Returns the names of the partial reports stored by the given number
+        of subtasks, keyed by their suffix.
+        """
+        return {
+            suffix: [self._partial_report_name(context, subtask_index, suffix) for subtask_index in range(num_subtasks)]
+            for suffix in ('', '_err')
+        }
+
+    def _delete_partial_reports(self, context, num_subtasks):
+        """
+        Deletes the partial reports stored by the given number of subtasks.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        for filename in chain(*self._partial_report_names(context, num_subtasks).values()):
+            report_store.delete(context.course_id, filename, context.upload_parent_dir)
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -426,11 +613,10 @@ class CourseGradeReport:
         error_headers = self._error_headers()
         batched_rows = self._batched_rows(context)
 
-        context.update_status('Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
-
-        context.update_status('Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+        context.update_status('Compiling and uploading grades')
+        with RowSpool() as error_rows:
+            success_rows = self._compile(context, batched_rows, error_rows)
+            self._upload(context, success_headers, success_rows, error_headers, error_rows)
 
         return context.update_status('Completed grades')
 
@@ -463,22 +649,25 @@ class CourseGradeReport:
             users = [u for u in users if u is not None]
             yield self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, error_rows):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        A generator of the success rows for the given batched_rows and
+        context, which adds the error rows to the given RowSpool.
+
+        The metrics on task status are complete once the generator is
+        exhausted.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        num_succeeded = 0
+        for success_batch, error_batch in batched_rows:
+            num_succeeded += len(success_batch)
+            error_rows.extend(error_batch)
+            yield from success_batch
 
         # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
+        context.task_progress.succeeded = num_succeeded
         context.task_progress.failed = len(error_rows)
         context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
     def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
         """
@@ -486,7 +675,7 @@ class CourseGradeReport:
         """
         date = datetime.now(UTC)
         upload_csv_to_report_store(
-            [success_headers] + success_rows,
+            chain([success_headers], success_rows),
             context.upload_filename,
             context.course_id,
             date,
@@ -494,7 +683,7 @@ class CourseGradeReport:
         )
         if len(error_rows) > 0:
             upload_csv_to_report_store(
-                [error_headers] + error_rows,
+                chain([error_headers], error_rows),
                 '{}_err'.format(context.upload_filename),
                 context.course_id,
                 date,
@@ -742,12 +931,12 @@ class ProblemGradeReport(GradeReportBase):
         error_headers = self._error_headers()
         batched_rows = self._batched_rows(context)
 
-        context.update_status('ProblemGradeReport - 2: Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
-        context.update_status('ProblemGradeReport - 3: Uploading grades')
-        self._upload(context, [success_headers] + success_rows, [error_headers] + error_rows)
+        context.update_status('ProblemGradeReport - 2: Compiling and uploading grades')
+        with RowSpool() as error_rows:
+            success_rows = self._compile(context, batched_rows, error_rows)
+            self._upload(context, success_headers, success_rows, error_headers, error_rows)
 
-        return context.update_status('ProblemGradeReport - 4: Completed problem grades')
+        return context.update_status('ProblemGradeReport - 3: Completed problem grades')
 
     def _problem_grades_header(self):
         """Problem Grade report header."""
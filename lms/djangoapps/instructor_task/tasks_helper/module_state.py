@@ -5,6 +5,7 @@ Instructor Tasks related to module state.
 
 import json
 import logging
+from collections import defaultdict
 from time import time
 
 from django.utils.translation import ugettext_noop
@@ -13,13 +14,13 @@ from xblock.runtime import KvsFieldData
 from xblock.scorable import Score
 
 from capa.responsetypes import LoncapaProblemError, ResponseError, StudentInputError
-from common.djangoapps.student.models import get_user_by_username_or_email
+from common.djangoapps.student.models import anonymous_id_for_user, get_user_by_username_or_email
 from common.djangoapps.track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
 from common.djangoapps.track.views import task_track
 from common.djangoapps.util.db import outer_atomic
 from lms.djangoapps.courseware.courses import get_problems_in_section
 from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache
-from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.models import StudentModule, chunks
 from lms.djangoapps.courseware.module_render import get_module_for_descriptor_internal
 from lms.djangoapps.grades.api import events as grades_events
 from openedx.core.lib.courses import get_course_by_id
@@ -31,8 +32,14 @@ from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED,
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# Number of StudentModules prepared at a time by the prime_fcn of perform_module_state_update.
+# The prepared results are cached, so each chunk is updated right after it is prepared.
+PRIME_CHUNK_SIZE = 100
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+
+def perform_module_state_update(
+    update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name, prime_fcn=None,
+):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -44,6 +51,10 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `prime_fcn` is not None, it is called with the map of the usage keys to the module_descriptors being
+    updated and each chunk of PRIME_CHUNK_SIZE StudentModules, right before the chunk is updated, to prepare
+    for their updates in bulk.  The task state is then updated after each chunk.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -89,26 +100,90 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[str(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        update_status = update_fcn(module_descriptor, module_to_update, task_input)
-        if update_status == UPDATE_STATUS_SUCCEEDED:
-            # If the update_fcn returns true, then it performed some kind of work.
-            # Logging of failures is left to the update_fcn itself.
-            task_progress.succeeded += 1
-        elif update_status == UPDATE_STATUS_FAILED:
-            task_progress.failed += 1
-        elif update_status == UPDATE_STATUS_SKIPPED:
-            task_progress.skipped += 1
-        else:
-            raise UpdateProblemModuleStateError(f"Unexpected update_status returned: {update_status}")
+    if prime_fcn is None:
+        module_chunks = [modules_to_update]
+    else:
+        module_chunks = chunks(modules_to_update, PRIME_CHUNK_SIZE)
+
+    for module_chunk in module_chunks:
+        if prime_fcn is not None:
+            prime_fcn(problems, module_chunk)
+
+        for module_to_update in module_chunk:
+            task_progress.attempted += 1
+            module_descriptor = problems[str(module_to_update.module_state_key)]
+            # There is no try here:  if there's an error, we let it throw, and the task will
+            # be marked as FAILED, with a stack trace.
+            update_status = update_fcn(module_descriptor, module_to_update, task_input)
+            if update_status == UPDATE_STATUS_SUCCEEDED:
+                # If the update_fcn returns true, then it performed some kind of work.
+                # Logging of failures is left to the update_fcn itself.
+                task_progress.succeeded += 1
+            elif update_status == UPDATE_STATUS_FAILED:
+                task_progress.failed += 1
+            elif update_status == UPDATE_STATUS_SKIPPED:
+                task_progress.skipped += 1
+            else:
+                raise UpdateProblemModuleStateError(f"Unexpected update_status returned: {update_status}")
+
+        if prime_fcn is not None:
+            task_progress.update_task_state()
 
     return task_progress.update_task_state()
 
 
+def prime_rescore_problem_module_state(xmodule_instance_args, problems, student_modules):
+    """
+    Prepares the rescoring of the given StudentModules of the given problems.
+
+    Rescoring a capa problem re-executes the script code of the problem, with the seed of
+    each student, in a sandbox of its own.  Instead, execute it for every given student of
+    each problem in batches, caching the results so that rescore_problem_module_state, which
+    is called right after for the same StudentModules, reads them from the cache.
+    """
+    modules_by_problem = defaultdict(list)
+    for student_module in student_modules:
+        modules_by_problem[str(student_module.module_state_key)].append(student_module)
+
+    for usage_key, problem_modules in modules_by_problem.items():
+        if len(problem_modules) < 2:
+            continue
+        module_descriptor = problems[usage_key]
+        course_id = problem_modules[0].course_id
+        instance = _get_module_instance_for_task(
+            course_id,
+            problem_modules[0].student,
+            module_descriptor,
+            xmodule_instance_args,
+            grade_bucket_type='rescore',
+        )
+        try:
+            lcp = getattr(instance, 'lcp', None)
+        except LoncapaProblemError:
+            # The problem is rescored without priming, which reports the error for each student.
+            continue
+        if lcp is None:
+            continue
+
+        # The anonymous ids must match the ones given to the problem by module_render.
+        anonymous_id_course_id = (
+            None if getattr(module_descriptor, 'requires_per_student_anonymous_id', False) else course_id
+        )
+        seeds_and_anonymous_student_ids = []
+        for student_module in problem_modules:
+            seed = json.loads(student_module.state or '{}').get('seed')
+            if seed is not None:
+                seeds_and_anonymous_student_ids.append(
+                    (seed, anonymous_id_for_user(student_module.student, anonymous_id_course_id))
+                )
+
+        TASK_LOG.info(
+            "priming the rescoring of problem %(loc)s for %(count)d students",
+            dict(loc=usage_key, count=len(seeds_and_anonymous_student_ids))
+        )
+        lcp.prime_context_cache(seeds_and_anonymous_student_ids)
+
+
 @outer_atomic
 def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
     '''
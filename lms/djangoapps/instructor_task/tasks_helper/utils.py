@@ -3,10 +3,14 @@ Utility methods for instructor tasks
 """
 
 
+import csv
+import os
+from tempfile import SpooledTemporaryFile
+
 from eventtracking import tracker
 
 from common.djangoapps.util.file import course_filename_prefix_generator
-from lms.djangoapps.instructor_task.models import ReportStore
+from lms.djangoapps.instructor_task.models import REPORT_SPOOL_MAX_SIZE, ReportStore
 
 REPORT_REQUESTED_EVENT_NAME = 'edx.instructor.report.requested'
 
@@ -19,6 +23,54 @@ UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
 
+class RowSpool:
+    """
+    Collects the rows of a CSV report in a temporary file that is kept
+    in memory only up to REPORT_SPOOL_MAX_SIZE bytes, so that reports can
+    set aside any number of rows while they are being generated.
+
+    Rows are read back, as lists of strings, by iterating over the spool.
+    """
+    def __init__(self):
+        self._file = SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE, mode='w+', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._num_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._num_rows
+
+    def __iter__(self):
+        self._file.seek(0)
+        yield from csv.reader(self._file)
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, row):
+        """
+        Adds the given row to the spool.
+        """
+        self._writer.writerow(row)
+        self._num_rows += 1
+
+    def extend(self, rows):
+        """
+        Adds the given rows to the spool.
+        """
+        for row in rows:
+            self.append(row)
+
+    def close(self):
+        """
+        Discards the rows of the spool.
+        """
+        self._file.close()
+
+
 def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD', parent_dir=''):
     """
     Upload data as a CSV using ReportStore.
@@ -30,6 +82,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            The rows can also be passed as a generator, in which case
+            they are streamed to the ReportStore one at a time.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
         parent_dor: Name of the directory where the CSV file will be stored
@@ -6,6 +6,8 @@ Tests for instructor_task/models.py.
 import copy
 import time
 from io import StringIO
+from unittest.mock import patch
+
 import pytest
 from django.conf import settings
 from django.test import SimpleTestCase, TestCase, override_settings
@@ -66,6 +68,21 @@ class ReportStoreTestMixin:
 
         assert [link[0] for link in report_store.links_for(self.course_id)] == ['new_file', 'middle_file', 'old_file']
 
+    @patch('lms.djangoapps.instructor_task.models.REPORT_SPOOL_MAX_SIZE', 64)
+    def test_store_rows_generator(self):
+        """
+        Test that ReportStore.store_rows() streams rows from a generator,
+        including reports that are spooled to disk.
+        """
+        report_store = self.create_report_store()  # lint-amnesty, pylint: disable=assignment-from-no-return
+        rows = [['id', 'name'], *([str(index), 'ni\xf1o, "jr"\n'] for index in range(100))]
+
+        report_store.store_rows(self.course_id, 'report.csv', (row for row in rows))
+        assert report_store.read_rows(self.course_id, 'report.csv') == rows
+
+        report_store.delete(self.course_id, 'report.csv')
+        assert report_store.read_rows(self.course_id, 'report.csv') == []
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
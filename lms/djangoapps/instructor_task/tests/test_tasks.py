@@ -490,6 +490,45 @@ class TestRescoreInstructorTask(TestInstructorTasks):
             action_name='rescored'
         )
 
+    @patch('lms.djangoapps.instructor_task.tasks_helper.module_state.PRIME_CHUNK_SIZE', 4)
+    def test_rescoring_primed_in_chunks(self):
+        """
+        Tests the students are prepared for rescoring in chunks, right before they are rescored.
+        """
+        num_students = 10
+        self._create_students_with_state(num_students)
+        task_entry = self._create_input_entry()
+        calls = []
+
+        def prime(_xmodule_instance_args, _problems, student_modules):
+            calls.append(('prime', len(student_modules)))
+
+        def rescore(_xmodule_instance_args, _module_descriptor, _student_module, _task_input):
+            calls.append(('rescore', 1))
+            return 'succeeded'
+
+        with patch(
+            'lms.djangoapps.instructor_task.tasks.prime_rescore_problem_module_state', side_effect=prime
+        ), patch(
+            'lms.djangoapps.instructor_task.tasks.rescore_problem_module_state', side_effect=rescore
+        ):
+            self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        assert calls == (
+            [('prime', 4)] + [('rescore', 1)] * 4 +
+            [('prime', 4)] + [('rescore', 1)] * 4 +
+            [('prime', 2)] + [('rescore', 1)] * 2
+        )
+        self.assert_task_output(
+            output=self.get_task_output(task_entry.id),
+            total=num_students,
+            attempted=num_students,
+            succeeded=num_students,
+            skipped=0,
+            failed=0,
+            action_name='rescored'
+        )
+
 
 class TestResetAttemptsInstructorTask(TestInstructorTasks):
     """Tests instructor task that resets problem attempts."""
@@ -7,6 +7,7 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 """
 
 
+import json
 import os
 import shutil
 import tempfile
@@ -15,9 +16,12 @@ from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
 from unittest.mock import ANY, MagicMock, Mock, patch
 from urllib.parse import quote
+from uuid import uuid4
 
 import ddt
+import pytest
 import unicodecsv
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.test.utils import override_settings
 from edx_django_utils.cache import RequestCache
@@ -38,6 +42,8 @@ from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsec
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_subtask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import upload_may_enroll_csv, upload_students_csv
 from lms.djangoapps.instructor_task.tasks_helper.grades import (
@@ -54,6 +60,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_ora2_submission_files,
     upload_ora2_summary
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -429,6 +436,129 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         )
 
 
+class TestParallelCourseGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that course grade reports can be generated in parallel subtasks.
+    """
+    def setUp(self):
+        super().setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student(f'student{index}') for index in range(5)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='grade_course',
+        )
+        self.queued_subtasks = []
+
+    def _create_subtask(self, subtask_index, user_ids, initial_subtask_status):
+        """
+        Returns a mock subtask that records its arguments when it is queued.
+        """
+        subtask = Mock()
+        subtask.apply_async.side_effect = lambda: self.queued_subtasks.append(
+            (subtask_index, user_ids, initial_subtask_status.to_dict())
+        )
+        return subtask
+
+    def _generate_in_subtasks(self):
+        """
+        Queues the subtasks of a grade report and returns the progress.
+        """
+        with patch.object(CourseGradeReport, 'USERS_PER_SUBTASK', 2):
+            return CourseGradeReport.generate_in_subtasks(
+                self._create_subtask, None, self.entry.id, self.course.id, {}, 'graded'
+            )
+
+    def _run_subtasks(self, subtasks):
+        """
+        Runs the given queued subtasks.
+        """
+        for subtask_index, user_ids, subtask_status_dict in subtasks:
+            calculate_grades_csv_subtask(self.entry.id, None, subtask_index, user_ids, subtask_status_dict)
+
+    def test_generate_in_subtasks(self):
+        progress = self._generate_in_subtasks()
+        self.assertDictContainsSubset({'attempted': 0, 'total': len(self.students)}, progress)
+        assert [user_ids for _, user_ids, _ in self.queued_subtasks] == [
+            [self.students[0].id, self.students[1].id],
+            [self.students[2].id, self.students[3].id],
+            [self.students[4].id],
+        ]
+
+        # Complete the subtasks out of order; the report keeps the order of the users.
+        self._run_subtasks(reversed(self.queued_subtasks))
+        self.verify_rows_in_csv(
+            [{'Student ID': str(student.id), 'Username': student.username} for student in self.students],
+            ignore_other_columns=True,
+        )
+
+        entry = InstructorTask.objects.get(id=self.entry.id)
+        assert entry.task_state == SUCCESS
+        self.assertDictContainsSubset(
+            {'attempted': len(self.students), 'succeeded': len(self.students), 'failed': 0},
+            json.loads(entry.task_output),
+        )
+
+        # Only the merged report remains in the report store.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        assert len(report_store.links_for(self.course.id)) == 1
+        assert not os.listdir(os.path.join(
+            self.tmp_dir,
+            report_store.path_to(self.course.id, CourseGradeReport.PARTIAL_REPORTS_DIR),
+            str(self.entry.id),
+        ))
+
+    def test_merge_waits_for_all_subtasks(self):
+        self._generate_in_subtasks()
+        with patch.object(CourseGradeReport, 'merge_subtask_reports') as mock_merge:
+            self._run_subtasks(self.queued_subtasks[:-1])
+            mock_merge.assert_not_called()
+            self._run_subtasks(self.queued_subtasks[-1:])
+            mock_merge.assert_called_once_with(None, self.entry.id)
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.grades.CourseGradeReport._rows_for_users')
+    def test_failed_subtask(self, mock_rows_for_users):
+        self._generate_in_subtasks()
+        mock_rows_for_users.side_effect = [TypeError('Cannot grade students'), ([], []), ([], [])]
+        with patch.object(CourseGradeReport, 'merge_subtask_reports') as mock_merge:
+            with pytest.raises(TypeError):
+                self._run_subtasks(self.queued_subtasks[:1])
+            self._run_subtasks(self.queued_subtasks[1:])
+        mock_merge.assert_not_called()
+
+        entry = InstructorTask.objects.get(id=self.entry.id)
+        assert entry.task_state == FAILURE
+        assert json.loads(entry.task_output) == {
+            'exception': 'SubtasksFailedException', 'message': '1 of 3 subtasks failed',
+        }
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        assert not report_store.links_for(self.course.id)
+
+    def test_failed_merge(self):
+        self._generate_in_subtasks()
+        with patch.object(CourseGradeReport, 'merge_subtask_reports', side_effect=ValueError('Cannot merge')):
+            self._run_subtasks(self.queued_subtasks[:-1])
+            assert InstructorTask.objects.get(id=self.entry.id).task_state != SUCCESS
+            with pytest.raises(ValueError):
+                self._run_subtasks(self.queued_subtasks[-1:])
+
+        entry = InstructorTask.objects.get(id=self.entry.id)
+        assert entry.task_state == FAILURE
+        self.assertDictContainsSubset(
+            {'exception': 'ValueError', 'message': 'Cannot merge'}, json.loads(entry.task_output)
+        )
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_small_course_generated_serially(self, _mock_current_task):
+        with patch.object(CourseGradeReport, 'USERS_PER_SUBTASK', len(self.students)):
+            result = CourseGradeReport.generate_in_subtasks(
+                self._create_subtask, None, self.entry.id, self.course.id, {}, 'graded'
+            )
+        assert not self.queued_subtasks
+        self.assertDictContainsSubset({'attempted': len(self.students), 'succeeded': len(self.students)}, result)
+
+
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
 
@@ -1287,12 +1417,13 @@ class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
                 upload_students_csv(None, None, self.course.id, task_input, 'calculated')
 
         mock_upload_report.assert_called_once_with(
-            [[], []],
+            ANY,
             'student_profile_info',
             self.course.id,
             ANY,
             parent_dir=directory_name
         )
+        assert list(mock_upload_report.call_args[0][0]) == [[], []]
 
     def test_custom_filename(self):
         self.create_student('student', 'student@example.com')
@@ -1304,7 +1435,8 @@ class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
             with patched_upload as mock_upload_report:
                 upload_students_csv(None, None, self.course.id, task_input, 'calculated')
 
-        mock_upload_report.assert_called_once_with([[], []], filename, self.course.id, ANY, parent_dir='')
+        mock_upload_report.assert_called_once_with(ANY, filename, self.course.id, ANY, parent_dir='')
+        assert list(mock_upload_report.call_args[0][0]) == [[], []]
 
     @ddt.data(['student', 'student\xec'])
     def test_unicode_usernames(self, students):
@@ -1527,6 +1527,13 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# .. setting_name: COURSE_ASSETS_CACHE_MAX_ASSET_SIZE
+# .. setting_default: 262144
+# .. setting_description: Size in bytes under which the contentserver keeps course assets in the
+#   course_assets cache (or the default cache, if there is none). Larger assets are streamed from the
+#   contentstore on every request, instead of being held in memory and pickled whole into the cache.
+COURSE_ASSETS_CACHE_MAX_ASSET_SIZE = 256 * 1024
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -1658,6 +1665,19 @@ CODE_JAIL_REST_SERVICE_CONNECT_TIMEOUT = 0.5  # time in seconds
 #   codejail remote service endpoint.
 CODE_JAIL_REST_SERVICE_READ_TIMEOUT = 3.5  # time in seconds
 
+# Codejail worker pool
+ENABLE_CODEJAIL_WORKER_POOL = False
+# .. setting_name: CODE_JAIL_WORKER_POOL_SIZE
+# .. setting_default: 4
+# .. setting_description: Number of pre-warmed codejail worker processes started by each
+#   process executing sandboxed code, when ENABLE_CODEJAIL_WORKER_POOL is True.
+CODE_JAIL_WORKER_POOL_SIZE = 4
+# .. setting_name: CODE_JAIL_WORKER_POOL_WAIT_TIMEOUT
+# .. setting_default: 1
+# .. setting_description: Number of seconds to wait for an idle codejail worker process,
+#   after which the code is executed by codejail instead.
+CODE_JAIL_WORKER_POOL_WAIT_TIMEOUT = 1
+
 
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG in your environment settings files, not here
@@ -2133,6 +2153,10 @@ MIDDLEWARE = [
 
     # to redirected unenrolled students to the course info page
     'lms.djangoapps.courseware.middleware.CacheCourseIdMiddleware',
+
+    # Writes the user state of blocks deferred during the request
+    'lms.djangoapps.courseware.middleware.UserStateWriteBehindMiddleware',
+
     'lms.djangoapps.courseware.middleware.RedirectMiddleware',
 
     'lms.djangoapps.course_wiki.middleware.WikiAccessMiddleware',
@@ -2787,6 +2811,16 @@ BLOCK_STRUCTURES_SETTINGS = dict(
     #   https://github.com/edx/edx-platform/pull/17760,
     #   https://openedx.atlassian.net/browse/DEPR-146
     PRUNING_ACTIVE=False,
+
+    # .. setting_name: BLOCK_STRUCTURES_SETTINGS['LOCAL_CACHE_SIZE']
+    # .. setting_default: 0
+    # .. setting_description: Maximum number of deserialized block structures to keep in an
+    #   in-process LRU cache in front of the block structure cache, per worker process. Hot courses
+    #   are then served without fetching and unpickling their collected structures on every request.
+    #   Set to 0 to disable the in-process cache.
+    # .. setting_warnings: Each cached structure holds the collected data of a whole course in
+    #   memory, so size this according to the memory available to each worker process.
+    LOCAL_CACHE_SIZE=0,
 )
 
 ################################ Bulk Email ###################################
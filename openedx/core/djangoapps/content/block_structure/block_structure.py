@@ -30,6 +30,9 @@ class _BlockRelations:
     Data structure to encapsulate relationships for a single block,
     including its children and parents.
     """
+    # A course can have thousands of blocks, so avoid a __dict__ per block.
+    __slots__ = ('parents', 'children')
+
     def __init__(self):
 
         # List of usage keys of this block's parents.
@@ -40,6 +43,25 @@ class _BlockRelations:
         # list [UsageKey]
         self.children = []
 
+    def copy(self):
+        """
+        Returns a new _BlockRelations with copies of this instance's
+        parents and children lists.
+        """
+        block_relations = _BlockRelations()
+        block_relations.parents = list(self.parents)
+        block_relations.children = list(self.children)
+        return block_relations
+
+    def __getstate__(self):
+        return {'parents': self.parents, 'children': self.children}
+
+    def __setstate__(self, state):
+        # The state is a dict, as it was before __slots__ was introduced,
+        # so previously pickled instances can still be loaded.
+        self.parents = state['parents']
+        self.children = state['children']
+
 
 class BlockStructure:
     """
@@ -63,6 +85,18 @@ class BlockStructure:
         # dict {UsageKey: _BlockRelations}
         self._block_relations = {}
 
+        # Set of usage keys whose _BlockRelations are owned by this
+        # structure while its relations are shared copy-on-write with
+        # another structure.  None if all relations are owned.
+        # set {UsageKey} or None
+        self._owned_block_relations = None
+
+        # Cached topological order of the blocks reachable from the
+        # root, shared by copies of this structure.  Computed on first
+        # use and reset whenever the relations change.
+        # list [UsageKey] or None
+        self._topological_order = None
+
         # Add the root block.
         self._add_block(self._block_relations, root_block_usage_key)
 
@@ -121,7 +155,8 @@ class BlockStructure:
                 new root of the block structure.
         """
         self.root_block_usage_key = usage_key
-        self._block_relations[usage_key].parents = []
+        self._get_mutable_relations(usage_key).parents = []
+        self._topological_order = None
 
     def __contains__(self, usage_key):
         """
@@ -168,8 +203,11 @@ class BlockStructure:
             generator - A generator object created from the
                 traverse_topologically method.
         """
+        if start_node is None or start_node == self.root_block_usage_key:
+            return self._traverse_topological_order(filter_func, yield_descendants_of_unyielded)
+
         return traverse_topologically(
-            start_node=start_node or self.root_block_usage_key,
+            start_node=start_node,
             get_parents=self.get_parents,
             get_children=self.get_children,
             filter_func=filter_func,
@@ -202,6 +240,69 @@ class BlockStructure:
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _get_topological_order(self):
+        """
+        Returns the blocks reachable from the root in topological
+        order, computing and caching it if needed.
+        """
+        if self._topological_order is None:
+            self._topological_order = list(traverse_topologically(
+                start_node=self.root_block_usage_key,
+                get_parents=self.get_parents,
+                get_children=self.get_children,
+                yield_descendants_of_unyielded=True,
+            ))
+        return self._topological_order
+
+    def _traverse_topological_order(self, filter_func=None, yield_descendants_of_unyielded=False):
+        """
+        Generator for a topological traversal from the root that follows
+        the cached topological order instead of walking the relations,
+        yielding the same blocks in the same order as
+        openedx.core.lib.graph_traversals.traverse_topologically.
+
+        The parents of each block are read as it is visited, so the
+        filter_func may remove the visited block from the structure.
+
+        Arguments:
+            See the description in
+            openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        filter_func = filter_func or (lambda __: True)
+        block_relations = self._block_relations
+        root_block_usage_key = self.root_block_usage_key
+
+        # Keep track of which blocks have been visited and whether they
+        # were in fact yielded.
+        yield_results = {}  # dict(UsageKey:boolean)
+
+        for block_key in self._get_topological_order():
+            relations = block_relations.get(block_key)
+            if relations is None:
+                continue
+
+            if block_key != root_block_usage_key:
+                parents = relations.parents
+
+                # Only visit a block once all of its parents have been
+                # visited and, unless specified otherwise, one of them
+                # was yielded.  The common case of a single parent is
+                # checked with a single lookup.
+                if len(parents) == 1:
+                    parent_yielded = yield_results.get(parents[0])
+                    if parent_yielded is None or not (parent_yielded or yield_descendants_of_unyielded):
+                        continue
+                else:
+                    if not all(parent in yield_results for parent in parents):
+                        continue
+                    if not yield_descendants_of_unyielded and not any(yield_results[parent] for parent in parents):
+                        continue
+
+            should_yield_block = filter_func(block_key)
+            if should_yield_block:
+                yield block_key
+            yield_results[block_key] = should_yield_block
+
     def _prune_unreachable(self):
         """
         Mutates this block structure by removing any unreachable blocks.
@@ -228,7 +329,10 @@ class BlockStructure:
                         self._add_to_relations(pruned_block_relations, block_key, child)
 
         # Replace this structure's relations with the newly pruned one.
+        # All of its relations were newly created and so are owned.
         self._block_relations = pruned_block_relations
+        self._owned_block_relations = None
+        self._topological_order = None
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -238,7 +342,37 @@ class BlockStructure:
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
-        self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._add_block(self._block_relations, parent_key)
+        self._add_block(self._block_relations, child_key)
+
+        self._get_mutable_relations(child_key).parents.append(parent_key)
+        self._get_mutable_relations(parent_key).children.append(child_key)
+        self._topological_order = None
+
+    def _get_mutable_relations(self, usage_key):
+        """
+        Returns the _BlockRelations of the given block for updating.
+        If the relations are still shared with another structure, they
+        are first copied so the update is not visible to the other
+        structure.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the block whose
+                relations are to be updated.
+        """
+        owned = self._owned_block_relations
+        if owned is not None and usage_key not in owned:
+            self._block_relations[usage_key] = self._block_relations[usage_key].copy()
+            owned.add(usage_key)
+        return self._block_relations[usage_key]
+
+    def _share_copy_on_write(self):
+        """
+        Marks all the data of this structure as shared with another
+        structure, so that any subsequent update copies the affected
+        entry first.
+        """
+        self._owned_block_relations = set()
 
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
@@ -414,7 +548,40 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Sets of usage keys (and transformer names) whose BlockData
+        # (and TransformerData) are owned by this structure while they
+        # are shared copy-on-write with another structure.  None if all
+        # are owned.
+        # set {UsageKey} or None
+        self._owned_block_data = None
+        # set {string} or None
+        self._owned_transformer_data = None
+
     def copy(self):
+        """
+        Returns a new instance of BlockStructureBlockData with a
+        copy-on-write copy of this instance's contents.
+
+        Both structures initially share all their block relations,
+        block data and transformer data.  An entry is copied only when
+        either structure updates it through this class' methods, so
+        transforming the copy costs in proportion to the number of
+        blocks it actually changes.  Values returned by the getters of
+        either structure must therefore not be mutated in place.
+        """
+        from .factory import BlockStructureFactory
+        block_structure = BlockStructureFactory.create_new(
+            self.root_block_usage_key,
+            dict(self._block_relations),
+            TransformerDataMap(self.transformer_data),
+            dict(self._block_data_map),
+        )
+        self._share_copy_on_write()
+        block_structure._share_copy_on_write()  # pylint: disable=protected-access
+        block_structure._topological_order = self._topological_order  # pylint: disable=protected-access
+        return block_structure
+
+    def deepcopy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
         deep-copy of this instance's contents.
@@ -513,7 +680,7 @@ class BlockStructureBlockData(BlockStructure):
             value (any picklable type) - The value to associate with the
                 given key for the given transformer's data.
         """
-        setattr(self.transformer_data.get_or_create(transformer), key, value)
+        setattr(self._get_or_create_transformer_data(transformer), key, value)
 
     def get_transformer_block_data(self, usage_key, transformer):
         """
@@ -593,8 +760,8 @@ class BlockStructureBlockData(BlockStructure):
                 whose data entry is to be deleted.
         """
         try:
-            transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
-            delattr(transformer_block_data, key)
+            if key in self.get_transformer_block_data(usage_key, transformer).fields:
+                delattr(self._get_or_create_block(usage_key).transformer_data[transformer], key)
         except (AttributeError, KeyError):
             pass
 
@@ -623,15 +790,16 @@ class BlockStructureBlockData(BlockStructure):
 
         # Remove block from its children.
         for child in children:
-            self._block_relations[child].parents.remove(usage_key)
+            self._get_mutable_relations(child).parents.remove(usage_key)
 
         # Remove block from its parents.
         for parent in parents:
-            self._block_relations[parent].children.remove(usage_key)
+            self._get_mutable_relations(parent).children.remove(usage_key)
 
         # Remove block.
         self._block_relations.pop(usage_key, None)
         self._block_data_map.pop(usage_key, None)
+        self._topological_order = None
 
         # Recreate the graph connections if descendants are to be kept.
         if keep_descendants:
@@ -752,16 +920,44 @@ class BlockStructureBlockData(BlockStructure):
 
     def _get_or_create_block(self, usage_key):
         """
-        Returns the BlockData associated with the given usage_key.
-        If not found, creates and returns a new BlockData and
-        maps it to the given key.
+        Returns the BlockData associated with the given usage_key for
+        updating. If not found, creates and returns a new BlockData and
+        maps it to the given key.  If it is still shared with another
+        structure, it is first copied.
         """
+        owned = self._owned_block_data
         try:
-            return self._block_data_map[usage_key]
+            block_data = self._block_data_map[usage_key]
         except KeyError:
             block_data = BlockData(usage_key)
             self._block_data_map[usage_key] = block_data
-            return block_data
+        else:
+            if owned is not None and usage_key not in owned:
+                block_data = deepcopy(block_data)
+                self._block_data_map[usage_key] = block_data
+        if owned is not None:
+            owned.add(usage_key)
+        return block_data
+
+    def _get_or_create_transformer_data(self, transformer):
+        """
+        Returns the non-block-specific TransformerData of the given
+        transformer for updating. If not found, creates and returns a
+        new TransformerData.  If it is still shared with another
+        structure, it is first copied.
+        """
+        owned = self._owned_transformer_data
+        transformer_name = self.transformer_data._translate_key(transformer)  # pylint: disable=protected-access
+        if owned is not None and transformer_name not in owned:
+            if transformer_name in self.transformer_data:
+                self.transformer_data[transformer_name] = deepcopy(self.transformer_data[transformer_name])
+            owned.add(transformer_name)
+        return self.transformer_data.get_or_create(transformer_name)
+
+    def _share_copy_on_write(self):
+        super()._share_copy_on_write()
+        self._owned_block_data = set()
+        self._owned_transformer_data = set()
 
 
 class BlockStructureModulestoreData(BlockStructureBlockData):
@@ -2,6 +2,7 @@
 This module contains various configuration settings via
 waffle switches for the Block Structure framework.
 """
+from django.conf import settings
 from edx_django_utils.cache import RequestCache
 from edx_toggles.toggles import WaffleSwitch
 
@@ -67,6 +68,22 @@ RAISE_ERROR_WHEN_NOT_FOUND = WaffleSwitch(
 )
 
 
+# .. toggle_name: block_structure.compact_serialization
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, block structures are serialized to the cache and storage in
+#   a compact format which interns usage keys and stores relations and collected fields in flat
+#   arrays and columns, instead of as a zlib-compressed pickle of the structure's internal maps.
+#   The compact format is smaller and faster to deserialize. Data in either format can be read
+#   regardless of this switch, and cached data read in the other format is re-cached in the format
+#   selected by this switch.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-18
+COMPACT_SERIALIZATION = WaffleSwitch(
+    "block_structure.compact_serialization", __name__
+)
+
+
 def enable_storage_backing_for_cache_in_request():
     """
     Manually override the value of the STORAGE_BACKING_FOR_CACHE switch in the context of the request.
@@ -90,3 +107,11 @@ def cache_timeout_in_seconds():
     Returns and caches the current setting for cache_timeout_in_seconds.
     """
     return BlockStructureConfiguration.current().cache_timeout_in_seconds
+
+
+def local_cache_size():
+    """
+    Returns the maximum number of block structures to keep in the
+    in-process cache, or 0 if it is disabled.
+    """
+    return settings.BLOCK_STRUCTURES_SETTINGS.get('LOCAL_CACHE_SIZE', 0)
@@ -0,0 +1,255 @@
+"""
+Module for the compact serialization of collected BlockStructure data.
+
+Unlike a pickle of the structure's internal maps, the compact format:
+    * interns the usage keys of the structure into a single table, so
+      that every other reference to a block is an integer index,
+    * stores the block relations as flat adjacency arrays, and
+    * stores the xBlock fields and block-specific transformer data
+      column-wise, one column per field, instead of as one object
+      graph per block.
+
+This makes the serialized data smaller and avoids unpickling thousands
+of small FieldData objects when it is loaded.
+
+The serialized data is prefixed with a header that identifies the format
+and its schema version, so that data in the legacy zpickle format, which
+never starts with the header, can still be deserialized.
+"""
+
+
+import pickle
+import zlib
+from array import array
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+
+# Header identifying data serialized in the compact format.
+COMPACT_FORMAT_HEADER = b'BSC'
+
+# The latest version of the compact format.  Incrementally update this
+# value whenever the layout of the serialized data changes.
+COMPACT_FORMAT_VERSION = 1
+
+# Type codes of the arrays of block indices, for structures with up to
+# 65535 blocks and relations, and for larger structures.
+_SHORT_INDEX_TYPECODE = 'H'
+_INDEX_TYPECODE = 'I'
+
+
+def serialize(block_relations, transformer_data, block_data_map, compact=True):
+    """
+    Returns the serialization of the given data of a block structure,
+    in the compact format if compact is True, or else in the legacy
+    zpickle format.
+    """
+    if not compact:
+        return zpickle((block_relations, transformer_data, block_data_map))
+
+    # Intern the usage keys of all the blocks.
+    keys = list(block_relations)
+    key_indices = {key: index for index, key in enumerate(keys)}
+    for key in block_data_map:
+        if key not in key_indices:
+            key_indices[key] = len(keys)
+            keys.append(key)
+
+    num_relations = max(
+        sum(len(relations.parents) for relations in block_relations.values()),
+        sum(len(relations.children) for relations in block_relations.values()),
+    )
+    typecode = _SHORT_INDEX_TYPECODE if max(len(keys), num_relations) <= 0xFFFF else _INDEX_TYPECODE
+
+    # Flatten the relations into adjacency arrays.
+    parent_offsets, parents = _flatten(block_relations, key_indices, 'parents', typecode)
+    child_offsets, children = _flatten(block_relations, key_indices, 'children', typecode)
+
+    # Store the collected fields column-wise.
+    block_indices = array(typecode, (key_indices[key] for key in block_data_map))
+    xblock_fields = {}
+    transformer_block_indices = {}
+    transformer_block_fields = {}
+    for key, block_data in block_data_map.items():
+        key_index = key_indices[key]
+        _add_to_columns(xblock_fields, key_index, block_data.fields)
+        for transformer_name, transformer_block_data in block_data.transformer_data.items():
+            transformer_block_indices.setdefault(transformer_name, []).append(key_index)
+            _add_to_columns(
+                transformer_block_fields.setdefault(transformer_name, {}),
+                key_index,
+                transformer_block_data.fields,
+            )
+
+    data = (
+        keys,
+        len(block_relations),
+        parent_offsets,
+        parents,
+        child_offsets,
+        children,
+        block_indices,
+        _pack_columns(xblock_fields, block_indices),
+        {
+            name: (
+                _pack_indices(transformer_block_indices[name], block_indices),
+                _pack_columns(columns, block_indices),
+            )
+            for name, columns in transformer_block_fields.items()
+        },
+        {name: transformer_fields.fields for name, transformer_fields in transformer_data.items()},
+    )
+    return (
+        COMPACT_FORMAT_HEADER +
+        bytes([COMPACT_FORMAT_VERSION]) +
+        zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+    )
+
+
+def deserialize(serialized_data):
+    """
+    Deserializes the given data, in either the compact or the legacy
+    zpickle format, and returns a tuple of the block relations,
+    transformer data and block data maps of the block structure.
+
+    Raises:
+        ValueError if the data is in an unknown version of the compact
+        format.
+    """
+    if not is_compact(serialized_data):
+        return zunpickle(serialized_data)
+
+    header_length = len(COMPACT_FORMAT_HEADER)
+    version = serialized_data[header_length]
+    if version != COMPACT_FORMAT_VERSION:
+        raise ValueError(f'Unknown compact block structure format version {version}')
+
+    (
+        keys,
+        num_related_keys,
+        parent_offsets,
+        parents,
+        child_offsets,
+        children,
+        block_indices,
+        xblock_fields,
+        transformer_block_fields,
+        transformer_fields,
+    ) = pickle.loads(zlib.decompress(serialized_data[header_length + 1:]))
+
+    block_relations = {}
+    for index in range(num_related_keys):
+        relations = _BlockRelations()
+        relations.parents = [keys[parent] for parent in parents[parent_offsets[index]:parent_offsets[index + 1]]]
+        relations.children = [keys[child] for child in children[child_offsets[index]:child_offsets[index + 1]]]
+        block_relations[keys[index]] = relations
+
+    block_data_by_index = {}
+    block_data_map = {}
+    for key_index in block_indices:
+        block_data = _new_field_data(
+            BlockData, fields={}, location=keys[key_index], transformer_data=TransformerDataMap(),
+        )
+        block_data_by_index[key_index] = block_data
+        block_data_map[keys[key_index]] = block_data
+
+    for field_name, key_index, value in _unpack_columns(xblock_fields, block_indices):
+        block_data_by_index[key_index].fields[field_name] = value
+
+    for transformer_name, (transformer_block_indices, columns) in transformer_block_fields.items():
+        transformer_block_data_by_index = {}
+        for key_index in _unpack_indices(transformer_block_indices, block_indices):
+            transformer_block_data = _new_field_data(TransformerData, fields={})
+            transformer_block_data_by_index[key_index] = transformer_block_data
+            block_data_by_index[key_index].transformer_data[transformer_name] = transformer_block_data
+        for field_name, key_index, value in _unpack_columns(columns, block_indices):
+            transformer_block_data_by_index[key_index].fields[field_name] = value
+
+    transformer_data = TransformerDataMap()
+    for transformer_name, fields in transformer_fields.items():
+        transformer_data[transformer_name] = _new_field_data(TransformerData, fields=fields)
+
+    return block_relations, transformer_data, block_data_map
+
+
+def is_compact(serialized_data):
+    """
+    Returns whether the given serialized data is in the compact format.
+    """
+    return serialized_data[:len(COMPACT_FORMAT_HEADER)] == COMPACT_FORMAT_HEADER
+
+
+def _flatten(block_relations, key_indices, relation_name, typecode):
+    """
+    Returns the given relation of all blocks as a pair of arrays: the
+    offsets of each block's related blocks, and the indices of the
+    related blocks.
+    """
+    offsets = array(typecode, [0])
+    related = array(typecode)
+    for relations in block_relations.values():
+        related.extend(key_indices[key] for key in getattr(relations, relation_name))
+        offsets.append(len(related))
+    return offsets, related
+
+
+def _add_to_columns(columns, key_index, fields):
+    """
+    Adds the given fields of the block at key_index to the given
+    map of field name to a column of (block indices, values).
+    """
+    for field_name, value in fields.items():
+        try:
+            column = columns[field_name]
+        except KeyError:
+            column = columns[field_name] = ([], [])
+        column[0].append(key_index)
+        column[1].append(value)
+
+
+def _pack_indices(key_indices, block_indices):
+    """
+    Returns the given list of block indices packed into an array, or
+    None if it equals block_indices, which is the case for data that is
+    present on every block.
+    """
+    key_indices = array(block_indices.typecode, key_indices)
+    return None if key_indices == block_indices else key_indices
+
+
+def _unpack_indices(key_indices, block_indices):
+    """
+    Returns the block indices packed by _pack_indices.
+    """
+    return block_indices if key_indices is None else key_indices
+
+
+def _pack_columns(columns, block_indices):
+    """
+    Returns the given columns with their block indices packed.
+    """
+    return {
+        field_name: (_pack_indices(key_indices, block_indices), values)
+        for field_name, (key_indices, values) in columns.items()
+    }
+
+
+def _unpack_columns(columns, block_indices):
+    """
+    Yields a (field name, block index, value) tuple for each entry of
+    the given packed columns.
+    """
+    for field_name, (key_indices, values) in columns.items():
+        for key_index, value in zip(_unpack_indices(key_indices, block_indices), values):
+            yield field_name, key_index, value
+
+
+def _new_field_data(field_data_class, **attributes):
+    """
+    Returns a new instance of the given FieldData class with the given
+    attributes, bypassing the attribute handling of FieldData for speed.
+    """
+    field_data = field_data_class.__new__(field_data_class)
+    field_data.__dict__.update(attributes)
+    return field_data
@@ -13,6 +13,7 @@ from xmodule.modulestore.django import SignalHandler
 from . import config
 from .api import clear_course_from_cache
 from .models import BlockStructureNotFound
+from .store import local_cache
 from .tasks import update_course_in_cache_v2
 
 log = logging.getLogger(__name__)
@@ -28,6 +29,9 @@ def update_block_structure_on_course_publish(sender, course_key, **kwargs):  # p
     if isinstance(course_key, LibraryLocator):
         return
 
+    # The structure cached in this process is outdated by the publish.
+    local_cache.delete_course(course_key)
+
     if config.INVALIDATE_CACHE_ON_PUBLISH.is_enabled():
         try:
             clear_course_from_cache(course_key)
@@ -4,12 +4,14 @@ Module for the Storage of BlockStructure objects.
 # pylint: disable=protected-access
 
 
+from collections import OrderedDict
 from logging import getLogger
+from threading import Lock
+from uuid import uuid4
 
+from edx_django_utils.monitoring import set_custom_attribute
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
-
-from . import config
+from . import config, serialization
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
@@ -39,6 +41,96 @@ class StubModel:
         pass  # lint-amnesty, pylint: disable=unnecessary-pass
 
 
+class BlockStructureLocalCache:
+    """
+    A process-local, size-bounded LRU cache of deserialized block
+    structures, placed in front of the django cache so that hot courses
+    are not fetched and unpickled on every request.
+
+    Entries are keyed by the root usage key of the structure and its
+    version, and are shared read-only: callers receive a copy-on-write
+    copy of the cached structure.
+    """
+
+    def __init__(self):
+        # Map of (root usage key, version) to a collected block
+        # structure, ordered from least to most recently used.
+        # OrderedDict {(UsageKey, string): BlockStructureBlockData}
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, root_block_usage_key, version):
+        """
+        Returns a copy of the block structure cached for the given key
+        and version, or None if not found.
+        """
+        with self._lock:
+            block_structure = self._entries.get((root_block_usage_key, version))
+            if block_structure is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end((root_block_usage_key, version))
+                self.hits += 1
+        set_custom_attribute('block_structure.local_cache.hit', block_structure is not None)
+        return block_structure.copy() if block_structure is not None else None
+
+    def set(self, root_block_usage_key, version, block_structure, max_size):
+        """
+        Caches a copy of the given block structure for the given key
+        and version, replacing any other version cached for the key and
+        evicting the least recently used entries beyond max_size.
+        """
+        block_structure = block_structure.copy()
+        with self._lock:
+            self._remove(lambda key: key == root_block_usage_key)
+            self._entries[(root_block_usage_key, version)] = block_structure
+            num_evicted = 0
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+                num_evicted += 1
+            self.evictions += num_evicted
+        if num_evicted:
+            set_custom_attribute('block_structure.local_cache.evictions', num_evicted)
+
+    def delete(self, root_block_usage_key):
+        """
+        Removes all versions cached for the given key.
+        """
+        with self._lock:
+            self._remove(lambda key: key == root_block_usage_key)
+
+    def delete_course(self, course_key):
+        """
+        Removes all block structures cached for the given course.
+        """
+        with self._lock:
+            self._remove(lambda key: getattr(key, 'course_key', None) == course_key)
+
+    def clear(self):
+        """
+        Removes all entries and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def _remove(self, predicate):
+        """
+        Removes the entries whose root usage key satisfies the given
+        predicate.  Must be called while holding the lock.
+        """
+        for entry_key in [entry_key for entry_key in self._entries if predicate(entry_key[0])]:
+            del self._entries[entry_key]
+
+
+# The in-process cache of block structures shared by all stores.
+local_cache = BlockStructureLocalCache()
+
+
 class BlockStructureStore:
     """
     Storage for BlockStructure objects.
@@ -69,6 +161,7 @@ class BlockStructureStore:
 
         bs_model = self._update_or_create_model(block_structure, serialized_data)
         self._add_to_cache(serialized_data, bs_model)
+        self._add_to_local_cache(block_structure, bs_model, self._get_local_cache_version(bs_model))
 
     def get(self, root_block_usage_key):
         """
@@ -93,13 +186,26 @@ class BlockStructureStore:
         """
         bs_model = self._get_model(root_block_usage_key)
 
+        # The version is read once, before the data, so that data replaced
+        # meanwhile is never cached locally under the version of the new data.
+        version = self._get_local_cache_version(bs_model) if config.local_cache_size() else None
+        block_structure = self._get_from_local_cache(bs_model, version)
+        if block_structure is not None:
+            return block_structure
+
         try:
             serialized_data = self._get_from_cache(bs_model)
         except BlockStructureNotFound:
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        if serialization.is_compact(serialized_data) != config.COMPACT_SERIALIZATION.is_enabled():
+            # Migrate the cached data to the currently selected format.  The
+            # data itself is unchanged, so the local caches remain valid.
+            self._add_to_cache(self._serialize(block_structure), bs_model, new_version=False)
+        self._add_to_local_cache(block_structure, bs_model, version)
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -111,7 +217,10 @@ class BlockStructureStore:
                 of the block structure that is to be removed.
         """
         bs_model = self._get_model(root_block_usage_key)
+        local_cache.delete(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
+        if config.local_cache_size() and not config.STORAGE_BACKING_FOR_CACHE.is_enabled():
+            self._cache.delete(self._encode_local_version_cache_key(bs_model))
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -155,15 +264,58 @@ class BlockStructureStore:
         else:
             return StubModel(block_structure.root_block_usage_key)
 
-    def _add_to_cache(self, serialized_data, bs_model):
+    def _add_to_cache(self, serialized_data, bs_model, new_version=True):
         """
         Adds the given serialized_data for the given BlockStructureModel
         to the cache.
+
+        Unless new_version is False, for data that only changes format,
+        the version of the data in the local caches of all processes is
+        renewed.
         """
         cache_key = self._encode_root_cache_key(bs_model)
         self._cache.set(cache_key, serialized_data, timeout=config.cache_timeout_in_seconds())
+        if new_version and config.local_cache_size() and not config.STORAGE_BACKING_FOR_CACHE.is_enabled():
+            self._cache.set(
+                self._encode_local_version_cache_key(bs_model),
+                uuid4().hex,
+                timeout=config.cache_timeout_in_seconds(),
+            )
         logger.info("BlockStructure: Added to cache; %s, size: %d", bs_model, len(serialized_data))
 
+    def _add_to_local_cache(self, block_structure, bs_model, version):
+        """
+        Adds the given block_structure for the given BlockStructureModel
+        to the in-process cache under the given version, if enabled.
+        """
+        max_size = config.local_cache_size()
+        if max_size and version is not None:
+            local_cache.set(bs_model.data_usage_key, version, block_structure, max_size)
+
+    def _get_from_local_cache(self, bs_model, version):
+        """
+        Returns a copy of the block structure for the given
+        BlockStructureModel and version from the in-process cache, or
+        None if it is disabled or the version is not found.
+        """
+        if not config.local_cache_size() or version is None:
+            return None
+        return local_cache.get(bs_model.data_usage_key, version)
+
+    def _get_local_cache_version(self, bs_model):
+        """
+        Returns the version identifying the current data of the given
+        BlockStructureModel, used to key the in-process cache.
+
+        With storage backing, the model itself identifies the version of
+        the course and of the schemas.  Otherwise, a token is stored in
+        the django cache whenever its data is replaced, so that all
+        processes notice the change without loading the data.
+        """
+        if config.STORAGE_BACKING_FOR_CACHE.is_enabled():
+            return str(bs_model)
+        return self._cache.get(self._encode_local_version_cache_key(bs_model))
+
     def _get_from_cache(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
@@ -195,12 +347,12 @@ class BlockStructureStore:
         """
         Serializes the data for the given block_structure.
         """
-        data_to_cache = (
+        return serialization.serialize(
             block_structure._block_relations,
             block_structure.transformer_data,
             block_structure._block_data_map,
+            compact=config.COMPACT_SERIALIZATION.is_enabled(),
         )
-        return zpickle(data_to_cache)
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
@@ -208,7 +360,7 @@ class BlockStructureStore:
         """
 
         try:
-            block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+            block_relations, transformer_data, block_data_map = serialization.deserialize(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
             bs_model = self._get_model(root_block_usage_key)
@@ -235,6 +387,14 @@ class BlockStructureStore:
             root_usage_key=str(bs_model.data_usage_key),
         )
 
+    @classmethod
+    def _encode_local_version_cache_key(cls, bs_model):
+        """
+        Returns the cache key of the token identifying the version of the
+        data cached for the given BlockStructureModel or StubModel.
+        """
+        return f"{cls._encode_root_cache_key(bs_model)}.local_version"
+
     @staticmethod
     def _version_data_of_block(root_block):
         """
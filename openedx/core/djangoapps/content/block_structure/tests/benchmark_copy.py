@@ -0,0 +1,74 @@
+"""
+Benchmark comparing the copy-on-write BlockStructureBlockData.copy with
+a full deep-copy of the structure, followed by a typical per-user
+transform, on a synthetic large course.
+
+Usage:
+    python -m openedx.core.djangoapps.content.block_structure.tests.benchmark_copy
+"""
+# pylint: disable=protected-access
+
+
+import timeit
+
+from ..block_structure import BlockStructureBlockData
+
+TRANSFORMER_NAMES = ['visibility', 'start_date', 'user_partitions', 'grades', 'block_counts']
+
+
+def create_course_structure(num_chapters=20, num_sequentials=10, num_verticals=5, num_problems=3):
+    """
+    Returns a collected block structure for a synthetic course with
+    chapters, sequentials, verticals and problems of the given widths.
+    """
+    block_structure = BlockStructureBlockData('course')
+    parents = ['course']
+    for level, width in enumerate((num_chapters, num_sequentials, num_verticals, num_problems)):
+        children = []
+        for parent in parents:
+            for index in range(width):
+                child = f'{parent}/{level}.{index}'
+                block_structure._add_relation(parent, child)
+                children.append(child)
+        parents = children
+
+    for block_key in block_structure:
+        block_data = block_structure._get_or_create_block(block_key)
+        block_data.display_name = block_key
+        block_data.category = 'problem'
+        block_data.due = None
+        for transformer_name in TRANSFORMER_NAMES:
+            block_structure.set_transformer_block_field(block_key, transformer_name, 'field', {'merged': [block_key]})
+    for transformer_name in TRANSFORMER_NAMES:
+        block_structure.set_transformer_data(transformer_name, '_version', 1)
+    return block_structure
+
+
+def transform(block_structure, removal_modulo=20, override_modulo=100):
+    """
+    Mimics a per-user transform by removing a fraction of the blocks
+    and overriding a field on another fraction.
+    """
+    for index, block_key in enumerate(list(block_structure.topological_traversal())):
+        if index and index % removal_modulo == 0 and block_key in block_structure:
+            block_structure.remove_block(block_key, keep_descendants=False)
+        elif index % override_modulo == 0:
+            block_structure.override_xblock_field(block_key, 'due', index)
+    block_structure._prune_unreachable()
+
+
+def run(number=20):
+    """
+    Prints the average time taken to copy and transform the synthetic
+    course with both the deep-copy and the copy-on-write paths.
+    """
+    collected = create_course_structure()
+    print(f'Synthetic course with {len(collected)} blocks, {number} iterations each.')
+    for label, copy_func in (('deepcopy', collected.deepcopy), ('copy-on-write', collected.copy)):
+        copy_time = timeit.timeit(copy_func, number=number) / number
+        total_time = timeit.timeit(lambda: transform(copy_func()), number=number) / number  # pylint: disable=cell-var-from-loop
+        print(f'{label:>15}: copy {copy_time * 1000:8.2f} ms, copy + transform {total_time * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    run()
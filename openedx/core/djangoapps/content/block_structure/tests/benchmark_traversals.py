@@ -0,0 +1,58 @@
+"""
+Microbenchmarks for the traversal functions of
+openedx.core.lib.graph_traversals and of BlockStructure, on a synthetic
+large course.
+
+Usage:
+    python -m openedx.core.djangoapps.content.block_structure.tests.benchmark_traversals
+"""
+# pylint: disable=protected-access
+
+
+import timeit
+
+from openedx.core.lib.graph_traversals import traverse_post_order, traverse_pre_order, traverse_topologically
+
+from .benchmark_copy import create_course_structure
+
+
+def run(number=20):
+    """
+    Prints the average time taken by each traversal of the synthetic
+    course.
+    """
+    block_structure = create_course_structure()
+    root = block_structure.root_block_usage_key
+    get_parents = block_structure.get_parents
+    get_children = block_structure.get_children
+
+    def filter_func(block_key):
+        return not block_key.endswith('.0')
+
+    def uncached_topological_traversal():
+        block_structure._topological_order = None
+        return block_structure.topological_traversal(filter_func=filter_func)
+
+    benchmarks = [
+        ('traverse_topologically', lambda: traverse_topologically(root, get_parents, get_children)),
+        ('traverse_topologically + filter', lambda: traverse_topologically(
+            root, get_parents, get_children, filter_func=filter_func,
+        )),
+        ('traverse_pre_order', lambda: traverse_pre_order(root, get_children)),
+        ('traverse_post_order', lambda: traverse_post_order(root, get_children)),
+        ('BlockStructure.topological_traversal (cached order)', block_structure.topological_traversal),
+        ('BlockStructure.topological_traversal + filter (uncached order)', uncached_topological_traversal),
+        ('BlockStructure.topological_traversal + filter (cached order)', lambda: block_structure.topological_traversal(
+            filter_func=filter_func,
+        )),
+        ('BlockStructure.post_order_traversal', block_structure.post_order_traversal),
+    ]
+
+    print(f'Synthetic course with {len(block_structure)} blocks, {number} iterations each.')
+    for label, traversal in benchmarks:
+        average_time = timeit.timeit(lambda: list(traversal()), number=number) / number  # pylint: disable=cell-var-from-loop
+        print(f'{label:>64}: {average_time * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    run()
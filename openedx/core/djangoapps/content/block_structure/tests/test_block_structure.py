@@ -12,9 +12,9 @@ from unittest import TestCase
 
 import ddt
 
-from openedx.core.lib.graph_traversals import traverse_post_order
+from openedx.core.lib.graph_traversals import traverse_post_order, traverse_topologically
 
-from ..block_structure import BlockStructure, BlockStructureModulestoreData
+from ..block_structure import BlockStructure, BlockStructureBlockData, BlockStructureModulestoreData
 from ..exceptions import TransformerException
 from .helpers import ChildrenMapTestMixin, MockTransformer, MockXBlock
 
@@ -47,6 +47,52 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
             assert node in block_structure
         assert (len(children_map) + 1) not in block_structure
 
+    @ddt.data(
+        *itertools.product(
+            [
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            ],
+            [True, False],
+            [None, 1, 3],
+        )
+    )
+    @ddt.unpack
+    def test_topological_traversal(self, children_map, yield_descendants_of_unyielded, unyielded_block):
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+
+        def filter_func(block):
+            return block != unyielded_block
+
+        expected = list(traverse_topologically(
+            start_node=0,
+            get_parents=block_structure.get_parents,
+            get_children=block_structure.get_children,
+            filter_func=filter_func,
+            yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+        ))
+        for _ in range(2):
+            # the second traversal uses the cached topological order
+            assert expected == list(block_structure.topological_traversal(
+                filter_func=filter_func,
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            ))
+
+    def test_topological_order_cache(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP, BlockStructureBlockData)
+        assert list(block_structure.topological_traversal()) == [0, 1, 2, 3, 5, 6, 4]
+
+        # the cached order is shared with copies
+        new_copy = block_structure.copy()
+        assert new_copy._topological_order is block_structure._topological_order
+
+        # the cached order is reset when a block is removed
+        new_copy.remove_block(3, keep_descendants=True)
+        assert new_copy._topological_order is None
+        assert list(new_copy.topological_traversal()) == [0, 1, 2, 4, 5, 6]
+        assert list(block_structure.topological_traversal()) == [0, 1, 2, 3, 5, 6, 4]
+
 
 @ddt.ddt
 class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
@@ -292,3 +338,50 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(new_copy, 'edit2')
         assert _get_value(block_structure) == 'edit1'
         assert _get_value(new_copy) == 'edit2'
+
+    def test_copy_on_write(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        for block in block_structure:
+            block_structure.set_transformer_block_field(block, 'transformer', 'test_key', [block])
+        block_structure.set_transformer_data('transformer', 'test_key', 'original_value')
+
+        new_copy = block_structure.copy()
+
+        # verify unmodified entries are shared between the two structures
+        for block in block_structure:
+            assert block_structure[block] is new_copy[block]
+            assert block_structure._block_relations[block] is new_copy._block_relations[block]
+        assert block_structure.transformer_data['transformer'] is new_copy.transformer_data['transformer']
+
+        # verify only the modified entries are copied
+        new_copy.set_transformer_block_field(3, 'transformer', 'test_key', 'edit')
+        new_copy.set_transformer_data('transformer', 'test_key', 'edit')
+        new_copy.remove_block(4, keep_descendants=False)
+
+        assert block_structure[3] is not new_copy[3]
+        assert block_structure[2] is new_copy[2]
+        assert block_structure._block_relations[1] is not new_copy._block_relations[1]
+        assert block_structure._block_relations[2] is new_copy._block_relations[2]
+
+        assert block_structure.get_transformer_block_field(3, 'transformer', 'test_key') == [3]
+        assert new_copy.get_transformer_block_field(3, 'transformer', 'test_key') == 'edit'
+        assert block_structure.get_transformer_data('transformer', 'test_key') == 'original_value'
+        assert new_copy.get_transformer_data('transformer', 'test_key') == 'edit'
+        self.assert_block_structure(block_structure, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        self.assert_block_structure(new_copy, [[1, 2], [3], [], [], []], missing_blocks=[4])
+
+        # verify removing a field from a shared block does not affect the original
+        new_copy.remove_transformer_block_field(2, 'transformer', 'test_key')
+        assert block_structure.get_transformer_block_field(2, 'transformer', 'test_key') == [2]
+        assert new_copy.get_transformer_block_field(2, 'transformer', 'test_key') is None
+
+    def test_deepcopy(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        for block in block_structure:
+            block_structure.set_transformer_block_field(block, 'transformer', 'test_key', 'original_value')
+
+        new_copy = block_structure.deepcopy()
+        for block in block_structure:
+            assert block_structure[block] is not new_copy[block]
+        self.assert_block_structure(new_copy, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        assert new_copy.get_transformer_block_field(1, 'transformer', 'test_key') == 'original_value'
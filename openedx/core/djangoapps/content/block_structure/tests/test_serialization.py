@@ -0,0 +1,92 @@
+"""
+Tests for serialization.py
+"""
+
+
+from unittest import TestCase
+
+import ddt
+import pytest
+
+from .. import serialization
+from .helpers import ChildrenMapTestMixin
+
+
+@ddt.ddt
+class TestSerialization(TestCase, ChildrenMapTestMixin):
+    """
+    Tests for the serialization of block structures.
+    """
+
+    def create_collected_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map with
+        collected xBlock fields and transformer data.
+        """
+        block_structure = self.create_block_structure(children_map)
+        for block in block_structure:
+            block_structure.override_xblock_field(block, 'display_name', f'Block {block}')
+            block_structure.set_transformer_block_field(block, 'transformer1', 'key', block)
+            if block % 2:
+                block_structure.set_transformer_block_field(block, 'transformer2', 'key', [block])
+        block_structure.set_transformer_block_field(0, 'transformer3', 'key', None)
+        block_structure.remove_transformer_block_field(0, 'transformer3', 'key')
+        block_structure.set_transformer_data('transformer1', 'key', 'value')
+        return block_structure
+
+    def assert_data_equal(self, block_structure, data):
+        """
+        Verifies that the given deserialized data equals the data of the
+        given block structure.
+        """
+        block_relations, transformer_data, block_data_map = data
+
+        assert list(block_relations) == list(block_structure._block_relations)  # pylint: disable=protected-access
+        for block, relations in block_relations.items():
+            assert relations.parents == block_structure.get_parents(block)
+            assert relations.children == block_structure.get_children(block)
+
+        assert list(block_data_map) == list(block_structure._block_data_map)  # pylint: disable=protected-access
+        for block, block_data in block_data_map.items():
+            assert block_data.location == block
+            assert block_data.fields == block_structure[block].fields
+            assert block_data.transformer_data.keys() == block_structure[block].transformer_data.keys()
+            for name, transformer_block_data in block_data.transformer_data.items():
+                assert transformer_block_data.fields == block_structure.get_transformer_block_data(block, name).fields
+
+        assert transformer_data.keys() == block_structure.transformer_data.keys()
+        assert transformer_data['transformer1'].key == 'value'
+
+    @ddt.data(
+        *[
+            (children_map, compact)
+            for children_map in (
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            )
+            for compact in (True, False)
+        ]
+    )
+    @ddt.unpack
+    def test_round_trip(self, children_map, compact):
+        block_structure = self.create_collected_block_structure(children_map)
+        serialized_data = serialization.serialize(
+            block_structure._block_relations,  # pylint: disable=protected-access
+            block_structure.transformer_data,
+            block_structure._block_data_map,  # pylint: disable=protected-access
+            compact=compact,
+        )
+        assert serialization.is_compact(serialized_data) == compact
+        self.assert_data_equal(block_structure, serialization.deserialize(serialized_data))
+
+    def test_unknown_version(self):
+        block_structure = self.create_collected_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        serialized_data = bytearray(serialization.serialize(
+            block_structure._block_relations,  # pylint: disable=protected-access
+            block_structure.transformer_data,
+            block_structure._block_data_map,  # pylint: disable=protected-access
+        ))
+        serialized_data[len(serialization.COMPACT_FORMAT_HEADER)] += 1
+        with pytest.raises(ValueError):
+            serialization.deserialize(bytes(serialized_data))
@@ -2,16 +2,21 @@
 Tests for block_structure/cache.py
 """
 
+from unittest.mock import patch
+
 import pytest
 import ddt
+from django.conf import settings
+from django.test.utils import override_settings
 from edx_toggles.toggles.testutils import override_waffle_switch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE
+from .. import serialization
+from ..config import COMPACT_SERIALIZATION, STORAGE_BACKING_FOR_CACHE
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
-from ..store import BlockStructureStore
+from ..store import BlockStructureStore, local_cache
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer, UsageKeyFactoryMixin
 
 
@@ -31,6 +36,8 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
 
         self.mock_cache = MockCache()
         self.store = BlockStructureStore(self.mock_cache)
+        local_cache.clear()
+        self.addCleanup(local_cache.clear)
 
     def add_transformers(self):
         """
@@ -46,6 +53,13 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
                 value=f'{transformer.name()} val',
             )
 
+    def get_cached_data(self):
+        """
+        Returns the data cached for the test block structure.
+        """
+        bs_model = self.store._get_model(self.block_structure.root_block_usage_key)  # pylint: disable=protected-access
+        return self.mock_cache.map[self.store._encode_root_cache_key(bs_model)]  # pylint: disable=protected-access
+
     @ddt.data(True, False)
     def test_get_none(self, with_storage_backing):
         with override_waffle_switch(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
@@ -91,3 +105,121 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         assert self.mock_cache.timeout_from_last_call == 0
         self.store.add(self.block_structure)
         assert self.mock_cache.timeout_from_last_call == timeout
+
+    @ddt.data(True, False)
+    def test_compact_serialization(self, with_storage_backing):
+        with override_waffle_switch(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with override_waffle_switch(COMPACT_SERIALIZATION, active=True):
+                self.store.add(self.block_structure)
+                assert serialization.is_compact(self.get_cached_data())
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.assert_block_structure(stored_value, self.children_map)
+
+    @ddt.data(True, False)
+    def test_migrate_serialization(self, compact):
+        with override_waffle_switch(COMPACT_SERIALIZATION, active=not compact):
+            self.store.add(self.block_structure)
+
+        local_cache.clear()
+        with override_waffle_switch(COMPACT_SERIALIZATION, active=compact):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+            assert serialization.is_compact(self.get_cached_data()) == compact
+
+
+@ddt.ddt
+class TestBlockStructureLocalCache(TestBlockStructureStore):
+    """
+    Tests for BlockStructureStore with the in-process cache enabled.
+    """
+    def setUp(self):
+        local_cache_settings = dict(settings.BLOCK_STRUCTURES_SETTINGS, LOCAL_CACHE_SIZE=2)
+        override = override_settings(BLOCK_STRUCTURES_SETTINGS=local_cache_settings)
+        override.enable()
+        self.addCleanup(override.disable)
+        super().setUp()
+
+    @ddt.data(True, False)
+    def test_get_from_local_cache(self, with_storage_backing):
+        with override_waffle_switch(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            self.store.add(self.block_structure)
+            first_value = self.store.get(self.block_structure.root_block_usage_key)
+            second_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(first_value, self.children_map)
+            assert first_value is not second_value
+            assert local_cache.hits == 2
+            assert local_cache.misses == 0
+
+    def test_version_changed(self):
+        self.store.add(self.block_structure)
+        assert self.store.get(self.block_structure.root_block_usage_key) is not None
+
+        # Simulate another process storing a new version of the structure.
+        other_store = BlockStructureStore(self.mock_cache)
+        new_block_structure = self.create_block_structure(self.LINEAR_CHILDREN_MAP)
+        serialized_data = other_store._serialize(new_block_structure)  # pylint: disable=protected-access
+        other_store._add_to_cache(  # pylint: disable=protected-access
+            serialized_data,
+            other_store._get_model(self.block_structure.root_block_usage_key),  # pylint: disable=protected-access
+        )
+
+        stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.LINEAR_CHILDREN_MAP)
+        assert local_cache.misses == 1
+
+    def test_version_changed_during_get(self):
+        self.store.add(self.block_structure)
+        local_cache.clear()
+        get_from_cache = self.store._get_from_cache  # pylint: disable=protected-access
+
+        def get_and_replace(bs_model):
+            """
+            Simulates another process storing a new version of the structure after the data is read.
+            """
+            serialized_data = get_from_cache(bs_model)
+            new_block_structure = self.create_block_structure(self.LINEAR_CHILDREN_MAP)
+            other_store = BlockStructureStore(self.mock_cache)
+            other_store._add_to_cache(other_store._serialize(new_block_structure), bs_model)  # pylint: disable=protected-access
+            return serialized_data
+
+        with patch.object(self.store, '_get_from_cache', side_effect=get_and_replace):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+
+        stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.LINEAR_CHILDREN_MAP)
+
+    @ddt.data(True, False)
+    def test_migrate_serialization_keeps_version(self, compact):
+        with override_waffle_switch(COMPACT_SERIALIZATION, active=not compact):
+            self.store.add(self.block_structure)
+
+        bs_model = self.store._get_model(self.block_structure.root_block_usage_key)  # pylint: disable=protected-access
+        version = self.store._get_local_cache_version(bs_model)  # pylint: disable=protected-access
+        local_cache.clear()
+        with override_waffle_switch(COMPACT_SERIALIZATION, active=compact):
+            self.store.get(self.block_structure.root_block_usage_key)
+            assert serialization.is_compact(self.get_cached_data()) == compact
+        assert self.store._get_local_cache_version(bs_model) == version  # pylint: disable=protected-access
+
+    def test_transform_does_not_affect_local_cache(self):
+        self.store.add(self.block_structure)
+        stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        stored_value.remove_block(self.block_key_factory(1), keep_descendants=False)
+
+        stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+
+    def test_eviction(self):
+        for index in range(3):
+            block_structure = self.create_block_structure(self.children_map)
+            block_structure.root_block_usage_key = self.block_key_factory(index)
+            self.store.add(block_structure)
+        assert local_cache.evictions == 1
+
+    def test_delete_course(self):
+        self.store.add(self.block_structure)
+        local_cache.delete_course(self.block_structure.root_block_usage_key.course_key)
+        self.store.get(self.block_structure.root_block_usage_key)
+        assert local_cache.hits == 0
+        assert local_cache.misses == 1
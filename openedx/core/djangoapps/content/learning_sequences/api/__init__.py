@@ -5,6 +5,8 @@ from .outlines import (
     get_course_outline,
     get_user_course_outline,
     get_user_course_outline_details,
+    get_user_course_outlines,
+    invalidate_user_course_outlines,
     key_supports_outlines,
     public_api_available,
     replace_course_outline,
@@ -4,9 +4,11 @@ directly. Use openedx.core.djangoapps.content.learning_sequences.api -- that
 __init__.py imports from here, and is a more stable place to import from.
 """
 import logging
+import time
 from collections import defaultdict
 from datetime import datetime
-from typing import Dict, FrozenSet, List, Optional, Union
+from typing import Dict, FrozenSet, Iterable, List, Optional, Union
+from uuid import uuid4
 
 from django.db import transaction
 from django.db.models.query import QuerySet
@@ -17,6 +19,9 @@ from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import LibraryLocator
 from openedx.core import types
 
+from common.djangoapps.student.models import CourseEnrollment
+from common.djangoapps.student.roles import BulkRoleCache
+
 from ..data import (
     ContentErrorData,
     CourseLearningSequenceData,
@@ -39,6 +44,7 @@ from ..models import (
     PublishReport,
     UserPartitionGroup
 )
+from ..toggles import USE_USER_OUTLINE_CACHE
 from .permissions import can_call_public_api, can_see_all_content
 from .processors.content_gating import ContentGatingOutlineProcessor
 from .processors.enrollment import EnrollmentOutlineProcessor
@@ -50,6 +56,25 @@ from .processors.visibility import VisibilityOutlineProcessor
 
 log = logging.getLogger(__name__)
 
+# How long the outline processor results of a user are cached for, which bounds
+# how stale they can get when user state that is not covered by the signals
+# resetting them changes (e.g. through bulk queryset updates, which send no signals).
+USER_OUTLINE_CACHE_TIMEOUT = 15 * 60
+
+# These are processors that alter which sequences are visible to students.
+# For instance, certain sequences that are intentionally hidden or not yet
+# released. These do not need to be run for staff users. This is where we
+# would add in pluggability for OutlineProcessors down the road.
+_OUTLINE_PROCESSOR_CLASSES = [
+    ('content_gating', ContentGatingOutlineProcessor),
+    ('milestones', MilestonesOutlineProcessor),
+    ('schedule', ScheduleOutlineProcessor),
+    ('special_exams', SpecialExamsOutlineProcessor),
+    ('visibility', VisibilityOutlineProcessor),
+    ('enrollment', EnrollmentOutlineProcessor),
+    ('enrollment_track_partitions', EnrollmentTrackPartitionGroupsOutlineProcessor),
+]
+
 # Public API...
 __all__ = [
     'get_content_errors',
@@ -57,6 +82,8 @@ __all__ = [
     'get_course_outline',
     'get_user_course_outline',
     'get_user_course_outline_details',
+    'get_user_course_outlines',
+    'invalidate_user_course_outlines',
     'key_supports_outlines',
     'public_api_available',
     'replace_course_outline',
@@ -281,7 +308,9 @@ def get_user_course_outline(course_key: CourseKey,
     See the definition of UserCourseOutlineData for details about the data
     returned.
     """
-    user_course_outline, _ = _get_user_course_outline_and_processors(course_key, user, at_time)
+    user_course_outline, _ = _get_user_course_outline_and_processors(
+        course_key, user, at_time, use_cache=True
+    )
     return user_course_outline
 
 
@@ -313,15 +342,31 @@ def get_user_course_outline_details(course_key: CourseKey,
     )
 
 
+def invalidate_user_course_outlines(user_id: int):
+    """
+    Reset the cached outline processor results of the given user, in all
+    courses.
+
+    This must be called whenever user state that the outline processors depend
+    on changes, like the user's enrollments, schedules or milestones.
+    """
+    TieredCache.delete_all_tiers(_user_outline_state_cache_key(user_id))
+
+
 def _get_user_course_outline_and_processors(course_key: CourseKey,  # lint-amnesty, pylint: disable=missing-function-docstring
                                             user: types.User,
-                                            at_time: datetime):
+                                            at_time: datetime,
+                                            use_cache: bool = False):
     """
     Helper function that runs the outline processors.
 
     This function returns a UserCourseOutlineData and a dict of outline
     processors that have executed their data loading and returned which
     sequences to remove and which to mark as inaccessible.
+
+    If use_cache is True, the results of the processors may come from the
+    user outline cache instead, in which case the returned processors have not
+    loaded their data.
     """
     # Record the user separately from the standard user_id that views record,
     # because it's possible to ask for views as other users if you're global
@@ -332,44 +377,121 @@ def _get_user_course_outline_and_processors(course_key: CourseKey,  # lint-amnes
     full_course_outline = get_course_outline(course_key)
     user_can_see_all_content = can_see_all_content(user, course_key)
 
-    # These are processors that alter which sequences are visible to students.
-    # For instance, certain sequences that are intentionally hidden or not yet
-    # released. These do not need to be run for staff users. This is where we
-    # would add in pluggability for OutlineProcessors down the road.
-    processor_classes = [
-        ('content_gating', ContentGatingOutlineProcessor),
-        ('milestones', MilestonesOutlineProcessor),
-        ('schedule', ScheduleOutlineProcessor),
-        ('special_exams', SpecialExamsOutlineProcessor),
-        ('visibility', VisibilityOutlineProcessor),
-        ('enrollment', EnrollmentOutlineProcessor),
-        ('enrollment_track_partitions', EnrollmentTrackPartitionGroupsOutlineProcessor),
-    ]
+    processors = {
+        name: processor_cls(course_key, user, at_time)
+        for name, processor_cls in _OUTLINE_PROCESSOR_CLASSES
+    }
 
-    # Run each OutlineProcessor in order to figure out what items we have to
-    # remove from the CourseOutline.
-    processors = {}
-    usage_keys_to_remove = set()
-    inaccessible_sequences = set()
-    for name, processor_cls in processor_classes:
-        # Future optimization: This should be parallelizable (don't rely on a
-        # particular ordering).
-        processor = processor_cls(course_key, user, at_time)
-        processors[name] = processor
-        processor.load_data(full_course_outline)
-        if not user_can_see_all_content:
-            # function_trace lets us see how expensive each processor is being.
-            with function_trace(f'learning_sequences.api.outline_processors.{name}'):
-                processor_usage_keys_removed = processor.usage_keys_to_remove(full_course_outline)
-                processor_inaccessible_sequences = processor.inaccessible_sequences(full_course_outline)
-                usage_keys_to_remove |= processor_usage_keys_removed
-                inaccessible_sequences |= processor_inaccessible_sequences
+    # Staff users see everything, so there is nothing worth caching for them.
+    use_cache = (
+        use_cache and
+        not user_can_see_all_content and
+        user.is_authenticated and
+        USE_USER_OUTLINE_CACHE.is_enabled(course_key)
+    )
+    if use_cache:
+        cache_key = "learning_sequences.api.user_outline.v1.{}.{}.{}".format(
+            course_key, full_course_outline.published_version, user.id
+        )
+        user_state = (
+            _get_user_outline_state(user.id),
+            tuple(processor.user_state_fingerprint() for processor in processors.values()),
+        )
+        cached_results = _get_cached_processor_results(cache_key, user_state, at_time)
+    else:
+        cached_results = None
+    set_custom_attribute('learning_sequences.api.user_outline_from_cache', cached_results is not None)
+
+    if cached_results is not None:
+        usage_keys_to_remove, inaccessible_sequences = cached_results
+    else:
+        for name, processor in processors.items():
+            _load_processor_data(name, processor, full_course_outline)
+        usage_keys_to_remove, inaccessible_sequences = _apply_processors(
+            processors, full_course_outline, user_can_see_all_content
+        )
+        if use_cache:
+            valid_until = min(
+                (
+                    valid_until for valid_until in (
+                        processor.results_valid_until(full_course_outline) for processor in processors.values()
+                    )
+                    if valid_until is not None
+                ),
+                default=None,
+            )
+            TieredCache.set_all_tiers(
+                cache_key,
+                (user_state, at_time, valid_until, usage_keys_to_remove, inaccessible_sequences),
+                USER_OUTLINE_CACHE_TIMEOUT,
+            )
+
+    user_course_outline = _build_user_course_outline(
+        full_course_outline, user, at_time, usage_keys_to_remove, inaccessible_sequences
+    )
+    return user_course_outline, processors
+
+
+@function_trace('learning_sequences.api.get_user_course_outlines')
+def get_user_course_outlines(course_key: CourseKey,
+                             users: Iterable[types.User],
+                             at_time: datetime) -> Dict[int, UserCourseOutlineData]:
+    """
+    Get the outlines customized for many users at a particular time, as a dict
+    mapping each user's id to their UserCourseOutlineData.
+
+    This is meant for bulk jobs (e.g. emails and reports) that need outlines
+    for thousands of users of a course. It returns the same outlines as calling
+    get_user_course_outline for each user, but each OutlineProcessor loads the
+    data of all the users at once, in a small number of queries that does not
+    grow with the number of users.
+
+    `users` are Django User objects, which must all be authenticated.
+    """
+    set_custom_attribute('learning_sequences.api.course_id', str(course_key))
+    users = list(users)
+    set_custom_attribute('learning_sequences.api.num_users', len(users))
 
+    full_course_outline = get_course_outline(course_key)
+
+    # Enrollments and course roles are used by several processors and by the
+    # staff check, so prefetch them for everyone up front.
+    CourseEnrollment.bulk_fetch_enrollment_states(users, course_key)
+    BulkRoleCache.prefetch(users)
+
+    processors_by_user = {user.id: {} for user in users}
+    for name, processor_cls in _OUTLINE_PROCESSOR_CLASSES:
+        processors = [processor_cls(course_key, user, at_time) for user in users]
+        with function_trace(f'learning_sequences.api.outline_processors.{name}.load_data_for_users'):
+            processor_cls.load_data_for_users(processors, full_course_outline)
+        for processor in processors:
+            processors_by_user[processor.user.id][name] = processor
+
+    user_course_outlines = {}
+    for user in users:
+        usage_keys_to_remove, inaccessible_sequences = _apply_processors(
+            processors_by_user[user.id], full_course_outline, can_see_all_content(user, course_key)
+        )
+        user_course_outlines[user.id] = _build_user_course_outline(
+            full_course_outline, user, at_time, usage_keys_to_remove, inaccessible_sequences
+        )
+    return user_course_outlines
+
+
+def _build_user_course_outline(full_course_outline: CourseOutlineData,
+                               user: types.User,
+                               at_time: datetime,
+                               usage_keys_to_remove: FrozenSet,
+                               inaccessible_sequences: FrozenSet) -> UserCourseOutlineData:
+    """
+    Build the outline of a user from the full course outline and the results
+    of the outline processors.
+    """
     # Open question: Does it make sense to remove a Section if it has no Sequences in it?
     trimmed_course_outline = full_course_outline.remove(usage_keys_to_remove)
     accessible_sequences = frozenset(set(trimmed_course_outline.sequences) - inaccessible_sequences)
 
-    user_course_outline = UserCourseOutlineData(
+    return UserCourseOutlineData(
         base_outline=full_course_outline,
         user=user,
         at_time=at_time,
@@ -390,7 +512,79 @@ def _get_user_course_outline_and_processors(course_key: CourseKey,  # lint-amnes
         }
     )
 
-    return user_course_outline, processors
+
+def _load_processor_data(name: str, processor, full_course_outline: CourseOutlineData):
+    """
+    Load the data of an OutlineProcessor, recording how long it took.
+    """
+    # Future optimization: This should be parallelizable (don't rely on a
+    # particular ordering).
+    with function_trace(f'learning_sequences.api.outline_processors.{name}.load_data'):
+        start_time = time.perf_counter()
+        processor.load_data(full_course_outline)
+        set_custom_attribute(
+            f'learning_sequences.api.outline_processors.{name}.load_data_ms',
+            round((time.perf_counter() - start_time) * 1000, 3),
+        )
+
+
+def _apply_processors(processors, full_course_outline: CourseOutlineData, user_can_see_all_content: bool):
+    """
+    Run each OutlineProcessor that has loaded its data in order to figure out
+    what items we have to remove from the CourseOutline, and which sequences
+    are inaccessible.
+    """
+    usage_keys_to_remove = set()
+    inaccessible_sequences = set()
+    for name, processor in processors.items():
+        if not user_can_see_all_content:
+            # function_trace lets us see how expensive each processor is being.
+            with function_trace(f'learning_sequences.api.outline_processors.{name}'):
+                processor_usage_keys_removed = processor.usage_keys_to_remove(full_course_outline)
+                processor_inaccessible_sequences = processor.inaccessible_sequences(full_course_outline)
+                usage_keys_to_remove |= processor_usage_keys_removed
+                inaccessible_sequences |= processor_inaccessible_sequences
+
+    return frozenset(usage_keys_to_remove), frozenset(inaccessible_sequences)
+
+
+def _get_cached_processor_results(cache_key: str, user_state, at_time: datetime):
+    """
+    Return the cached (usage_keys_to_remove, inaccessible_sequences) results of
+    the outline processors, or None if they are missing or stale.
+
+    Results are stale if the user state they were computed for has changed, or
+    if at_time is not within the window in which they stay valid.
+    """
+    cache_result = TieredCache.get_cached_response(cache_key)
+    if not cache_result.is_found:
+        return None
+
+    cached_user_state, valid_from, valid_until, usage_keys_to_remove, inaccessible_sequences = cache_result.value
+    if cached_user_state != user_state or at_time < valid_from:
+        return None
+    if valid_until is not None and at_time >= valid_until:
+        return None
+    return usage_keys_to_remove, inaccessible_sequences
+
+
+def _user_outline_state_cache_key(user_id: int) -> str:
+    return f"learning_sequences.api.user_outline_state.v1.{user_id}"
+
+
+def _get_user_outline_state(user_id: int) -> str:
+    """
+    Return the token identifying the current state of the given user for the
+    user outline cache, which invalidate_user_course_outlines resets.
+    """
+    cache_key = _user_outline_state_cache_key(user_id)
+    cache_result = TieredCache.get_cached_response(cache_key)
+    if cache_result.is_found:
+        return cache_result.value
+
+    user_state = uuid4().hex
+    TieredCache.set_all_tiers(cache_key, user_state, USER_OUTLINE_CACHE_TIMEOUT)
+    return user_state
 
 
 @function_trace('learning_sequences.api.replace_course_outline')
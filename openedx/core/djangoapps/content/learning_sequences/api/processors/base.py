@@ -61,6 +61,44 @@ class OutlineProcessor:
         """
         pass  # lint-amnesty, pylint: disable=unnecessary-pass
 
+    @classmethod
+    def load_data_for_users(cls, processors, full_course_outline: CourseOutlineData):
+        """
+        Load the data of many processors of this class, one for each user of
+        a bulk request for the outlines of a course.
+
+        The default implementation calls load_data on each processor. Override
+        it to fetch the data of all the users at once instead, in a number of
+        queries that does not grow with the number of users. Enrollments and
+        course roles of all the users are already prefetched when this is
+        called.
+        """
+        for processor in processors:
+            processor.load_data(full_course_outline)
+
+    def user_state_fingerprint(self):
+        """
+        Return a hashable value identifying any state that the results of this
+        processor depend on, and that is not invalidated by the signals that
+        reset cached user outlines (enrollment, schedule and milestone changes).
+
+        This is called before load_data, so it must be cheap. The default of
+        None means that the results only depend on the course outline and on
+        the user state covered by those signals.
+        """
+        return None
+
+    def results_valid_until(self, full_course_outline: CourseOutlineData):  # pylint: disable=unused-argument
+        """
+        Return the datetime until which the results computed at self.at_time
+        stay valid, or None if they do not depend on the time.
+
+        This is called after load_data, so that processors whose results change
+        with the time (like ScheduleOutlineProcessor) can return the next date
+        at which they could change.
+        """
+        return None
+
     def inaccessible_sequences(self, full_course_outline: CourseOutlineData):  # pylint: disable=unused-argument
         """
         Return a set/frozenset of Sequence UsageKeys that are not accessible.
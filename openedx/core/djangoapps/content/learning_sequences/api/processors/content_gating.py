@@ -39,6 +39,18 @@ class ContentGatingOutlineProcessor(OutlineProcessor):
                 self.user, self.course_key
             )
 
+    @classmethod
+    def load_data_for_users(cls, processors, full_course_outline):
+        """
+        Courses without milestones have no required content, which saves
+        looking up the milestones and entrance exam settings of every user.
+        """
+        if processors and not milestones_helpers.get_course_milestones(str(processors[0].course_key)):
+            for processor in processors:
+                processor.required_content = []
+        else:
+            super().load_data_for_users(processors, full_course_outline)
+
     def inaccessible_sequences(self, full_course_outline):
         """
         Mark any section that is gated by required content as inaccessible
@@ -12,6 +12,12 @@ class EnrollmentOutlineProcessor(OutlineProcessor):
     """
     Simple OutlineProcessor that removes items based on Enrollment and course visibility setting.
     """
+    def user_state_fingerprint(self):
+        """
+        Results depend on whether unenrolled access is enabled for the course.
+        """
+        return COURSE_ENABLE_UNENROLLED_ACCESS_FLAG.is_enabled(self.course_key)
+
     def usage_keys_to_remove(self, full_course_outline):
         """
         Return sequences/sections to be removed
@@ -1,7 +1,11 @@
 # lint-amnesty, pylint: disable=missing-module-docstring
 import logging
+from datetime import datetime
 
 from django.contrib.auth import get_user_model
+from opaque_keys.edx.keys import CourseKey
+from openedx.core import types
+
 from common.djangoapps.util import milestones_helpers
 
 from .base import OutlineProcessor
@@ -17,6 +21,24 @@ class MilestonesOutlineProcessor(OutlineProcessor):
     This does not include Entrance Exams (see `ContentGatingOutlineProcessor`),
     or Special Exams (see `SpecialExamsOutlineProcessor`)
     """
+    def __init__(self, course_key: CourseKey, user: types.User, at_time: datetime):
+        super().__init__(course_key, user, at_time)
+        self.has_content_milestones = True
+
+    @classmethod
+    def load_data_for_users(cls, processors, full_course_outline):
+        """
+        If no content of the course requires a milestone, no user has pending
+        milestones, which saves looking up the milestones of every user.
+        """
+        if processors and not milestones_helpers.get_course_content_milestones(
+            str(processors[0].course_key), relationship='requires'
+        ):
+            for processor in processors:
+                processor.has_content_milestones = False
+        else:
+            super().load_data_for_users(processors, full_course_outline)
+
     def inaccessible_sequences(self, full_course_outline):
         """
         Returns the set of sequence usage keys for which the
@@ -33,6 +55,8 @@ class MilestonesOutlineProcessor(OutlineProcessor):
         return inaccessible
 
     def has_pending_milestones(self, usage_key):
+        if not self.has_content_milestones:
+            return False
         return bool(milestones_helpers.get_course_content_milestones(
             str(self.course_key),
             str(usage_key),
@@ -5,11 +5,13 @@ from datetime import datetime, timedelta
 from typing import Dict
 
 from edx_when.api import get_dates_for_course
+from edx_when.models import UserDate
 from opaque_keys.edx.keys import CourseKey  # lint-amnesty, pylint: disable=unused-import
 from openedx.core import types
 
 from common.djangoapps.student.auth import user_has_role
 from common.djangoapps.student.roles import CourseBetaTesterRole
+from openedx.core.djangoapps.schedules.models import Schedule
 
 from ...data import ScheduleData, ScheduleItemData, UserCourseOutlineData
 from .base import OutlineProcessor
@@ -48,11 +50,56 @@ class ScheduleOutlineProcessor(OutlineProcessor):
 
         Return data format: (usage_key, 'due'): datetime.datetime(2019, 12, 11, 15, 0, tzinfo=<UTC>)
         """
-        self.dates = get_dates_for_course(
-            self.course_key, self.user, subsection_and_higher_only=True,
-            published_version=full_course_outline.published_version
+        self._set_dates(
+            get_dates_for_course(
+                self.course_key, self.user, subsection_and_higher_only=True,
+                published_version=full_course_outline.published_version
+            )
         )
 
+    @classmethod
+    def load_data_for_users(cls, processors, full_course_outline):
+        """
+        Pull dates information from edx-when for many users.
+
+        Only users with personalized dates (e.g. due date extensions) need
+        their own edx-when lookup. Everyone else gets the dates of the course,
+        relative to their schedule if they have one.
+        """
+        if not processors:
+            return
+        course_key = processors[0].course_key
+        user_ids = [processor.user.id for processor in processors]
+        users_with_personalized_dates = set(
+            UserDate.objects.filter(
+                user_id__in=user_ids, content_date__course_id=course_key
+            ).values_list('user_id', flat=True)
+        )
+        schedules = {
+            schedule.enrollment.user_id: schedule
+            for schedule in Schedule.objects.select_related('enrollment').filter(
+                enrollment__user_id__in=user_ids, enrollment__course_id=course_key
+            )
+        }
+
+        for processor in processors:
+            if processor.user.id in users_with_personalized_dates:
+                processor.load_data(full_course_outline)
+            else:
+                processor._set_dates(  # pylint: disable=protected-access
+                    get_dates_for_course(
+                        course_key, schedule=schedules.get(processor.user.id), subsection_and_higher_only=True,
+                        published_version=full_course_outline.published_version
+                    )
+                )
+
+    def _set_dates(self, dates):
+        """
+        Set the dates of the course for this user, and whether they are a beta
+        tester.
+        """
+        self.dates = dates
+
         for (usage_key, field_name), date in self.dates.items():
             self.keys_to_schedule_fields[usage_key][field_name] = date
 
@@ -112,6 +159,32 @@ class ScheduleOutlineProcessor(OutlineProcessor):
 
         return inaccessible
 
+    def results_valid_until(self, full_course_outline):
+        """
+        Return the earliest start or due date that is not yet past, since
+        inaccessible_sequences can only change when one of them is reached.
+        """
+        if self._is_beta_tester and full_course_outline.days_early_for_beta is not None:
+            start_offset = timedelta(days=full_course_outline.days_early_for_beta)
+        else:
+            start_offset = timedelta(days=0)
+
+        dates = [self._course_start - start_offset if self._course_start else None]
+        for section in full_course_outline.sections:
+            section_start = self.keys_to_schedule_fields[section.usage_key].get('start')
+            dates.append(section_start - start_offset if section_start else None)
+            for seq in section.sequences:
+                seq_start = self.keys_to_schedule_fields[seq.usage_key].get('start')
+                dates.append(seq_start - start_offset if seq_start else None)
+                if seq.inaccessible_after_due:
+                    if full_course_outline.self_paced:
+                        dates.append(self._course_end)
+                    else:
+                        dates.append(self.keys_to_schedule_fields[seq.usage_key].get('due'))
+
+        upcoming_dates = [date for date in dates if date is not None and date >= self.at_time]
+        return min(upcoming_dates) if upcoming_dates else None
+
     def schedule_data(self, pruned_course_outline: UserCourseOutlineData) -> ScheduleData:
         """
         Return supplementary scheduling information for this outline.
@@ -0,0 +1,102 @@
+"""
+Benchmark comparing a loop of get_user_course_outline calls with one
+get_user_course_outlines call, for a course with hundreds and thousands of
+enrolled learners. Reports the number of queries and the wall time of
+computing the outlines of every learner.
+
+Since it needs a database, it runs as a test case, which the default test
+collection does not pick up.
+
+Usage:
+    pytest openedx/core/djangoapps/content/learning_sequences/api/tests/benchmark_user_outlines.py -s
+"""
+import timeit
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from edx_when.api import set_dates_for_course
+from opaque_keys.edx.keys import CourseKey
+
+from common.djangoapps.student.models import CourseEnrollment
+
+from ...data import CourseOutlineData, CourseVisibility
+from ..outlines import get_user_course_outline, get_user_course_outlines, replace_course_outline
+from .test_data import generate_sections
+
+NUM_LEARNERS = (100, 1000)
+
+User = get_user_model()
+
+
+class UserCourseOutlinesBenchmark(TestCase):
+    """
+    Benchmarks computing the outlines of many learners of a course.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course_key = CourseKey.from_string("course-v1:OpenEdX+Outline+Benchmark")
+        sections = generate_sections(cls.course_key, [10] * 10)
+        set_dates_for_course(
+            cls.course_key,
+            [(cls.course_key.make_usage_key('course', 'course'), {'start': datetime(2020, 5, 10, tzinfo=timezone.utc)})]
+            + [
+                (sequence.usage_key, {'start': datetime(2020, 5, 10 + index, tzinfo=timezone.utc)})
+                for index, sequence in enumerate(sections[0].sequences)
+            ]
+        )
+        replace_course_outline(
+            CourseOutlineData(
+                course_key=cls.course_key,
+                title="User Course Outlines Benchmark Course",
+                published_at=datetime(2020, 5, 20, tzinfo=timezone.utc),
+                published_version="5ebece4b69dd593d82fe2023",
+                entrance_exam_id=None,
+                days_early_for_beta=None,
+                sections=sections,
+                self_paced=False,
+                course_visibility=CourseVisibility.PRIVATE,
+            )
+        )
+
+        User.objects.bulk_create([
+            User(username=f'benchmark_learner_{index}', email=f'benchmark_learner_{index}@example.com')
+            for index in range(max(NUM_LEARNERS))
+        ])
+        cls.users = list(User.objects.filter(username__startswith='benchmark_learner_').order_by('id'))
+        CourseEnrollment.objects.bulk_create([
+            CourseEnrollment(user=user, course_id=cls.course_key, mode='audit', is_active=True)
+            for user in cls.users
+        ])
+        cls.at_time = datetime(2020, 5, 15, tzinfo=timezone.utc)
+
+    def _per_user(self, users):
+        """
+        Computes the outlines of the given users one by one.
+        """
+        for user in users:
+            get_user_course_outline(self.course_key, user, self.at_time)
+
+    def _bulk(self, users):
+        """
+        Computes the outlines of the given users with get_user_course_outlines.
+        """
+        get_user_course_outlines(self.course_key, users, self.at_time)
+
+    def _measure(self, compute, users):
+        """
+        Returns the number of queries and the wall time of the given computation.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            wall_time = timeit.timeit(lambda: compute(users), number=1)
+        return len(queries), wall_time
+
+    def test_benchmark(self):
+        for num_learners in NUM_LEARNERS:
+            users = self.users[:num_learners]
+            for name, compute in (('per user', self._per_user), ('bulk', self._bulk)):
+                num_queries, wall_time = self._measure(compute, users)
+                print(f'{num_learners:>6} learners, {name:<8}: {num_queries:>6} queries, {wall_time:.3f}s')
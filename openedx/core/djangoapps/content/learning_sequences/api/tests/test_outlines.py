@@ -8,10 +8,12 @@ import unittest
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
 from django.db.models import signals
+from django.test.utils import CaptureQueriesContext
 from edx_proctoring.exceptions import ProctoredExamNotFoundException
 from edx_toggles.toggles.testutils import override_waffle_flag
-from edx_when.api import set_dates_for_course
+from edx_when.api import set_date_for_block, set_dates_for_course
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import LibraryLocator
 import attr
@@ -24,6 +26,7 @@ from openedx.features.course_experience import COURSE_ENABLE_UNENROLLED_ACCESS_F
 from common.djangoapps.course_modes.models import CourseMode
 from common.djangoapps.course_modes.signals import update_masters_access_course
 from common.djangoapps.student.auth import user_has_role
+from common.djangoapps.student.models import EntranceExamConfiguration
 from common.djangoapps.student.roles import CourseBetaTesterRole
 from common.djangoapps.student.tests.factories import BetaTesterFactory, UserFactory
 from xmodule.partitions.partitions import (
@@ -40,17 +43,20 @@ from ...data import (
     VisibilityData,
 
 )
-from ...toggles import USE_FOR_OUTLINES
+from ...toggles import USE_FOR_OUTLINES, USE_USER_OUTLINE_CACHE
 from ..outlines import (
     get_content_errors,
     get_course_outline,
     get_user_course_outline,
     get_user_course_outline_details,
+    get_user_course_outlines,
+    invalidate_user_course_outlines,
     key_supports_outlines,
     public_api_available,
     replace_course_outline,
 )
 from ..processors.enrollment_track_partition_groups import EnrollmentTrackPartitionGroupsOutlineProcessor
+from ..processors.schedule import ScheduleOutlineProcessor
 from .test_data import generate_sections
 
 
@@ -844,6 +850,248 @@ class ScheduleTestCase(OutlineProcessorTestCase):
         assert len(beta_tester_details.outline.accessible_sequences) == 4
 
 
+@override_waffle_flag(USE_USER_OUTLINE_CACHE, active=True)
+class UserOutlineCacheTestCase(OutlineProcessorTestCase):
+    """
+    Tests for caching the outline processor results of a user.
+    """
+    ENABLED_CACHES = ['default']
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.section_key = cls.course_key.make_usage_key('chapter', 'ch1')
+        cls.seq_started_key = cls.course_key.make_usage_key('sequential', 'seq_started')
+        cls.seq_later_key = cls.course_key.make_usage_key('sequential', 'seq_later')
+        set_dates_for_course(
+            cls.course_key,
+            [
+                (
+                    cls.course_key.make_usage_key('course', 'course'),
+                    {'start': datetime(2020, 5, 10, tzinfo=timezone.utc)}
+                ),
+                (cls.seq_started_key, {'start': datetime(2020, 5, 10, tzinfo=timezone.utc)}),
+                (cls.seq_later_key, {'start': datetime(2020, 5, 16, tzinfo=timezone.utc)}),
+            ]
+        )
+        visibility = VisibilityData(hide_from_toc=False, visible_to_staff_only=False)
+        replace_course_outline(
+            CourseOutlineData(
+                course_key=cls.course_key,
+                title="User Outline Cache Test Course!",
+                published_at=datetime(2020, 5, 20, tzinfo=timezone.utc),
+                published_version="5ebece4b69dd593d82fe2021",
+                entrance_exam_id=None,
+                days_early_for_beta=None,
+                self_paced=False,
+                course_visibility=CourseVisibility.PRIVATE,
+                sections=[
+                    CourseSectionData(
+                        usage_key=cls.section_key,
+                        title="Section",
+                        visibility=visibility,
+                        sequences=[
+                            CourseLearningSequenceData(
+                                usage_key=cls.seq_started_key, title='Started', visibility=visibility
+                            ),
+                            CourseLearningSequenceData(
+                                usage_key=cls.seq_later_key, title='Later', visibility=visibility
+                            ),
+                        ]
+                    )
+                ],
+            )
+        )
+        cls.enrollment = cls.student.courseenrollment_set.create(
+            course_id=cls.course_key, is_active=True, mode="audit"
+        )
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(
+            ScheduleOutlineProcessor, 'load_data', autospec=True, side_effect=ScheduleOutlineProcessor.load_data
+        )
+        self.schedule_load_data = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_until_next_date(self):
+        outline = get_user_course_outline(self.course_key, self.student, datetime(2020, 5, 12, tzinfo=timezone.utc))
+        assert outline.accessible_sequences == {self.seq_started_key}
+        assert self.schedule_load_data.call_count == 1
+
+        # The results are cached until the next sequence starts...
+        outline = get_user_course_outline(self.course_key, self.student, datetime(2020, 5, 15, tzinfo=timezone.utc))
+        assert outline.accessible_sequences == {self.seq_started_key}
+        assert self.schedule_load_data.call_count == 1
+
+        # ...when they are computed again.
+        outline = get_user_course_outline(self.course_key, self.student, datetime(2020, 5, 16, tzinfo=timezone.utc))
+        assert outline.accessible_sequences == {self.seq_started_key, self.seq_later_key}
+        assert self.schedule_load_data.call_count == 2
+
+    def test_not_cached_for_earlier_time(self):
+        get_user_course_outline(self.course_key, self.student, datetime(2020, 5, 12, tzinfo=timezone.utc))
+        outline = get_user_course_outline(self.course_key, self.student, datetime(2020, 5, 9, tzinfo=timezone.utc))
+        assert outline.accessible_sequences == set()
+        assert self.schedule_load_data.call_count == 2
+
+    def test_invalidated_by_enrollment_change(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        assert len(get_user_course_outline(self.course_key, self.student, at_time).sequences) == 2
+
+        self.enrollment.is_active = False
+        self.enrollment.save()
+        assert len(get_user_course_outline(self.course_key, self.student, at_time).sequences) == 0
+        assert self.schedule_load_data.call_count == 2
+
+    def test_invalidated_by_unenrollment(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        assert len(get_user_course_outline(self.course_key, self.student, at_time).sequences) == 2
+
+        self.enrollment.delete()
+        assert len(get_user_course_outline(self.course_key, self.student, at_time).sequences) == 0
+        assert self.schedule_load_data.call_count == 2
+
+    def test_invalidated_by_personalized_date(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        outline = get_user_course_outline(self.course_key, self.student, at_time)
+        assert outline.accessible_sequences == {self.seq_started_key}
+
+        set_date_for_block(
+            self.course_key, self.seq_later_key, 'start', datetime(2020, 5, 11, tzinfo=timezone.utc),
+            user=self.student,
+        )
+        outline = get_user_course_outline(self.course_key, self.student, at_time)
+        assert outline.accessible_sequences == {self.seq_started_key, self.seq_later_key}
+        assert self.schedule_load_data.call_count == 2
+
+    def test_invalidated_by_course_access_role(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        get_user_course_outline(self.course_key, self.student, at_time)
+
+        CourseBetaTesterRole(self.course_key).add_users(self.student)
+        get_user_course_outline(self.course_key, self.student, at_time)
+        assert self.schedule_load_data.call_count == 2
+
+        CourseBetaTesterRole(self.course_key).remove_users(self.student)
+        get_user_course_outline(self.course_key, self.student, at_time)
+        assert self.schedule_load_data.call_count == 3
+
+    def test_invalidated_by_entrance_exam_configuration(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        get_user_course_outline(self.course_key, self.student, at_time)
+
+        entrance_exam_configuration = EntranceExamConfiguration.objects.create(
+            user=self.student, course_id=self.course_key
+        )
+        get_user_course_outline(self.course_key, self.student, at_time)
+        assert self.schedule_load_data.call_count == 2
+
+        entrance_exam_configuration.delete()
+        get_user_course_outline(self.course_key, self.student, at_time)
+        assert self.schedule_load_data.call_count == 3
+
+    def test_invalidate_user_course_outlines(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        get_user_course_outline(self.course_key, self.student, at_time)
+        invalidate_user_course_outlines(self.student.id)
+        get_user_course_outline(self.course_key, self.student, at_time)
+        assert self.schedule_load_data.call_count == 2
+
+    def test_details_not_cached(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        get_user_course_outline(self.course_key, self.student, at_time)
+        details = get_user_course_outline_details(self.course_key, self.student, at_time)
+        assert details.outline.accessible_sequences == {self.seq_started_key}
+        assert self.schedule_load_data.call_count == 2
+
+    @override_waffle_flag(USE_USER_OUTLINE_CACHE, active=False)
+    def test_flag_inactive(self):
+        at_time = datetime(2020, 5, 12, tzinfo=timezone.utc)
+        get_user_course_outline(self.course_key, self.student, at_time)
+        get_user_course_outline(self.course_key, self.student, at_time)
+        assert self.schedule_load_data.call_count == 2
+
+
+class UserCourseOutlinesTestCase(OutlineProcessorTestCase):
+    """
+    Tests for getting the outlines of many users at once.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.later_seq_key = cls.course_key.make_usage_key('sequential', 'seq_2_1')
+        set_dates_for_course(
+            cls.course_key,
+            [
+                (
+                    cls.course_key.make_usage_key('course', 'course'),
+                    {'start': datetime(2020, 5, 10, tzinfo=timezone.utc)}
+                ),
+                (cls.later_seq_key, {'start': datetime(2020, 5, 20, tzinfo=timezone.utc)}),
+            ]
+        )
+        replace_course_outline(
+            CourseOutlineData(
+                course_key=cls.course_key,
+                title="User Course Outlines Test Course!",
+                published_at=datetime(2020, 5, 20, tzinfo=timezone.utc),
+                published_version="5ebece4b69dd593d82fe2022",
+                entrance_exam_id=None,
+                days_early_for_beta=2,
+                sections=generate_sections(cls.course_key, [2, 2]),
+                self_paced=False,
+                course_visibility=CourseVisibility.PRIVATE,
+            )
+        )
+        cls.unenrolled_student = UserFactory.create()
+        cls.students = [cls.student] + [UserFactory.create() for _ in range(3)]
+        for user in cls.students + [cls.beta_tester]:
+            user.courseenrollment_set.create(course_id=cls.course_key, is_active=True, mode="audit")
+        cls.at_time = datetime(2020, 5, 18, tzinfo=timezone.utc)
+
+    def assert_same_as_single_user_outlines(self, users):
+        """
+        Assert that the outlines of the given users are the same when computed
+        in bulk and one by one.
+        """
+        user_course_outlines = get_user_course_outlines(self.course_key, users, self.at_time)
+        assert set(user_course_outlines) == {user.id for user in users}
+        for user in users:
+            assert user_course_outlines[user.id] == get_user_course_outline(self.course_key, user, self.at_time)
+
+    def test_same_as_single_user_outlines(self):
+        users = [self.global_staff, self.student, self.unenrolled_student, self.beta_tester]
+        self.assert_same_as_single_user_outlines(users)
+
+        user_course_outlines = get_user_course_outlines(self.course_key, users, self.at_time)
+        assert len(user_course_outlines[self.global_staff.id].accessible_sequences) == 4
+        assert len(user_course_outlines[self.student.id].accessible_sequences) == 3
+        assert len(user_course_outlines[self.unenrolled_student.id].sequences) == 0
+        assert len(user_course_outlines[self.beta_tester.id].accessible_sequences) == 4
+
+    def test_personalized_dates(self):
+        set_date_for_block(
+            self.course_key, self.later_seq_key, 'start', datetime(2020, 5, 15, tzinfo=timezone.utc),
+            user=self.student,
+        )
+        self.assert_same_as_single_user_outlines(self.students)
+
+        user_course_outlines = get_user_course_outlines(self.course_key, self.students, self.at_time)
+        assert self.later_seq_key in user_course_outlines[self.student.id].accessible_sequences
+        assert self.later_seq_key not in user_course_outlines[self.students[1].id].accessible_sequences
+
+    def test_number_of_queries(self):
+        get_user_course_outlines(self.course_key, self.students, self.at_time)
+
+        with CaptureQueriesContext(connection) as few_users_queries:
+            get_user_course_outlines(self.course_key, self.students[:2], self.at_time)
+        with CaptureQueriesContext(connection) as all_users_queries:
+            get_user_course_outlines(self.course_key, self.students + [self.beta_tester], self.at_time)
+
+        assert len(all_users_queries) == len(few_users_queries)
+
+
 class SelfPacedTestCase(OutlineProcessorTestCase):  # lint-amnesty, pylint: disable=missing-class-docstring
 
     @classmethod
@@ -12,6 +12,7 @@ class LearningSequencesConfig(AppConfig):  # lint-amnesty, pylint: disable=missi
     def ready(self):
         # Register celery workers
         # from .tasks import ls_listen_for_course_publish  # pylint: disable=unused-variable
+        from . import signals  # pylint: disable=unused-import
 
         if settings.FEATURES.get('ENABLE_SPECIAL_EXAMS'):
             from .services import LearningSequencesRuntimeService
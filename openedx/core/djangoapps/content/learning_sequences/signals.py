@@ -0,0 +1,70 @@
+"""
+Signal handlers that reset the cached outline processor results of a user when
+the user state they depend on changes.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from edx_when.models import UserDate
+from milestones.models import UserMilestone
+
+from common.djangoapps.student.models import CourseAccessRole, CourseEnrollment, EntranceExamConfiguration
+from openedx.core.djangoapps.schedules.models import Schedule
+
+from .api import invalidate_user_course_outlines
+
+
+@receiver(post_save, sender=CourseEnrollment, dispatch_uid='learning_sequences_enrollment_changed')
+@receiver(post_delete, sender=CourseEnrollment, dispatch_uid='learning_sequences_enrollment_deleted')
+def enrollment_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Enrollment and EnrollmentTrackPartitionGroups processors depend on the
+    user's enrollment and its mode.
+    """
+    invalidate_user_course_outlines(instance.user_id)
+
+
+@receiver(post_save, sender=Schedule, dispatch_uid='learning_sequences_schedule_changed')
+@receiver(post_delete, sender=Schedule, dispatch_uid='learning_sequences_schedule_deleted')
+def schedule_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Schedule processor depends on the user's personalized dates.
+    """
+    invalidate_user_course_outlines(instance.enrollment.user_id)
+
+
+@receiver(post_save, sender=UserMilestone, dispatch_uid='learning_sequences_user_milestone_saved')
+@receiver(post_delete, sender=UserMilestone, dispatch_uid='learning_sequences_user_milestone_deleted')
+def user_milestone_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    ContentGating and Milestones processors depend on the user's milestones.
+    """
+    invalidate_user_course_outlines(instance.user_id)
+
+
+@receiver(post_save, sender=UserDate, dispatch_uid='learning_sequences_user_date_saved')
+@receiver(post_delete, sender=UserDate, dispatch_uid='learning_sequences_user_date_deleted')
+def user_date_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Schedule processor depends on the dates overridden for the user.
+    """
+    invalidate_user_course_outlines(instance.user_id)
+
+
+@receiver(post_save, sender=CourseAccessRole, dispatch_uid='learning_sequences_course_access_role_saved')
+@receiver(post_delete, sender=CourseAccessRole, dispatch_uid='learning_sequences_course_access_role_deleted')
+def course_access_role_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Processors are skipped for course staff, and the Schedule processor
+    releases content early for beta testers.
+    """
+    invalidate_user_course_outlines(instance.user_id)
+
+
+@receiver(post_save, sender=EntranceExamConfiguration, dispatch_uid='learning_sequences_entrance_exam_config_saved')
+@receiver(post_delete, sender=EntranceExamConfiguration, dispatch_uid='learning_sequences_entrance_exam_config_deleted')
+def entrance_exam_configuration_changed(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    ContentGating processor depends on whether the user may skip the
+    entrance exam.
+    """
+    invalidate_user_course_outlines(instance.user_id)
@@ -23,3 +23,17 @@ WAFFLE_NAMESPACE = 'learning_sequences'
 # .. toggle_creation_date: 2021-06-07
 # .. toggle_target_removal_date: 2020-08-01
 USE_FOR_OUTLINES = CourseWaffleFlag(WAFFLE_NAMESPACE, 'use_for_outlines', __name__)
+
+# .. toggle_name: learning_sequences.use_user_outline_cache
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_description: Waffle flag to cache the results of the outline
+#   processors for each user and course, so that get_user_course_outline does
+#   not have to run every OutlineProcessor (and their queries) on every call.
+#   Cached results are keyed by the published version of the course, are reset
+#   when the enrollment, schedule or milestones of the user change, and expire
+#   when the next start or due date of the course is reached.
+# .. toggle_default: False
+# .. toggle_use_cases: temporary, open_edx
+# .. toggle_creation_date: 2026-10-18
+# .. toggle_target_removal_date: 2027-01-18
+USE_USER_OUTLINE_CACHE = CourseWaffleFlag(WAFFLE_NAMESPACE, 'use_user_outline_cache', __name__)
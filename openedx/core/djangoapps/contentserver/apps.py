@@ -0,0 +1,17 @@
+"""
+Django App config for contentserver
+"""
+
+
+from django.apps import AppConfig
+
+
+class ContentserverConfig(AppConfig):
+    """
+    Configuration class for the contentserver Django app.
+    """
+    name = 'openedx.core.djangoapps.contentserver'
+    verbose_name = "Content Server"
+
+    def ready(self):
+        from . import signals  # pylint: disable=unused-import
@@ -5,7 +5,7 @@ from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 
-from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.contentstore.content import STATIC_CONTENT_VERSION, StaticContentMetadata
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
@@ -14,19 +14,69 @@ try:
 except InvalidCacheBackendError:
     pass
 
+# The metadata of assets, and the locations of missing assets, are cached for a short time
+# only.  They are invalidated when assets are saved or deleted in the contentstore, but
+# missing assets may also be created by course imports and reruns.
+METADATA_CACHE_TIMEOUT = 5 * 60
+NOT_FOUND_CACHE_TIMEOUT = 60
+
+# Cached in place of the metadata of missing assets.
+ASSET_NOT_FOUND = 'not found'
+
+
+def _content_key(location):
+    """
+    Returns the cache key of the content at the given location.
+    """
+    return str(location).encode("utf-8")
+
+
+def _metadata_key(location):
+    """
+    Returns the cache key of the metadata of the content at the given location.
+    """
+    return ('metadata:' + str(location)).encode("utf-8")
+
 
 def set_cached_content(content):
     """
     Stores the given piece of content in the cache, using its location as the key.
     """
-    CONTENT_CACHE.set(str(content.location).encode("utf-8"), content, version=STATIC_CONTENT_VERSION)
+    CONTENT_CACHE.set(_content_key(content.location), content, version=STATIC_CONTENT_VERSION)
 
 
 def get_cached_content(location):
     """
     Retrieves the given piece of content by its location if cached.
     """
-    return CONTENT_CACHE.get(str(location).encode("utf-8"), version=STATIC_CONTENT_VERSION)
+    return CONTENT_CACHE.get(_content_key(location), version=STATIC_CONTENT_VERSION)
+
+
+def set_cached_content_metadata(content):
+    """
+    Stores the metadata of the given piece of content in the cache, using its location as the key.
+    """
+    CONTENT_CACHE.set(
+        _metadata_key(content.location),
+        StaticContentMetadata.from_content(content),
+        METADATA_CACHE_TIMEOUT,
+        version=STATIC_CONTENT_VERSION,
+    )
+
+
+def set_cached_content_not_found(location):
+    """
+    Stores in the cache that there is no content at the given location.
+    """
+    CONTENT_CACHE.set(_metadata_key(location), ASSET_NOT_FOUND, NOT_FOUND_CACHE_TIMEOUT, version=STATIC_CONTENT_VERSION)
+
+
+def get_cached_content_metadata(location):
+    """
+    Retrieves the metadata of the given piece of content by its location if cached, as a
+    StaticContentMetadata, or ASSET_NOT_FOUND if there is no content at this location.
+    """
+    return CONTENT_CACHE.get(_metadata_key(location), version=STATIC_CONTENT_VERSION)
 
 
 def del_cached_content(location):
@@ -36,15 +86,14 @@ def del_cached_content(location):
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
     """
-    def location_str(loc):
-        """Force the location to a Unicode string."""
-        return str(loc).encode("utf-8")
-
-    locations = [location_str(location)]
+    locations = [location]
     try:
-        locations.append(location_str(location.replace(run=None)))
+        locations.append(location.replace(run=None))
     except InvalidKeyError:
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
-    CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+    CONTENT_CACHE.delete_many(
+        [_content_key(loc) for loc in locations] + [_metadata_key(loc) for loc in locations],
+        version=STATIC_CONTENT_VERSION,
+    )
@@ -5,28 +5,44 @@ Middleware to serve assets.
 
 import datetime
 import logging
+from uuid import uuid4
 
+from django.conf import settings
 from django.http import (
     HttpResponse,
     HttpResponseBadRequest,
     HttpResponseForbidden,
     HttpResponseNotFound,
     HttpResponseNotModified,
-    HttpResponsePermanentRedirect
+    HttpResponsePermanentRedirect,
+    StreamingHttpResponse
 )
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_etags
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 
 from openedx.core.djangoapps.header_control import force_header_for_response
 from common.djangoapps.student.models import CourseEnrollment
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent
+from xmodule.contentstore.content import (
+    XASSET_LOCATION_TAG,
+    StaticContent,
+    StaticContentMetadata,
+    StaticContentStream
+)
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore import InvalidLocationError
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
-from .caching import get_cached_content, set_cached_content
+from .caching import (
+    ASSET_NOT_FOUND,
+    get_cached_content,
+    get_cached_content_metadata,
+    set_cached_content,
+    set_cached_content_metadata,
+    set_cached_content_not_found
+)
 from .models import CdnUserAgentsConfig, CourseAssetCacheTtlConfig
 
 log = logging.getLogger(__name__)
@@ -41,6 +57,15 @@ except ImportError:
 
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 
+# Size of the chunks in which assets are read from the contentstore and streamed to the
+# client, which bounds the memory used to serve an asset.  It is the default size of the
+# chunks of GridFS files, so that each read fetches a single chunk.
+STREAMING_CHUNK_SIZE = 255 * 1024
+
+# Maximum number of ranges, once overlapping and adjacent ones are merged, served in a single
+# multipart/byteranges response.  Requests for more ranges are answered with the full content.
+MAX_BYTE_RANGES = 16
+
 
 class StaticContentServer(MiddlewareMixin):
     """
@@ -78,10 +103,11 @@ class StaticContentServer(MiddlewareMixin):
                 return HttpResponseBadRequest()
 
             # Attempt to load the asset to make sure it exists, and grab the asset digest
-            # if we're able to load it.
+            # if we're able to load it.  Only its metadata is loaded if that is all that
+            # is cached, since it is all that redirects and conditional requests need.
             actual_digest = None
             try:
-                content = self.load_asset_from_location(loc)
+                content = self.load_asset_from_location(loc, metadata_only=True)
                 actual_digest = getattr(content, "content_digest", None)
             except (ItemNotFoundError, NotFoundError):
                 return HttpResponseNotFound()
@@ -117,25 +143,39 @@ class StaticContentServer(MiddlewareMixin):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
+            # if this asset has changed since then.  If-None-Match takes precedence over
+            # If-Modified-Since when the asset has an ETag.
+            etag = get_etag(content)
             last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if etag is not None and 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
+            # Load the data of the asset, unless it was loaded along with its metadata.
+            if isinstance(content, StaticContentMetadata):
+                try:
+                    content = self.load_asset_from_location(loc)
+                except (ItemNotFoundError, NotFoundError):
+                    return HttpResponseNotFound()
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
             # Request -> Range attribute structure: "Range: bytes=first-[last]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
+            # A Range is ignored if an If-Range is provided which does not match the current
+            # version of the asset, so that clients never mix parts of different versions.
+            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.27
             response = None
-            if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if request.META.get('HTTP_RANGE') and (if_range is None or if_range in (etag, last_modified_at_str)):
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -149,38 +189,51 @@ class StaticContentServer(MiddlewareMixin):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning("Unknown unit in Range header: %s for content: %s", header_value, str(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            "More than 1 ranges in Range header: %s for content: %s", header_value, str(loc)
-                        )
                     else:
-                        first, last = ranges[0]
+                        # Unsatisfiable ranges are ignored, unless none of the ranges is satisfiable.
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                "Cannot satisfy ranges in Range header: %s for content: %s",
+                                header_value, str(loc)
+                            )
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = f'bytes */{content.length}'
+                            return response
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        ranges = coalesce_ranges(ranges)
+                        if len(ranges) > MAX_BYTE_RANGES:
+                            log.warning(
+                                "Ignoring %d ranges in Range header for content: %s",
+                                len(ranges), str(loc)
+                            )
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = make_content_response(
+                                content, content.stream_data_in_range(first, last, STREAMING_CHUNK_SIZE)
+                            )
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
+                            response['Content-Type'] = content.content_type
+                        else:
+                            # According to Http/1.1 spec content for multiple ranges should be sent as a
+                            # multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = make_multipart_byteranges_response(content, ranges)
 
+                        if response is not None:
+                            response.status_code = 206  # Partial Content
                             if newrelic:
                                 newrelic.agent.add_custom_parameter('contentserver.ranged', True)
-                        else:
-                            log.warning(
-                                "Cannot satisfy ranges in Range header: %s for content: %s",
-                                header_value, str(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
-            # If Range header is absent or syntactically invalid return a full content response.
+            # If Range header is absent, syntactically invalid or has too many ranges, return a
+            # full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = make_content_response(content, content.stream_data(STREAMING_CHUNK_SIZE))
                 response['Content-Length'] = content.length
+                response['Content-Type'] = content.content_type
 
             if newrelic:
                 newrelic.agent.add_custom_parameter('contentserver.content_len', content.length)
@@ -188,7 +241,6 @@ class StaticContentServer(MiddlewareMixin):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
             response['X-Frame-Options'] = 'ALLOW'
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
@@ -225,6 +277,9 @@ class StaticContentServer(MiddlewareMixin):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        etag = get_etag(content)
+        if etag is not None:
+            response['ETag'] = etag
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
@@ -278,31 +333,136 @@ class StaticContentServer(MiddlewareMixin):
 
         return True
 
-    def load_asset_from_location(self, location):
+    def load_asset_from_location(self, location, metadata_only=False):
         """
         Loads an asset based on its location, either retrieving it from a cache
         or loading it directly from the contentstore.
+
+        If metadata_only is True, only the metadata of the asset is returned, as a
+        StaticContentMetadata, if the asset itself is not cached but its metadata is.
+        Missing assets are then also looked up in the cache, before the contentstore.
         """
 
         # See if we can load this item from cache.
         content = get_cached_content(location)
-        if content is None:
-            # Not in cache, so just try and load it from the asset manager.
-            try:
-                content = AssetManager.find(location, as_stream=True)
-            except (ItemNotFoundError, NotFoundError):  # lint-amnesty, pylint: disable=try-except-raise
-                raise
-
-            # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
-            # because it's the default for memcached and also we don't want to do too much
-            # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
-                content = content.copy_to_in_mem()
-                set_cached_content(content)
+        if content is not None:
+            return content
+
+        if metadata_only:
+            metadata = get_cached_content_metadata(location)
+            if metadata == ASSET_NOT_FOUND:
+                raise NotFoundError(location)
+            if metadata is not None:
+                return metadata
+
+        # Not in cache, so just try and load it from the asset manager.
+        try:
+            content = AssetManager.find(location, as_stream=True)
+        except (ItemNotFoundError, NotFoundError):
+            # Crawlers and stale links keep requesting missing assets.
+            set_cached_content_not_found(location)
+            raise
+        set_cached_content_metadata(content)
+
+        # Now that we fetched it, let's go ahead and try to cache it. We only cache small
+        # assets, because memcached caps the size of values to 1MB by default, and because
+        # we don't want to do too much buffering in memory when we're serving an actual
+        # request.  Larger assets are streamed from the contentstore.
+        if content.length is not None and content.length < settings.COURSE_ASSETS_CACHE_MAX_ASSET_SIZE:
+            content = content.copy_to_in_mem()
+            set_cached_content(content)
 
         return content
 
 
+def get_etag(content):
+    """
+    Returns the strong ETag of the given content, based on its digest, or None if it has no digest.
+    """
+    content_digest = getattr(content, "content_digest", None)
+    if not content_digest:
+        return None
+    return f'"{content_digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Returns whether the given If-None-Match header value matches the given ETag, using the
+    weak comparison the spec requires for If-None-Match.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+    """
+    etags = parse_etags(if_none_match)
+    if '*' in etags:
+        return True
+    return any((candidate[2:] if candidate.startswith('W/') else candidate) == etag for candidate in etags)
+
+
+def make_content_response(content, data):
+    """
+    Returns a response with the given data of the given content, streamed unless the content
+    is already in memory.
+    """
+    if isinstance(content, StaticContentStream):
+        return StreamingHttpResponse(data)
+    return HttpResponse(data)
+
+
+def coalesce_ranges(ranges):
+    """
+    Returns the given (first, last) byte ranges sorted, with the overlapping and adjacent ones
+    merged, so that no byte is sent twice.
+
+    See spec for details: https://tools.ietf.org/html/rfc7233#section-4.1
+    """
+    coalesced = []
+    for first, last in sorted(ranges):
+        if coalesced and first <= coalesced[-1][1] + 1:
+            coalesced[-1] = (coalesced[-1][0], max(last, coalesced[-1][1]))
+        else:
+            coalesced.append((first, last))
+    return coalesced
+
+
+def make_multipart_byteranges_response(content, ranges):
+    """
+    Returns a multipart/byteranges response with the given (first, last) byte ranges of the
+    given content, and its Content-Length.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec19.html#sec19.2
+    """
+    boundary = uuid4().hex
+    parts = [
+        (
+            first,
+            last,
+            (
+                f'\r\n--{boundary}\r\n'
+                f'Content-Type: {content.content_type}\r\n'
+                f'Content-Range: bytes {first}-{last}/{content.length}\r\n\r\n'
+            ).encode('utf-8'),
+        )
+        for first, last in ranges
+    ]
+    closing = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+    def stream_parts():
+        """
+        Streams the parts of the response.
+        """
+        for first, last, headers in parts:
+            yield headers
+            yield from content.stream_data_in_range(first, last, STREAMING_CHUNK_SIZE)
+        yield closing
+
+    response = make_content_response(content, stream_parts())
+    response['Content-Type'] = f'multipart/byteranges; boundary={boundary}'
+    response['Content-Length'] = str(
+        sum(len(headers) + last - first + 1 for first, last, headers in parts) + len(closing)
+    )
+    return response
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
@@ -0,0 +1,19 @@
+"""
+Signal handlers invalidating the cached content of assets.
+"""
+
+
+from django.dispatch.dispatcher import receiver
+
+from xmodule.contentstore.django import asset_changed
+
+from .caching import del_cached_content
+
+
+@receiver(asset_changed)
+def _listen_for_asset_changed(sender, location, **kwargs):  # pylint: disable=unused-argument
+    """
+    Catches the signal that an asset has changed in the contentstore and
+    deletes its cached content and metadata.
+    """
+    del_cached_content(location)
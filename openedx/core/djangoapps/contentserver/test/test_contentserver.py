@@ -13,6 +13,7 @@ from uuid import uuid4
 
 import ddt
 from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import RequestFactory
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -29,7 +30,8 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from common.djangoapps.student.models import CourseEnrollment
 from common.djangoapps.student.tests.factories import UserFactory, AdminFactory
 
-from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
+from .. import caching
+from ..middleware import coalesce_ranges, parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
 
@@ -68,6 +70,15 @@ def get_old_style_versioned_asset_url(asset_path):
     return asset_path
 
 
+def get_response_body(response):
+    """
+    Returns the body of the given response, streamed or not.
+    """
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
 @ddt.ddt
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
 class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
@@ -243,7 +254,8 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request, one of which is syntactically invalid, output the
+        full content.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -287,6 +299,141 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked)))
         assert resp.status_code == 416
 
+    def test_range_request_multiple_ranges_multipart(self):
+        """
+        Test that satisfiable multiple ranges in request output a multipart/byteranges message
+        with a part for each range.
+        """
+        first_byte = self.length_unlocked // 4
+        last_byte = self.length_unlocked // 2
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -10, {length}-'.format(
+            first=first_byte, last=last_byte, length=self.length_unlocked))
+
+        assert resp.status_code == 206
+        assert resp['Content-Type'].startswith('multipart/byteranges; boundary=')
+        body = get_response_body(resp)
+        assert resp['Content-Length'] == str(len(body))
+        # The unsatisfiable range is ignored.
+        assert body.count(b'Content-Range: ') == 2
+        assert 'Content-Range: bytes {first}-{last}/{length}'.format(
+            first=first_byte, last=last_byte, length=self.length_unlocked).encode('utf-8') in body
+        assert 'Content-Range: bytes {first}-{last}/{length}'.format(
+            first=self.length_unlocked - 10, last=self.length_unlocked - 1, length=self.length_unlocked
+        ).encode('utf-8') in body
+
+    def test_range_request_overlapping_ranges(self):
+        """
+        Test that overlapping and adjacent ranges are merged, and served as a single range.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=20-29, 0-9, 5-19')
+
+        assert resp.status_code == 206
+        assert resp['Content-Range'] == 'bytes 0-29/{length}'.format(length=self.length_unlocked)
+        assert resp['Content-Length'] == '30'
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that requests for more than MAX_BYTE_RANGES ranges output the full content.
+        """
+        ranges = ', '.join('{first}-{first}'.format(first=first) for first in range(0, 40, 2))
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=' + ranges)
+
+        assert resp.status_code == 200
+        assert 'Content-Range' not in resp
+        assert resp['Content-Length'] == str(self.length_unlocked)
+
+    def test_range_request_with_mismatched_if_range(self):
+        """
+        Test that a range request whose If-Range does not match the asset outputs the full content.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-10', HTTP_IF_RANGE='"{}"'.format(FAKE_MD5_HASH))
+        assert resp.status_code == 200
+        assert 'Content-Range' not in resp
+
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-10', HTTP_IF_RANGE=resp['ETag'])
+        assert resp.status_code == 206
+
+    def test_etag(self):
+        """
+        Test that assets are sent with a strong ETag based on their digest, which conditional
+        requests are checked against.
+        """
+        content = AssetManager.find(self.unlocked_asset, as_stream=True)
+        resp = self.client.get(self.url_unlocked)
+        assert resp.status_code == 200
+        assert resp['ETag'] == '"{}"'.format(content.content_digest)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=resp['ETag'])
+        assert resp.status_code == 304
+        assert resp['ETag'] == '"{}"'.format(content.content_digest)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"{}"'.format(FAKE_MD5_HASH))
+        assert resp.status_code == 200
+
+    @ddt.data(0, 1024 * 1024)
+    def test_full_content(self, max_asset_size):
+        """
+        Test that assets are served whole, streamed or not depending on whether they can be cached.
+        """
+        content = AssetManager.find(self.unlocked_asset, as_stream=True)
+        with override_settings(COURSE_ASSETS_CACHE_MAX_ASSET_SIZE=max_asset_size):
+            resp = self.client.get(self.url_unlocked)
+            assert resp.status_code == 200
+            assert resp.streaming == (max_asset_size == 0)
+            assert get_response_body(resp) == b''.join(content.stream_data())
+
+    @override_settings(COURSE_ASSETS_CACHE_MAX_ASSET_SIZE=0)
+    def test_metadata_cached(self):
+        """
+        Test that conditional requests for assets too large to be cached are answered from
+        their cached metadata, and that the metadata is invalidated when the asset changes.
+        """
+        with patch.object(caching, 'CONTENT_CACHE', LocMemCache('test_contentserver', {})):
+            with patch(
+                'openedx.core.djangoapps.contentserver.middleware.AssetManager.find', wraps=AssetManager.find
+            ) as mock_find:
+                resp = self.client.get(self.url_unlocked)
+                assert resp.status_code == 200
+                assert mock_find.call_count == 1
+
+                resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=resp['ETag'])
+                assert resp.status_code == 304
+                resp = self.client.get(self.url_unlocked_versioned_old_style)
+                assert resp.status_code == 200
+                assert mock_find.call_count == 2
+
+                self.contentstore.set_attr(self.unlocked_asset, 'locked', True)
+                try:
+                    self.client.logout()
+                    resp = self.client.get(self.url_unlocked)
+                    assert resp.status_code == 403
+                    assert mock_find.call_count == 3
+                finally:
+                    self.contentstore.set_attr(self.unlocked_asset, 'locked', False)
+
+    def test_missing_asset_cached(self):
+        """
+        Test that requests for missing assets are answered from the cache, until the asset is saved.
+        """
+        missing_asset = self.course_key.make_asset_key('asset', 'missing.txt')
+        with patch.object(caching, 'CONTENT_CACHE', LocMemCache('test_contentserver', {})):
+            with patch(
+                'openedx.core.djangoapps.contentserver.middleware.AssetManager.find', wraps=AssetManager.find
+            ) as mock_find:
+                for _ in range(2):
+                    resp = self.client.get(str(missing_asset))
+                    assert resp.status_code == 404
+                assert mock_find.call_count == 1
+
+                content = StaticContent(missing_asset, 'missing.txt', 'text/plain', b'no longer missing')
+                self.contentstore.save(content)
+                try:
+                    resp = self.client.get(str(missing_asset))
+                    assert resp.status_code == 200
+                    assert mock_find.call_count == 2
+                finally:
+                    self.contentstore.delete(missing_asset)
+
     def test_vary_header_sent(self):
         """
         Tests that we're properly setting the Vary header to ensure browser requests don't get
@@ -408,7 +555,7 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
     """
-    Tests for the parse_range_header function.
+    Tests for the parse_range_header and coalesce_ranges functions.
     """
 
     def setUp(self):
@@ -433,6 +580,17 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         assert len(ranges) == excepted_ranges_length
         assert ranges == expected_ranges
 
+    @ddt.data(
+        ([(0, 9)], [(0, 9)]),
+        ([(20, 29), (0, 9)], [(0, 9), (20, 29)]),
+        ([(0, 9), (10, 19)], [(0, 19)]),
+        ([(0, 9), (5, 19), (30, 39), (35, 36)], [(0, 19), (30, 39)]),
+        ([(9900, 9999), (9800, 9999)], [(9800, 9999)]),
+    )
+    @ddt.unpack
+    def test_coalesce_ranges(self, ranges, expected_ranges):
+        assert coalesce_ranges(ranges) == expected_ranges
+
     @ddt.data(
         ('bytes=one-20', ValueError, 'invalid literal for int()'),
         ('bytes=-one', ValueError, 'invalid literal for int()'),